@@ -1,3 +1,4 @@
+from typing import Union
 from errors import ErrorHandler, ErrorPos
 from expr import Expr, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
 from stmt import Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
@@ -6,9 +7,16 @@ from tokens import Token, TokenType
 from environment import TypeEnvironment
 
 class Analyzer():
-    def __init__(self, errorHandler: ErrorHandler) -> None:
+    def __init__(self, errorHandler: ErrorHandler, iterative: bool = False) -> None:
         self.__typeEnv: TypeEnvironment = TypeEnvironment()
         self.__errorHandler = errorHandler
+        self.__iterative = iterative
+
+    # Between calls to typeCheckProgram on top-level declarations this is the environment
+    # of the global variables.
+    @property
+    def typeEnvironment(self) -> TypeEnvironment:
+        return self.__typeEnv
 
     def __error(self, pos: ErrorPos, message: str) -> PLObjType:
         self.__errorHandler.error(pos, message)
@@ -16,10 +24,10 @@ class Analyzer():
 
     def __typeCheckVarStmt(self, stmt: VarStmt) -> None:
         if stmt.initializer == None:
-            stmt.initializer.rType = PLObjType.NIL
+            self.__typeEnv.define(stmt.name.lexeme, PLObjType.NIL)
         else:
             stmt.initializer.rType = self.__typeCheck(stmt.initializer)
-        self.__typeEnv.define(stmt.name.lexeme, stmt.initializer.rType)
+            self.__typeEnv.define(stmt.name.lexeme, stmt.initializer.rType)
 
     def __typeCheckBlockStmt(self, stmt: BlockStmt) -> None:
         previousTypeEnv = self.__typeEnv
@@ -30,10 +38,14 @@ class Analyzer():
     def __typeCheckIfStmt(self, stmt: IfStmt) -> None:
         #TODO: Conditional type-checking
         self.__typeCheck(stmt.condition)
-        self.typeCheckProgram(stmt.thenBranch)
-        self.typeCheckProgram(stmt.elseBranch)
+        self.typeCheckProgram([stmt.thenBranch])
+        if stmt.elseBranch != None:
+            self.typeCheckProgram([stmt.elseBranch])
 
     def typeCheckProgram(self, program: list[Stmt]) -> None:
+        if self.__iterative:
+            self.__typeCheckProgramIterative(program)
+            return
         for stmt in program:
             if isinstance(stmt, ExprStmt) or isinstance(stmt, PrintStmt):
                 self.__typeCheck(stmt.expression)
@@ -41,10 +53,78 @@ class Analyzer():
                 self.__typeCheckVarStmt(stmt)
             elif isinstance(stmt, BlockStmt):
                 self.__typeCheckBlockStmt(stmt)
-            elif isinstance(stmt, ifStmt):
+            elif isinstance(stmt, IfStmt):
                 self.__typeCheckIfStmt(stmt)
 
+    # Checks statements in the same order as typeCheckProgram, but keeps pending statements
+    # and the type environments to restore on an explicit stack.
+    def __typeCheckProgramIterative(self, program: list[Stmt]) -> None:
+        work: list = list(reversed(program))
+        while work:
+            stmt = work.pop()
+            if isinstance(stmt, TypeEnvironment):
+                self.__typeEnv = stmt
+            elif isinstance(stmt, ExprStmt) or isinstance(stmt, PrintStmt):
+                self.__typeCheck(stmt.expression)
+            elif isinstance(stmt, VarStmt):
+                self.__typeCheckVarStmt(stmt)
+            elif isinstance(stmt, BlockStmt):
+                work.append(self.__typeEnv)
+                self.__typeEnv = TypeEnvironment(self.__typeEnv)
+                work.extend(reversed(stmt.statements))
+            elif isinstance(stmt, IfStmt):
+                self.__typeCheck(stmt.condition)
+                if stmt.elseBranch != None:
+                    work.append(stmt.elseBranch)
+                work.append(stmt.thenBranch)
+
+    def __children(self, expr: Expr) -> Union[tuple, None]:
+        if isinstance(expr, Grouping): return (expr.expression,)
+        elif isinstance(expr, Unary): return (expr.right,)
+        elif isinstance(expr, Binary): return (expr.left, expr.right)
+        elif isinstance(expr, Ternary): return (expr.left, expr.mid, expr.right)
+        elif isinstance(expr, Assignment): return (expr.value,)
+        return None
+
+    # Post-order walk with explicit stacks: a node is combined once the types of all its
+    # children are on the result stack, which reports errors in the recursive order.
+    def __typeCheckIterative(self, root: Expr) -> PLObjType:
+        results: list[PLObjType] = []
+        work: list[tuple[Expr, bool]] = [(root, False)]
+        while work:
+            expr, expanded = work.pop()
+            if expanded:
+                count = len(self.__children(expr))
+                childTypes = results[-count:]
+                del results[-count:]
+                results.append(self.__combine(expr, childTypes))
+                continue
+            if expr.rType != PLObjType.UNKNOWN:
+                results.append(expr.rType)
+                continue
+            children = self.__children(expr)
+            if children == None:
+                results.append(self.__combine(expr, []))
+                continue
+            work.append((expr, True))
+            for child in reversed(children):
+                work.append((child, False))
+        return results.pop()
+
+    def __combine(self, expr: Expr, childTypes: list[PLObjType]) -> PLObjType:
+        if isinstance(expr, Grouping): return self.__groupingType(expr, *childTypes)
+        elif isinstance(expr, Unary): return self.__unaryType(expr, *childTypes)
+        elif isinstance(expr, Binary): return self.__binaryType(expr, *childTypes)
+        elif isinstance(expr, Ternary): return self.__ternaryType(expr, *childTypes)
+        elif isinstance(expr, Variable): return self.__typeCheckVariable(expr)
+        elif isinstance(expr, Assignment): return self.__assignmentType(expr)
+        elif isinstance(expr, Logical): return self.__typeCheckLogical(expr)
+        else:
+            self.__error(expr.pos, f"Unhandled type-check")
+            return PLObjType.ERROR
+
     def __typeCheck(self, expr: Expr) -> PLObjType:
+        if self.__iterative: return self.__typeCheckIterative(expr)
         if expr.rType != PLObjType.UNKNOWN: return expr.rType
         elif isinstance(expr, Grouping): return self.__typeCheckGrouping(expr)
         elif isinstance(expr, Unary): return self.__typeCheckUnary(expr)
@@ -58,11 +138,16 @@ class Analyzer():
             return PLObjType.ERROR
 
     def __typeCheckGrouping(self, expr: Grouping) -> PLObjType:
-        expr.rType = self.__typeCheck(expr.expression)
+        return self.__groupingType(expr, self.__typeCheck(expr.expression))
+
+    def __groupingType(self, expr: Grouping, innerType: PLObjType) -> PLObjType:
+        expr.rType = innerType
         return expr.rType
 
     def __typeCheckUnary(self, expr: Unary) -> PLObjType:
-        rightType = self.__typeCheck(expr.right)
+        return self.__unaryType(expr, self.__typeCheck(expr.right))
+
+    def __unaryType(self, expr: Unary, rightType: PLObjType) -> PLObjType:
         if rightType == PLObjType.ERROR:
             expr.rType = PLObjType.ERROR
         if expr.operator.tokenType == TokenType.MINUS:
@@ -77,6 +162,9 @@ class Analyzer():
     def __typeCheckBinary(self, expr: Binary) -> PLObjType:
         leftType = self.__typeCheck(expr.left)
         rightType = self.__typeCheck(expr.right)
+        return self.__binaryType(expr, leftType, rightType)
+
+    def __binaryType(self, expr: Binary, leftType: PLObjType, rightType: PLObjType) -> PLObjType:
         if leftType == PLObjType.ERROR or rightType == PLObjType.ERROR:
             expr.rType = PLObjType.ERROR
         elif expr.operator.tokenType == TokenType.PLUS:
@@ -133,6 +221,9 @@ class Analyzer():
         condType = self.__typeCheck(expr.left)
         leftType = self.__typeCheck(expr.mid)
         rightType = self.__typeCheck(expr.right)
+        return self.__ternaryType(expr, condType, leftType, rightType)
+
+    def __ternaryType(self, expr: Ternary, condType: PLObjType, leftType: PLObjType, rightType: PLObjType) -> PLObjType:
         if condType == PLObjType.ERROR or leftType == PLObjType.ERROR or rightType == PLObjType.ERROR:
             expr.rType = PLObjType.ERROR
         elif expr.leftOp.tokenType == TokenType.QUERY and expr.rightOp.tokenType == TokenType.COLON:
@@ -152,9 +243,14 @@ class Analyzer():
 
     def __typeCheckAssignment(self, expr: Assignment) -> PLObjType:
         self.__typeCheck(expr.value)
-        expr.rType = self.__typeEnv.assign(expr.name, expr.value.rType)
-        if expr.rType == PLObjType.ERROR:
-            self.__error(expr.pos, f"Can't reassign undefined variable '{expr.name.lexeme}'")
+        return self.__assignmentType(expr)
+
+    def __assignmentType(self, expr: Assignment) -> PLObjType:
+        objType = self.__typeEnv.assign(expr.name, expr.value.rType)
+        if objType == None:
+            expr.rType = self.__error(expr.pos, f"Can't reassign undefined variable '{expr.name.lexeme}'")
+        else:
+            expr.rType = objType
         return expr.rType
 
     def __typeCheckLogical(self, expr: Logical) -> PLObjType:
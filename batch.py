@@ -0,0 +1,109 @@
+import io
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Iterator
+from analyzer import Analyzer
+from errors import ErrorHandler
+from cache import ProgramCache
+from engine import ENGINES, SCANNERS
+from pyLox import run, exitStatus
+
+# Exit status for a script that could not be read.
+NO_INPUT = 66
+# Exit status for a script that crashed the interpreter, e.g. by nesting too deeply.
+INTERNAL_ERROR = 70
+
+class ScriptResult():
+    def __init__(self, script: str, output: str, status: int, seconds: float) -> None:
+        self.script: str = script
+        self.output: str = output
+        self.status: int = status
+        self.seconds: float = seconds
+
+# Settings of the current worker process, set once by initWorker.
+_settings: dict = {}
+
+def initWorker(engine: str, optimize: bool, scanner: str, useCache: bool) -> None:
+    _settings.update(engine=engine, optimize=optimize, scanner=scanner, useCache=useCache)
+
+# Runs one script as pyLox.py would, but collects what it prints, including error
+# reports, instead of writing it to the terminal.
+def runScript(script: str) -> ScriptResult:
+    start = time.perf_counter()
+    try:
+        with open(script, "r") as f:
+            source = f.read()
+    except OSError as e:
+        return ScriptResult(script, f"Error: {e.strerror}\n", NO_INPUT, time.perf_counter() - start)
+
+    engine = _settings["engine"]
+    errorHandler = ErrorHandler()
+    analyzer = Analyzer(errorHandler, iterative=engine == "stack")
+    interpreter = ENGINES[engine](errorHandler)
+    cache = ProgramCache(script) if _settings["useCache"] else None
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            run(source, analyzer, interpreter, errorHandler, _settings["optimize"], scannerClass=SCANNERS[_settings["scanner"]], cache=cache)
+            status = exitStatus(errorHandler)
+        except Exception as e:
+            # One broken script must not take the rest of the batch down with it.
+            print(f"Error: {type(e).__name__}: {e}")
+            status = INTERNAL_ERROR
+    return ScriptResult(script, output.getvalue(), status, time.perf_counter() - start)
+
+# Expands directories to the .lox files below them and glob patterns to their matches.
+def expandScripts(patterns: list[str]) -> list[str]:
+    scripts: list[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            scripts.extend(sorted(glob.glob(os.path.join(glob.escape(pattern), "**", "*.lox"), recursive=True)))
+        elif glob.has_magic(pattern):
+            scripts.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            scripts.append(pattern)
+    return scripts
+
+# Runs scripts across a pool of worker processes, each of which imports the interpreter
+# once and then takes scripts one at a time. Results are yielded as scripts finish.
+def runBatch(scripts: list[str], engine: str = "tree", optimize: bool = True, scanner: str = "fast", useCache: bool = True, jobs: int = None) -> Iterator[ScriptResult]:
+    with ProcessPoolExecutor(jobs, initializer=initWorker, initargs=(engine, optimize, scanner, useCache)) as pool:
+        futures = [pool.submit(runScript, script) for script in scripts]
+        for future in as_completed(futures):
+            yield future.result()
+
+def main():
+    argParser = argparse.ArgumentParser(prog="batch.py", description="Run many Lox scripts in parallel")
+    argParser.add_argument("scripts", nargs="+",
+        help="scripts, glob patterns or directories to search for .lox files")
+    argParser.add_argument("--jobs", "-j", type=int, default=os.cpu_count(),
+        help="number of worker processes (default: one per CPU)")
+    argParser.add_argument("--engine", choices=ENGINES.keys(), default="tree")
+    argParser.add_argument("--no-optimize", dest="optimize", action="store_false")
+    argParser.add_argument("--scanner", choices=SCANNERS.keys(), default="fast")
+    argParser.add_argument("--no-cache", dest="cache", action="store_false")
+    argParser.add_argument("--quiet", "-q", action="store_true",
+        help="print only the status line of each script, not its output")
+    args = argParser.parse_args()
+
+    scripts = expandScripts(args.scripts)
+    start = time.perf_counter()
+    failed = 0
+    worst = 0
+    for result in runBatch(scripts, args.engine, args.optimize, args.scanner, args.cache, args.jobs):
+        print(f"==> {result.script} [{result.status}] {result.seconds * 1000:.1f} ms")
+        if not args.quiet:
+            sys.stdout.write(result.output)
+        if result.status != 0:
+            failed += 1
+            worst = max(worst, result.status)
+    print(f"{len(scripts)} scripts, {failed} failed, {time.perf_counter() - start:.2f} s")
+    exit(worst)
+
+if __name__ == '__main__':
+    main()
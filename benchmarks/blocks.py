@@ -0,0 +1,79 @@
+import io
+import os
+import sys
+import time
+import argparse
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Parser
+from analyzer import Analyzer
+from resolver import Resolver
+from errors import ErrorHandler
+from engine import ENGINES
+from stats import RunStats
+
+# Blocks as they appear in practice: branches of ifs and grouping blocks that declare
+# nothing, inside blocks that do.
+def blockWorkload(statements: int) -> str:
+    lines = ["var total = 0;"]
+    for i in range(statements):
+        lines.append(f"{{ var x = {i % 7}; if (x > 3) {{ total = total + x; }} else {{ {{ total = total - 1; }} }} {{ var y = x * 2; {{ total = total + y; }} }} }}")
+    lines.append("print total;")
+    return "\n".join(lines)
+
+def frontEnd(source: str, elideScopes: bool) -> list:
+    errorHandler = ErrorHandler()
+    program = Parser(Scanner(source, errorHandler).scanTokens(), errorHandler).parse()
+    Analyzer(errorHandler).typeCheckProgram(program)
+    Resolver(elideScopes).resolve(program)
+    if errorHandler.reportErrors(source):
+        raise SystemExit("benchmark workload failed to compile")
+    return program
+
+def environmentsCreated(engine, program: list) -> int:
+    interpreter = engine(ErrorHandler())
+    stats = RunStats()
+    stats.start()
+    try:
+        with redirect_stdout(io.StringIO()):
+            interpreter.interpret(program)
+    finally:
+        stats.stop()
+    return stats.counts["environments"]
+
+def bestTime(engine, program: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        interpreter = engine(ErrorHandler())
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            interpreter.interpret(program)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare environments created and run time with and without eliding the scopes of blocks that declare nothing")
+    argParser.add_argument("--statements", type=int, default=5000)
+    argParser.add_argument("--repeat", type=int, default=5)
+    args = argParser.parse_args()
+
+    source = blockWorkload(args.statements)
+    programs = {elide: frontEnd(source, elide) for elide in (False, True)}
+    print(f"{'engine':<8} {'scopes':<8} {'environments':>12} {'time':>10}")
+    for name, engine in ENGINES.items():
+        # The transpiler keeps locals in Python variables rather than environments.
+        if name == "python":
+            continue
+        baseline = None
+        for elide, program in programs.items():
+            created = environmentsCreated(engine, program)
+            seconds = bestTime(engine, program, args.repeat)
+            if baseline == None:
+                baseline = seconds
+            print(f"{name:<8} {'elided' if elide else 'all':<8} {created:>12} {seconds * 1000:7.1f} ms {baseline / seconds:6.2f}x")
+
+if __name__ == '__main__':
+    main()
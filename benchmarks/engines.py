@@ -0,0 +1,83 @@
+import os
+import sys
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Parser
+from analyzer import Analyzer
+from resolver import Resolver
+from interpreter import Interpreter
+from stackinterpreter import StackInterpreter
+from vm import VM
+from closures import ClosureInterpreter
+from transpiler import PythonInterpreter
+from errors import ErrorHandler
+
+ENGINES = {
+    "tree": Interpreter,
+    "stack": StackInterpreter,
+    "vm": VM,
+    "closure": ClosureInterpreter,
+    "python": PythonInterpreter,
+}
+
+def arithmeticWorkload(statements: int) -> str:
+    lines = ["var a = 1;", "var b = 2;", "{", "var c = 3;"]
+    for _ in range(statements):
+        lines.append("a = a + b * 2 - c / 3; b = (b + 1) * 1; c = a > b ? c : c + 1;")
+    lines.append("print a;")
+    lines.append("}")
+    return "\n".join(lines)
+
+def frontEnd(source: str) -> list:
+    errorHandler = ErrorHandler()
+    program = Parser(Scanner(source, errorHandler).scanTokens(), errorHandler).parse()
+    Analyzer(errorHandler).typeCheckProgram(program)
+    Resolver().resolve(program)
+    if errorHandler.reportErrors(source):
+        raise SystemExit("benchmark workload failed to compile")
+    return program
+
+def timeEngine(engine, program: list, repeat: int) -> tuple[float, float]:
+    bestCompile = 0.0
+    bestRun = float("inf")
+    for _ in range(repeat):
+        interpreter = engine(ErrorHandler())
+        with redirect_stdout(io.StringIO()):
+            if hasattr(interpreter, "compile"):
+                start = time.perf_counter()
+                compiled = interpreter.compile(program)
+                compileTime = time.perf_counter() - start
+                start = time.perf_counter()
+                interpreter.run(compiled)
+            else:
+                compileTime = 0.0
+                start = time.perf_counter()
+                interpreter.interpret(program)
+            runTime = time.perf_counter() - start
+        if runTime < bestRun:
+            bestCompile, bestRun = compileTime, runTime
+    return bestCompile, bestRun
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare execution engines on an arithmetic-heavy script")
+    argParser.add_argument("--statements", type=int, default=20000)
+    argParser.add_argument("--repeat", type=int, default=5)
+    args = argParser.parse_args()
+
+    program = frontEnd(arithmeticWorkload(args.statements))
+    baseline = None
+    print(f"{'engine':<8} {'compile':>11} {'run':>11} {'speedup':>8}")
+    for name, engine in ENGINES.items():
+        compileTime, runTime = timeEngine(engine, program, args.repeat)
+        if baseline == None:
+            baseline = runTime
+        print(f"{name:<8} {compileTime * 1000:8.1f} ms {runTime * 1000:8.1f} ms {baseline / runTime:7.2f}x")
+
+if __name__ == '__main__':
+    main()
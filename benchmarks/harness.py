@@ -0,0 +1,214 @@
+import gc
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import Parser
+from analyzer import Analyzer
+from optimizer import Optimizer
+from specializer import Specializer
+from resolver import Resolver
+from errors import ErrorHandler
+from engine import ENGINES, SCANNERS
+from workloads import WORKLOADS
+
+# Bump when the layout of a results file changes.
+FORMAT_VERSION = 1
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Phases shorter than this in the baseline are reported but never flagged, because timer
+# resolution and scheduling noise dominate them.
+MIN_COMPARED_SECONDS = 0.005
+
+# Phases are single-threaded and CPU-bound, so they are timed in CPU time of the process,
+# which unlike wall time does not count the time other processes were scheduled instead.
+clock = time.process_time
+
+# Settings that must match for two results files to be comparable.
+SETTINGS = ("engine", "scanner", "optimize", "scale")
+
+class WorkloadFailed(Exception):
+    pass
+
+# Runs the pipeline on source once and returns the seconds spent in each phase.
+def timePhases(source: str, engine: str, scanner: str, optimize: bool) -> dict[str, float]:
+    errorHandler = ErrorHandler()
+    times: dict[str, float] = {}
+
+    start = clock()
+    tokens = SCANNERS[scanner](source, errorHandler).scanTokens()
+    times["scan"] = clock() - start
+
+    start = clock()
+    program = Parser(tokens, errorHandler).parse()
+    times["parse"] = clock() - start
+
+    start = clock()
+    Analyzer(errorHandler, iterative=engine == "stack").typeCheckProgram(program)
+    times["check"] = clock() - start
+    if errorHandler.hadError:
+        raise WorkloadFailed(f"{len(errorHandler.errors())} compile errors")
+
+    if optimize:
+        start = clock()
+        program = Optimizer().optimize(program)
+        Specializer().specialize(program)
+        times["optimize"] = clock() - start
+
+    start = clock()
+    Resolver().resolve(program)
+    times["resolve"] = clock() - start
+
+    interpreter = ENGINES[engine](errorHandler)
+    with redirect_stdout(io.StringIO()):
+        start = clock()
+        interpreter.interpret(program)
+        times["interpret"] = clock() - start
+    if errorHandler.hadRuntimeError:
+        raise WorkloadFailed(f"{len(errorHandler.errors())} runtime errors")
+    return times
+
+# Runs a workload repeat times. Every repetition starts from the source again, since the
+# later phases annotate the trees the earlier ones built. As with timeit, the cyclic
+# collector is off while a repetition runs; otherwise its passes over the growing syntax
+# tree land in whichever phase happens to cross the allocation threshold.
+def runWorkload(name: str, scale: float, repeat: int, engine: str, scanner: str, optimize: bool) -> dict:
+    generator, size = WORKLOADS[name]
+    source = generator(max(1, round(size * scale)))
+    samples: dict[str, list[float]] = {}
+    gcEnabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            for phase, seconds in timePhases(source, engine, scanner, optimize).items():
+                samples.setdefault(phase, []).append(seconds)
+            if gcEnabled: gc.enable()
+    finally:
+        if gcEnabled: gc.enable()
+    return {
+        "sourceBytes": len(source.encode("utf-8")),
+        "phases": {phase: {"best": min(times), "median": statistics.median(times)} for phase, times in samples.items()},
+    }
+
+def runSuite(names: list[str], scale: float = 1.0, repeat: int = 5, engine: str = "tree", scanner: str = "classic", optimize: bool = False) -> dict:
+    results = {
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "engine": engine,
+        "scanner": scanner,
+        "optimize": optimize,
+        "scale": scale,
+        "repeat": repeat,
+        "workloads": {},
+    }
+    for name in names:
+        results["workloads"][name] = runWorkload(name, scale, repeat, engine, scanner, optimize)
+    return results
+
+# Returns (workload, phase, baseline seconds, current seconds) for every phase whose best
+# time grew by more than threshold, a fraction of the baseline time.
+def findRegressions(baseline: dict, current: dict, threshold: float) -> list[tuple[str, str, float, float]]:
+    regressions = []
+    for name, workload in current["workloads"].items():
+        basePhases = baseline["workloads"].get(name, {}).get("phases", {})
+        for phase, times in workload["phases"].items():
+            if phase not in basePhases:
+                continue
+            before = basePhases[phase]["best"]
+            after = times["best"]
+            if before >= MIN_COMPARED_SECONDS and after > before * (1 + threshold):
+                regressions.append((name, phase, before, after))
+    return regressions
+
+def mismatchedSettings(baseline: dict, current: dict) -> list[str]:
+    return [setting for setting in SETTINGS if baseline.get(setting) != current.get(setting)]
+
+def printResults(results: dict, baseline: dict = None) -> None:
+    print(f"{'workload':<12} {'phase':<10} {'best':>11} {'median':>11} {'baseline':>11} {'change':>8}")
+    for name, workload in results["workloads"].items():
+        basePhases = baseline["workloads"].get(name, {}).get("phases", {}) if baseline != None else {}
+        for phase, times in workload["phases"].items():
+            line = f"{name:<12} {phase:<10} {times['best'] * 1000:8.1f} ms {times['median'] * 1000:8.1f} ms"
+            if phase in basePhases:
+                before = basePhases[phase]["best"]
+                line += f" {before * 1000:8.1f} ms {(times['best'] / before - 1) * 100:+7.1f}%"
+            print(line)
+
+def writeJson(path: str, data: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+def main():
+    argParser = argparse.ArgumentParser(description="Time each interpreter phase on the benchmark workloads and compare against a baseline")
+    argParser.add_argument("workloads", nargs="*",
+        help=f"workloads to run (default: all of {', '.join(WORKLOADS.keys())})")
+    argParser.add_argument("--repeat", type=int, default=5,
+        help="runs per workload; the best and median time of each phase are recorded")
+    argParser.add_argument("--scale", type=float, default=1.0,
+        help="multiplies the size of every workload")
+    argParser.add_argument("--engine", choices=ENGINES.keys(), default="tree")
+    argParser.add_argument("--scanner", choices=SCANNERS.keys(), default="classic")
+    argParser.add_argument("--optimize", action="store_true",
+        help="run the optimizer and specializer as a phase of their own")
+    argParser.add_argument("--output", "-o",
+        help="write the results as JSON to this file")
+    argParser.add_argument("--baseline", default=DEFAULT_BASELINE,
+        help="results file to compare against (default: benchmarks/baseline.json)")
+    argParser.add_argument("--save-baseline", dest="saveBaseline", action="store_true",
+        help="store the results as the new baseline instead of comparing against it")
+    argParser.add_argument("--threshold", type=float, default=0.15,
+        help="slowdown of a phase's best time, as a fraction, that counts as a regression (default: 0.15)")
+    args = argParser.parse_args()
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            argParser.error(f"unknown workload '{name}'")
+
+    try:
+        results = runSuite(args.workloads or list(WORKLOADS.keys()), args.scale, args.repeat, args.engine, args.scanner, args.optimize)
+    except WorkloadFailed as e:
+        print(f"Error: workload failed: {e}")
+        exit(2)
+    if args.output != None:
+        writeJson(args.output, results)
+    if args.saveBaseline:
+        writeJson(args.baseline, results)
+        printResults(results)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        mismatched = mismatchedSettings(baseline, results)
+        if mismatched:
+            print(f"Baseline not compared: it was recorded with different {', '.join(mismatched)}")
+            baseline = None
+        elif (baseline.get("implementation"), baseline.get("python")) != (results["implementation"], results["python"]):
+            print(f"Note: baseline was recorded on {baseline.get('implementation')} {baseline.get('python')}")
+    printResults(results, baseline)
+    if baseline == None:
+        return
+
+    regressions = findRegressions(baseline, results, args.threshold)
+    for name, phase, before, after in regressions:
+        print(f"Regression: {name} {phase} took {after * 1000:.1f} ms, baseline {before * 1000:.1f} ms")
+    if regressions:
+        exit(1)
+    print(f"No phase slower than the baseline by more than {args.threshold * 100:.0f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import io
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plobject import PLObjType, PLObject
+from errors import ErrorHandler
+from scanner import Scanner
+from engines import ENGINES, arithmeticWorkload, frontEnd
+
+# Replica of the original PLObject layout, which kept its fields in a per-instance dict.
+class DictPLObject():
+    def __init__(self, objType: PLObjType, value) -> None:
+        self.objType: PLObjType = objType
+        self.value = value
+
+def bytesPerValue(cls, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values = [cls(PLObjType.NUMBER, float(n) + 0.5) for n in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The float payload and the list slot are shared by both layouts.
+    payload = sys.getsizeof(0.5) + 8
+    del values
+    return (after - before) / count - payload
+
+def tokenMemory(source: str, compact: bool) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tokens = Scanner(source, ErrorHandler(), compact).scanTokens()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del tokens
+    return retained
+
+def peakMemory(engine, program: list) -> int:
+    interpreter = engine(ErrorHandler())
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        interpreter.interpret(program)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main():
+    argParser = argparse.ArgumentParser(description="Measure the memory footprint of runtime values")
+    argParser.add_argument("--values", type=int, default=100000)
+    argParser.add_argument("--statements", type=int, default=5000)
+    args = argParser.parse_args()
+
+    legacy = bytesPerValue(DictPLObject, args.values)
+    current = bytesPerValue(PLObject, args.values)
+    print(f"{'layout':<8} {'bytes/value':>12}")
+    print(f"{'dict':<8} {legacy:12.1f}")
+    print(f"{'slots':<8} {current:12.1f}")
+    print()
+
+    source = arithmeticWorkload(args.statements)
+    print(f"{'tokens':<8} {'retained':>11}")
+    print(f"{'list':<8} {tokenMemory(source, False) / 1024:8.1f} KiB")
+    print(f"{'compact':<8} {tokenMemory(source, True) / 1024:8.1f} KiB")
+    print()
+
+    program = frontEnd(source)
+    print(f"{'engine':<8} {'peak':>11}")
+    for name, engine in ENGINES.items():
+        print(f"{name:<8} {peakMemory(engine, program) / 1024:8.1f} KiB")
+
+if __name__ == '__main__':
+    main()
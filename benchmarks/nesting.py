@@ -0,0 +1,63 @@
+import os
+import sys
+import io
+import time
+import argparse
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Parser
+from analyzer import Analyzer
+from resolver import Resolver
+from interpreter import Interpreter
+from stackinterpreter import StackInterpreter
+from errors import ErrorHandler
+
+MODES = {
+    "recursive": (False, Interpreter),
+    "stack": (True, StackInterpreter),
+}
+
+def chainWorkload(depth: int, statements: int) -> str:
+    chain = "a" + " + a" * depth
+    return "var a = 1;\n" + "\n".join(f"print {chain};" for _ in range(statements))
+
+def blockWorkload(depth: int) -> str:
+    return "var x = 0;\n" + "{ var y = 1; " * depth + "x = x + y; print x;" + " }" * depth
+
+def timeMode(source: str, iterative: bool, engine) -> str:
+    errorHandler = ErrorHandler()
+    try:
+        start = time.perf_counter()
+        program = Parser(Scanner(source, errorHandler).scanTokens(), errorHandler).parse()
+        parsed = time.perf_counter()
+        Analyzer(errorHandler, iterative).typeCheckProgram(program)
+        Resolver().resolve(program)
+        checked = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            engine(errorHandler).interpret(program)
+        finished = time.perf_counter()
+    except RecursionError:
+        return f"{'RecursionError':>29}"
+    return f"{(checked - parsed) * 1000:9.1f} ms {(finished - checked) * 1000:9.1f} ms"
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare recursive and explicit-stack evaluation on deeply nested programs")
+    argParser.add_argument("--statements", type=int, default=200)
+    argParser.add_argument("--depths", type=int, nargs="+", default=[100, 300, 10000, 100000])
+    args = argParser.parse_args()
+
+    print(f"{'workload':<16} {'mode':<10} {'check':>12} {'run':>12}")
+    for depth in args.depths:
+        workloads = {
+            f"chain {depth}": chainWorkload(depth, max(1, args.statements * 100 // depth)),
+            f"blocks {depth}": blockWorkload(depth),
+        }
+        for name, source in workloads.items():
+            for mode, (iterative, engine) in MODES.items():
+                print(f"{name:<16} {mode:<10} {timeMode(source, iterative, engine)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Engine, compileParameterized
+from plobject import PLObjType
+
+PARAMETERS = {"n": PLObjType.NUMBER, "label": PLObjType.STRING, "verbose": PLObjType.BOOL}
+
+# A report template: the parameters are read throughout, and some runs divide by zero.
+def reportSource(statements: int) -> str:
+    lines = ["var total = 0;"]
+    for i in range(statements):
+        lines.append(f"{{ var x = n * {i % 7} - {i % 5}; total = total + (x > 3 ? x : -x); }}")
+        if i % 50 == 0:
+            lines.append(f"if (verbose) print label + \": \"; if (verbose) print total / (n - {i % 4});")
+    lines.append("print label; print total;")
+    return "\n".join(lines)
+
+def bindings(runs: int) -> list[dict]:
+    return [{"n": float(i % 9), "label": f"run {i}", "verbose": i % 3 == 0} for i in range(runs)]
+
+# What callers had to do before: splice the values into the source and compile it anew.
+def spliced(source: str, values: dict) -> str:
+    text = {"n": str(values["n"]), "label": f"\"{values['label']}\"", "verbose": "true" if values["verbose"] else "false"}
+    return "".join(f"var {name} = {text[name]};\n" for name in PARAMETERS) + source
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare compiling a program for every set of parameters with compiling it once and running it from a thread pool")
+    argParser.add_argument("--statements", type=int, default=300)
+    argParser.add_argument("--runs", type=int, default=200)
+    argParser.add_argument("--threads", type=int, default=8)
+    args = argParser.parse_args()
+
+    source = reportSource(args.statements)
+    runs = bindings(args.runs)
+
+    start = time.perf_counter()
+    engine = Engine(maxPrograms=0)
+    expected = [engine.execute(spliced(source, values)) for values in runs]
+    recompiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    program, errors = compileParameterized(source, PARAMETERS)
+    if program == None:
+        raise SystemExit(f"benchmark program failed to compile: {errors}")
+    sequential = [program.run(values) for values in runs]
+    once = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        threaded = list(pool.map(program.run, runs))
+    pooled = time.perf_counter() - start
+
+    # Runtime errors point into the spliced source, which is longer, so only messages compare.
+    def outcome(result):
+        return result.output, [error.message for error in result.errors]
+    for name, results in (("sequential", sequential), ("threaded", threaded)):
+        if [outcome(result) for result in results] != [outcome(result) for result in expected]:
+            raise SystemExit(f"{name} runs of the compiled program differ from recompiled runs")
+
+    print(f"{args.runs} runs of {args.statements} statements, {sum(not result.ok for result in expected)} with errors")
+    print(f"{'recompile every run':<24} {recompiled * 1000:9.1f} ms")
+    print(f"{'compile once':<24} {once * 1000:9.1f} ms {recompiled / once:6.2f}x")
+    print(f"{'compile once, threads':<24} {pooled * 1000:9.1f} ms {recompiled / pooled:6.2f}x")
+
+if __name__ == '__main__':
+    main()
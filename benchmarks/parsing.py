@@ -0,0 +1,33 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Parser
+from errors import ErrorHandler
+
+def expressionWorkload(statements: int) -> str:
+    lines = ["var a = 1; var b = 2; var c = 3; var d = 4; var x;"]
+    for i in range(statements):
+        lines.append(f"x = (a + b * {i} - c / 2 > d) == !a or b and c ? d : -a, b;")
+    return "\n".join(lines)
+
+def main():
+    argParser = argparse.ArgumentParser(description="Measure parser throughput on expression-heavy input")
+    argParser.add_argument("--statements", type=int, default=20000)
+    argParser.add_argument("--repeat", type=int, default=3)
+    args = argParser.parse_args()
+
+    tokens = Scanner(expressionWorkload(args.statements), ErrorHandler()).scanTokens()
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        Parser(tokens, ErrorHandler()).parse()
+        best = min(best, time.perf_counter() - start)
+    print(f"{len(tokens)} tokens in {best * 1000:.1f} ms: {len(tokens) / best / 1000:.1f} ktokens/s")
+
+if __name__ == '__main__':
+    main()
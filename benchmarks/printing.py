@@ -0,0 +1,74 @@
+import io
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from output import OutputSink
+from plobject import PLObjType, PLObject, NIL, TRUE, plNumber
+
+# The values printed by the print-heavy benchmark workload: names, counters, computed
+# numbers and concatenated strings.
+def printedValues(lines: int) -> list[PLObject]:
+    values = []
+    for i in range(lines // 4):
+        values.append(PLObject(PLObjType.STRING, "line"))
+        values.append(plNumber(float(i)))
+        values.append(plNumber(i * 2.5))
+        values.append(PLObject(PLObjType.STRING, f"{i}line"))
+    values.extend([NIL, TRUE] * ((lines - len(values)) // 2))
+    return values
+
+# The print statement as the engines wrote it before output sinks: one print call per line.
+def printEach(values: list[PLObject], stream) -> None:
+    for value in values:
+        print(value, file=stream)
+
+def sinkEach(bufferSize: int):
+    def run(values: list[PLObject], stream) -> None:
+        sink = OutputSink(stream, bufferSize)
+        write = sink.write
+        for value in values:
+            write(value)
+        sink.flush()
+    return run
+
+METHODS = {
+    "print": printEach,
+    "sink, unbuffered": sinkEach(0),
+    "sink, buffered": sinkEach(64 * 1024),
+}
+
+def linesPerSecond(method, values: list[PLObject], repeat: int, target: str) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        stream = io.StringIO() if target == "memory" else open(os.devnull, "w")
+        try:
+            start = time.perf_counter()
+            method(values, stream)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            stream.close()
+    return len(values) / best
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare lines per second of print statements through print and output sinks")
+    argParser.add_argument("--lines", type=int, default=200000)
+    argParser.add_argument("--repeat", type=int, default=5)
+    argParser.add_argument("--target", choices=("file", "memory"), default="file",
+        help="write to a file opened on the null device or to an in-memory buffer")
+    args = argParser.parse_args()
+
+    values = printedValues(args.lines)
+    print(f"{len(values)} lines to {args.target}")
+    baseline = None
+    for name, method in METHODS.items():
+        rate = linesPerSecond(method, values, args.repeat, args.target)
+        if baseline == None:
+            baseline = rate
+        print(f"{name:<18} {rate / 1e6:6.2f} M lines/s {rate / baseline:6.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from fastscanner import FastScanner
+from errors import ErrorHandler
+
+SCANNERS = {
+    "classic": Scanner,
+    "fast": FastScanner,
+}
+
+def scannerWorkload(statements: int) -> str:
+    lines = []
+    for i in range(statements):
+        lines.append(f"var value{i} = (value{i} + 12.5) * 3 >= 40 ? \"large\" : \"small\"; // comment {i}")
+        lines.append(f"/* block\n   comment */ if (value{i} != nil and true) print value{i};")
+    return "\n".join(lines)
+
+def throughput(scanner, source: str, repeat: int, compact: bool) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scanner(source, ErrorHandler(), compact).scanTokens()
+        best = min(best, time.perf_counter() - start)
+    return len(source.encode("utf-8")) / best / 1e6
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare scanner throughput")
+    argParser.add_argument("--statements", type=int, default=20000)
+    argParser.add_argument("--repeat", type=int, default=3)
+    args = argParser.parse_args()
+
+    source = scannerWorkload(args.statements)
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    print(f"{'scanner':<8} {'tokens':<8} {'throughput':>12}")
+    baseline = None
+    for name, scanner in SCANNERS.items():
+        for compact in (False, True):
+            rate = throughput(scanner, source, args.repeat, compact)
+            if baseline == None:
+                baseline = rate
+            print(f"{name:<8} {'compact' if compact else 'list':<8} {rate:7.2f} MB/s {rate / baseline:6.2f}x")
+
+if __name__ == '__main__':
+    main()
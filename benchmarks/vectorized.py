@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Parser
+from errors import ErrorHandler
+from expr import Expr, Literal
+from stmt import VarStmt, PrintStmt
+from tokens import Token, TokenType
+from interpreter import Interpreter
+from output import OutputSink
+from plobject import PLObject, plBool, plNumber
+from vectorize import VectorEvaluator, requireNumpy
+
+# An expression that exercises every operator, short-circuits and divides by zero in some
+# rows.
+EXPRESSION = "(a > 0 and b / (a - 2) > 1) or !(c == a) ? (a * b - 3) / (b - 1) : -(a + b / 4)"
+
+# Collects printed values instead of writing them, so that results compare as values.
+class CollectingSink(OutputSink):
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: list[PLObject] = []
+
+    def write(self, value: PLObject) -> None:
+        self.values.append(value)
+
+def parseExpression(source: str) -> Expr:
+    errorHandler = ErrorHandler()
+    statements = Parser(Scanner(source + ";", errorHandler).scanTokens(), errorHandler).parse()
+    if errorHandler.reportErrors(source):
+        raise SystemExit("benchmark expression failed to parse")
+    return statements[0].expression
+
+def randomColumns(rows: int, seed: int) -> dict[str, list]:
+    generator = random.Random(seed)
+    return {
+        "a": [float(generator.randint(-3, 5)) for _ in range(rows)],
+        "b": [generator.choice((0.0, 1.0, 2.5, -7.0, 1e308)) for _ in range(rows)],
+        "c": [float(generator.randint(0, 3)) for _ in range(rows)],
+    }
+
+# Evaluates the expression once per row, as a program that defines the row's values as
+# globals and prints the expression. Returns each row's value, or its error.
+def evaluateRows(expr: Expr, columns: dict[str, list]) -> list:
+    errorHandler = ErrorHandler()
+    sink = CollectingSink()
+    interpreter = Interpreter(errorHandler, sink)
+    names = list(columns)
+    results = []
+    for row in range(len(columns[names[0]])):
+        program = []
+        for name in names:
+            value = columns[name][row]
+            token = Token(TokenType.IDENTIFIER, name, None, 1, 1)
+            program.append(VarStmt(token, Literal(plBool(value) if isinstance(value, bool) else plNumber(value), token.pos)))
+        program.append(PrintStmt(expr))
+        interpreter.interpret(program)
+        errors = errorHandler.takeErrors()
+        results.append(errors[0] if errors else sink.values.pop())
+    return results
+
+def main():
+    argParser = argparse.ArgumentParser(description="Compare evaluating an expression row by row with the tree interpreter and column-wise with NumPy")
+    argParser.add_argument("--rows", type=int, default=20000)
+    argParser.add_argument("--repeat", type=int, default=3)
+    argParser.add_argument("--seed", type=int, default=1)
+    argParser.add_argument("--expression", default=EXPRESSION)
+    args = argParser.parse_args()
+    requireNumpy()
+
+    expr = parseExpression(args.expression)
+    columns = randomColumns(args.rows, args.seed)
+    evaluator = VectorEvaluator(columns)
+    errorHandler = ErrorHandler()
+    if not evaluator.typeCheck(expr, errorHandler):
+        errorHandler.reportErrors(args.expression)
+        raise SystemExit("benchmark expression cannot be vectorized")
+
+    scalarBest = vectorBest = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        expected = evaluateRows(expr, columns)
+        scalarBest = min(scalarBest, time.perf_counter() - start)
+        start = time.perf_counter()
+        result = evaluator.evaluate(expr)
+        vectorBest = min(vectorBest, time.perf_counter() - start)
+
+    errors = {row: (pos, message) for row, pos, message in result.errors}
+    mismatches = 0
+    for row, scalar in enumerate(expected):
+        if isinstance(scalar, tuple):
+            same = row in errors and str(errors[row][0]) == str(scalar[0]) and errors[row][1] == scalar[1]
+        else:
+            value = result.value(row)
+            # repr tells -0.0 from 0.0 and matches NaN with NaN.
+            same = value is not None and value.objType == scalar.objType and repr(value.value) == repr(scalar.value)
+        mismatches += not same
+
+    print(f"{args.rows} rows, {len(result.errors)} failed, {mismatches} mismatches")
+    print(f"{'scalar':<8} {scalarBest * 1000:9.1f} ms")
+    print(f"{'vector':<8} {vectorBest * 1000:9.1f} ms {scalarBest / vectorBest:8.1f}x")
+    if mismatches:
+        raise SystemExit("vectorized results differ from scalar evaluation")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Lox sources for the benchmark harness. Every workload is generated from its size alone,
+# so the same size always yields the same program. Lox has no loops, so the work of a
+# workload is spelled out statement by statement.
+
+def scannerWorkload(size: int) -> str:
+    lines = []
+    for i in range(size):
+        lines.append(f"var value{i} = ({i} + 12.5) * 3 >= 40 ? \"large\" : \"small\"; // comment {i}")
+        lines.append(f"/* block\n   comment */ if (value{i} != nil and true) print value{i};")
+    return "\n".join(lines)
+
+def parserWorkload(size: int) -> str:
+    lines = ["var a = 1; var b = 2; var c = 3; var d = 4; var x = 0;"]
+    for i in range(size):
+        lines.append(f"x = (a + b * {i} - c / 2 > d) == !(a < b) or c >= d and b != a ? -(d - {i}) : ((a + b) * (c - d)) / 2;")
+    lines.append("print x;")
+    return "\n".join(lines)
+
+def arithmeticWorkload(size: int) -> str:
+    lines = ["var a = 1;", "var b = 2;", "{", "var c = 3;"]
+    for _ in range(size):
+        lines.append("a = a + b * 2 - c / 3; b = (b + 1) * 1; c = a > b ? c : c + 1;")
+    lines.append("print a;")
+    lines.append("}")
+    return "\n".join(lines)
+
+# Concatenates short strings into fresh values rather than growing one string, which
+# would make the workload quadratic in its size.
+def stringWorkload(size: int) -> str:
+    lines = ['var s = "lox";', 'var t = "";', "{", 'var u = "-";']
+    for i in range(size):
+        lines.append(f't = s + u + "{i}"; u = t + s; s = "a" + "b" + "c" + "d";')
+    lines.append("print t + u;")
+    lines.append("}")
+    return "\n".join(lines)
+
+# Reads and assigns variables declared at every level of a deep block nest, so lookups
+# walk long environment chains.
+def nestingWorkload(size: int) -> str:
+    depth = 64
+    lines = ["var total = 0;"]
+    for level in range(depth):
+        lines.append(f"{{ var v{level} = {level};")
+    for i in range(size):
+        outer = i % depth
+        lines.append(f"total = total + v{outer} + v{depth - 1 - outer}; v{outer} = v{outer} + 1;")
+    lines.append("print total;")
+    lines.append("}" * depth)
+    return "\n".join(lines)
+
+def printWorkload(size: int) -> str:
+    lines = ['var name = "line";', "var n = 0;"]
+    for i in range(size):
+        lines.append(f"print name; print n; print {i} * 2; print \"{i}\" + name; n = n + 1;")
+    return "\n".join(lines)
+
+# Name, generator and size at scale 1. Sizes are chosen so that each workload takes a
+# comparable fraction of a second with the tree-walking interpreter.
+WORKLOADS = {
+    "scanner": (scannerWorkload, 4000),
+    "parser": (parserWorkload, 2000),
+    "arithmetic": (arithmeticWorkload, 3000),
+    "strings": (stringWorkload, 3000),
+    "nesting": (nestingWorkload, 5000),
+    "printing": (printWorkload, 3000),
+}
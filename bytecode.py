@@ -0,0 +1,93 @@
+from enum import IntEnum
+from typing import Any
+from errors import ErrorPos
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NIL = 1
+    POP = 2
+
+    GET_GLOBAL = 3
+    SET_GLOBAL = 4
+    DEFINE_GLOBAL = 5
+    GET_LOCAL = 6
+    SET_LOCAL = 7
+    DEFINE_LOCAL = 8
+
+    ADD = 9
+    SUBTRACT = 10
+    MULTIPLY = 11
+    DIVIDE = 12
+    LESS = 13
+    LESS_EQUAL = 14
+    GREATER = 15
+    GREATER_EQUAL = 16
+    EQUAL = 17
+    NOT_EQUAL = 18
+    NEGATE = 19
+    NOT = 20
+    TO_BOOL = 21
+
+    JUMP = 22
+    JUMP_IF_FALSE = 23
+    JUMP_IF_TRUE = 24
+    POP_JUMP_IF_FALSE = 25
+
+    PRINT = 26
+    PUSH_SCOPE = 27
+    POP_SCOPE = 28
+    HALT = 29
+
+OPERAND_COUNTS: dict[OpCode, int] = {
+    OpCode.CONSTANT: 1,
+    OpCode.GET_GLOBAL: 1,
+    OpCode.SET_GLOBAL: 1,
+    OpCode.DEFINE_GLOBAL: 1,
+    OpCode.GET_LOCAL: 2,
+    OpCode.SET_LOCAL: 2,
+    OpCode.DEFINE_LOCAL: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.JUMP_IF_TRUE: 1,
+    OpCode.POP_JUMP_IF_FALSE: 1,
+    OpCode.PUSH_SCOPE: 1,
+}
+
+CONSTANT_OPS = (
+    OpCode.CONSTANT,
+    OpCode.GET_GLOBAL,
+    OpCode.SET_GLOBAL,
+    OpCode.DEFINE_GLOBAL,
+)
+
+class Chunk():
+    def __init__(self) -> None:
+        self.code: list[int] = []
+        self.positions: list[ErrorPos] = []
+        self.constants: list[Any] = []
+        self.__constantIndex: dict[int, int] = {}
+
+    def write(self, byte: int, pos: ErrorPos = None) -> int:
+        index = len(self.code)
+        self.code.append(int(byte))
+        self.positions.append(pos)
+        return index
+
+    def addConstant(self, value: Any) -> int:
+        index = self.__constantIndex.get(id(value))
+        if index == None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.__constantIndex[id(value)] = index
+        return index
+
+    def disassemble(self) -> None:
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            operands = self.code[offset + 1 : offset + 1 + OPERAND_COUNTS.get(op, 0)]
+            line = f"{offset:04} {op.name:<18}" + " ".join(f"{operand:4}" for operand in operands)
+            if op in CONSTANT_OPS:
+                line += f" '{self.constants[operands[0]]}'"
+            print(line)
+            offset += 1 + len(operands)
@@ -0,0 +1,188 @@
+import gc
+import os
+import sys
+import hmac
+import pickle
+import hashlib
+import tempfile
+from typing import Optional
+from stmt import Stmt
+
+# Directory, below the user's cache directory, that holds compiled programs. Entries are
+# pickles, which can run code when loaded, so they are never kept next to scripts where
+# they could be shipped with them, and each is signed with a secret only the user can read.
+CACHE_DIR = "pylox"
+
+# File in the cache directory holding the secret entries are signed with.
+SECRET_FILE = "secret"
+SECRET_LENGTH = 32
+
+# Bump when the layout of a cache entry changes.
+FORMAT_VERSION = 2
+
+# Hex digits of the key that appear in an entry's file name.
+KEY_LENGTH = 32
+
+# Hex digits of the hash of a script's path that tell scripts of the same name apart.
+PATH_HASH_LENGTH = 16
+
+# Modules whose code determines the shape of a compiled program, including engine, whose
+# compileProgram sets the order and options of the passes. Any edit to one of them
+# invalidates every cache entry.
+FRONT_END_MODULES = (
+    "tokens", "scanner", "fastscanner", "parser", "expr", "stmt", "plobject",
+    "errors", "environment", "analyzer", "optimizer", "specializer", "resolver", "engine", "cache",
+)
+
+def interpreterFingerprint() -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{FORMAT_VERSION}:{sys.version}:{pickle.HIGHEST_PROTOCOL}".encode())
+    base = os.path.dirname(os.path.abspath(__file__))
+    for module in FRONT_END_MODULES:
+        with open(os.path.join(base, module + ".py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+# The per-user directory compiled programs are kept in: $PYLOX_CACHE_DIR if set, else
+# pylox in $XDG_CACHE_HOME or ~/.cache.
+def cacheDirectory() -> str:
+    directory = os.environ.get("PYLOX_CACHE_DIR")
+    if directory:
+        return os.path.abspath(directory)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.path.abspath(base), CACHE_DIR)
+
+# Whether path is owned by the current user and neither group nor others can access it.
+def isPrivate(path: str) -> bool:
+    info = os.lstat(path)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        return False
+    return info.st_mode & 0o077 == 0
+
+# Creates the cache directory with mode 0700 and returns the secret in it, creating that
+# too on first use. Returns None if either is not private to the user, since entries
+# anybody else could write or sign must not be loaded.
+def loadSecret(directory: str) -> Optional[bytes]:
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not os.path.isdir(directory) or os.path.islink(directory) or not isPrivate(directory):
+            return None
+        path = os.path.join(directory, SECRET_FILE)
+        if not os.path.exists(path):
+            # Written to a temporary file and linked into place, so that processes racing
+            # to create the secret all end up with the one that was linked first.
+            fd, temp = tempfile.mkstemp(dir=directory, prefix=SECRET_FILE + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(os.urandom(SECRET_LENGTH))
+                try:
+                    os.link(temp, path)
+                except FileExistsError:
+                    pass
+            finally:
+                os.unlink(temp)
+        if not isPrivate(path):
+            return None
+        with open(path, "rb") as f:
+            secret = f.read()
+    except OSError:
+        return None
+    return secret if len(secret) == SECRET_LENGTH else None
+
+# Stores the checked, optimized and resolved program of a script in the per-user cache
+# directory, in a pickle named after the script and a hash of its source, the options it
+# was compiled with and the interpreter fingerprint. An entry is the HMAC of the rest of
+# it, the full key and the pickled program, and is only unpickled once both the HMAC and
+# the key check out. Entries are written with mode 0600 to a temporary file and renamed
+# into place, so a concurrent reader sees either a complete entry or none. Anything that
+# goes wrong while reading or writing is treated as a miss, and without a private cache
+# directory nothing is read or written at all.
+class ProgramCache():
+    def __init__(self, script: str, directory: str = None) -> None:
+        script = os.path.abspath(script)
+        self.__directory = directory if directory != None else cacheDirectory()
+        pathHash = hashlib.sha256(script.encode("utf-8", "surrogatepass")).hexdigest()[:PATH_HASH_LENGTH]
+        self.__stem = f"{os.path.basename(script)}.{pathHash}"
+        self.__fingerprint = interpreterFingerprint()
+        self.__secret = loadSecret(self.__directory)
+
+    def __key(self, source: str, optimize: bool) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.__fingerprint.encode())
+        digest.update(b"optimized" if optimize else b"unoptimized")
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.__directory, f"{self.__stem}.{key[:KEY_LENGTH]}.pickle")
+
+    def __sign(self, data: bytes) -> bytes:
+        return hmac.new(self.__secret, data, hashlib.sha256).digest()
+
+    def load(self, source: str, optimize: bool) -> Optional[list[Stmt]]:
+        if self.__secret == None:
+            return None
+        key = self.__key(source, optimize)
+        try:
+            with open(self.__path(key), "rb") as f:
+                entry = f.read()
+        except OSError:
+            return None
+        macLength = hashlib.sha256().digest_size
+        mac, data = entry[:macLength], entry[macLength:]
+        if not hmac.compare_digest(mac, self.__sign(data)):
+            return None
+        # Guards against truncated prefixes of the hash colliding.
+        if data[:len(key)] != key.encode():
+            return None
+        # Unpickling allocates the whole syntax tree at once, which would otherwise make
+        # the cyclic collector rescan it over and over.
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.loads(data[len(key):])
+        except Exception:
+            return None
+        finally:
+            if gcEnabled: gc.enable()
+
+    def store(self, source: str, optimize: bool, program: list[Stmt]) -> None:
+        if self.__secret == None:
+            return
+        key = self.__key(source, optimize)
+        path = self.__path(key)
+        try:
+            data = key.encode() + pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+        except (RecursionError, pickle.PicklingError):
+            # Programs nested deeper than pickle can recurse are not cached.
+            return
+        try:
+            # mkstemp creates the file with mode 0600.
+            fd, temp = tempfile.mkstemp(dir=self.__directory, prefix=self.__stem + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self.__sign(data))
+                    f.write(data)
+                os.replace(temp, path)
+            except BaseException:
+                os.unlink(temp)
+                raise
+        except OSError:
+            return
+        self.__removeStale(path)
+
+    def __removeStale(self, current: str) -> None:
+        prefix = self.__stem + "."
+        length = len(os.path.basename(current))
+        try:
+            names = os.listdir(self.__directory)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(prefix) and name.endswith(".pickle") and len(name) == length:
+                path = os.path.join(self.__directory, name)
+                if path != current:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
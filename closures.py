@@ -0,0 +1,263 @@
+import gc
+import operator
+from typing import Callable
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import TokenType
+from errors import PyLoxRuntimeError, ErrorHandler, ErrorPos
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE, plBool, plNumber
+from environment import Environment, LocalEnvironment, EnvironmentPool
+from output import OutputSink
+
+ExprFn = Callable[[LocalEnvironment], PLObject]
+StmtFn = Callable[[LocalEnvironment], None]
+
+ARITHMETIC_OPS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+}
+
+COMPARISON_OPS = {
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+}
+
+class ClosureCompiler(ExprVisitor, StmtVisitor):
+    def __init__(self, globals: Environment, output: OutputSink) -> None:
+        self.__globals = globals
+        self.__output = output
+        self.__pool = EnvironmentPool()
+
+    def compile(self, program: list[Stmt]) -> StmtFn:
+        # The closure tree is acyclic, so reference counting frees it on its own; pausing
+        # the cyclic collector stops it from repeatedly rescanning the whole AST while
+        # thousands of long-lived closures are allocated.
+        gcEnabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self.__sequence([self.__compileStmt(stmt) for stmt in program])
+        finally:
+            if gcEnabled: gc.enable()
+
+    def __compileStmt(self, stmt: Stmt) -> StmtFn:
+        return stmt.accept(self)
+
+    def __compileExpr(self, expr: Expr) -> ExprFn:
+        return expr.accept(self)
+
+    def __sequence(self, stmts: list[StmtFn]) -> StmtFn:
+        def sequence(env: LocalEnvironment) -> None:
+            for stmt in stmts:
+                stmt(env)
+        return sequence
+
+    def __numeric(self, leftFn: ExprFn, rightFn: ExprFn, numOp, objOp, wrap: Callable, pos: ErrorPos) -> ExprFn:
+        NUMBER = PLObjType.NUMBER
+        def numeric(env: LocalEnvironment) -> PLObject:
+            left = leftFn(env)
+            right = rightFn(env)
+            if left.objType is NUMBER and right.objType is NUMBER:
+                return wrap(numOp(left.value, right.value))
+            try:
+                return objOp(left, right)
+            except PyLoxRuntimeError as e:
+                raise PyLoxRuntimeError(pos, e.message)
+        return numeric
+
+    def visitLiteralExpr(self, expr: Literal) -> ExprFn:
+        value = expr.value
+        return lambda env: value
+
+    def visitGroupingExpr(self, expr: Grouping) -> ExprFn:
+        return self.__compileExpr(expr.expression)
+
+    def visitUnaryExpr(self, expr: Unary) -> ExprFn:
+        rightFn = self.__compileExpr(expr.right)
+        pos = expr.operator.pos
+        NUMBER = PLObjType.NUMBER
+        if expr.operator.tokenType == TokenType.MINUS:
+            def negate(env: LocalEnvironment) -> PLObject:
+                right = rightFn(env)
+                if right.objType is NUMBER:
+                    return plNumber(-right.value)
+                try:
+                    return -right
+                except PyLoxRuntimeError as e:
+                    raise PyLoxRuntimeError(pos, e.message)
+            return negate
+        elif expr.operator.tokenType == TokenType.BANG:
+            return lambda env: FALSE if rightFn(env) else TRUE
+        def unknown(env: LocalEnvironment) -> PLObject:
+            rightFn(env)
+            return NIL
+        return unknown
+
+    def visitBinaryExpr(self, expr: Binary) -> ExprFn:
+        leftFn = self.__compileExpr(expr.left)
+        rightFn = self.__compileExpr(expr.right)
+        tokenType = expr.operator.tokenType
+        pos = expr.operator.pos
+
+        if tokenType in ARITHMETIC_OPS:
+            op = ARITHMETIC_OPS[tokenType]
+            return self.__numeric(leftFn, rightFn, op, op, plNumber, pos)
+        elif tokenType in COMPARISON_OPS:
+            op = COMPARISON_OPS[tokenType]
+            return self.__numeric(leftFn, rightFn, op, op, plBool, pos)
+        elif tokenType == TokenType.SLASH:
+            def divide(env: LocalEnvironment) -> PLObject:
+                left = leftFn(env)
+                right = rightFn(env)
+                try:
+                    return left / right
+                except PyLoxRuntimeError as e:
+                    raise PyLoxRuntimeError(pos, e.message)
+            return divide
+        elif tokenType == TokenType.EQUAL_EQUAL:
+            def equal(env: LocalEnvironment) -> PLObject:
+                left = leftFn(env)
+                return left == rightFn(env)
+            return equal
+        elif tokenType == TokenType.BANG_EQUAL:
+            def notEqual(env: LocalEnvironment) -> PLObject:
+                left = leftFn(env)
+                return left != rightFn(env)
+            return notEqual
+        elif tokenType == TokenType.COMMA:
+            def comma(env: LocalEnvironment) -> PLObject:
+                leftFn(env)
+                return rightFn(env)
+            return comma
+        def unknown(env: LocalEnvironment) -> PLObject:
+            leftFn(env)
+            rightFn(env)
+            return PLObject(PLObjType.ERROR, None)
+        return unknown
+
+    def visitTernaryExpr(self, expr: Ternary) -> ExprFn:
+        condFn = self.__compileExpr(expr.left)
+        midFn = self.__compileExpr(expr.mid)
+        rightFn = self.__compileExpr(expr.right)
+        return lambda env: midFn(env) if condFn(env) else rightFn(env)
+
+    def visitVariableExpr(self, expr: Variable) -> ExprFn:
+        name = expr.name
+        depth = expr.depth
+        slot = expr.slot
+        if depth == None:
+            globals = self.__globals
+            return lambda env: globals.get(name)
+        elif depth == 0:
+            return lambda env: env.values[slot]
+        elif depth == 1:
+            return lambda env: env.enclosing.values[slot]
+        return lambda env: env.getAt(depth, slot)
+
+    def visitAssignmentExpr(self, expr: Assignment) -> ExprFn:
+        valueFn = self.__compileExpr(expr.value)
+        name = expr.name
+        depth = expr.depth
+        slot = expr.slot
+        if depth == None:
+            globals = self.__globals
+            def assignGlobal(env: LocalEnvironment) -> PLObject:
+                value = valueFn(env)
+                globals.assign(name, value)
+                return value
+            return assignGlobal
+        def assignLocal(env: LocalEnvironment) -> PLObject:
+            value = valueFn(env)
+            env.assignAt(depth, slot, value)
+            return value
+        return assignLocal
+
+    def visitLogicalExpr(self, expr: Logical) -> ExprFn:
+        leftFn = self.__compileExpr(expr.left)
+        rightFn = self.__compileExpr(expr.right)
+        if expr.operator.tokenType == TokenType.OR:
+            def logicalOr(env: LocalEnvironment) -> PLObject:
+                if leftFn(env): return TRUE
+                return TRUE if rightFn(env) else FALSE
+            return logicalOr
+        def logicalAnd(env: LocalEnvironment) -> PLObject:
+            if not leftFn(env): return FALSE
+            return TRUE if rightFn(env) else FALSE
+        return logicalAnd
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> ExprFn:
+        return lambda env: None
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> StmtFn:
+        return lambda env: None
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> StmtFn:
+        return self.__compileExpr(stmt.expression)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> StmtFn:
+        exprFn = self.__compileExpr(stmt.expression)
+        write = self.__output.write
+        return lambda env: write(exprFn(env))
+
+    def visitVarStmt(self, stmt: VarStmt) -> StmtFn:
+        initFn = self.__compileExpr(stmt.initializer) if stmt.initializer != None else None
+        name = stmt.name.lexeme
+        slot = stmt.slot
+        if slot == None:
+            globals = self.__globals
+            if initFn == None:
+                return lambda env: globals.define(name, NIL)
+            return lambda env: globals.define(name, initFn(env))
+        def defineLocal(env: LocalEnvironment) -> None:
+            env.values[slot] = initFn(env) if initFn != None else NIL
+        return defineLocal
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> StmtFn:
+        stmts = [self.__compileStmt(statement) for statement in stmt.statements]
+        if not stmt.scoped:
+            return stmts[0] if len(stmts) == 1 else self.__sequence(stmts)
+        slotCount = stmt.slotCount
+        acquire = self.__pool.acquire
+        release = self.__pool.release
+        def block(env: LocalEnvironment) -> None:
+            inner = acquire(env, slotCount)
+            for s in stmts:
+                s(inner)
+            release(inner)
+        return block
+
+    def visitIfStmt(self, stmt: IfStmt) -> StmtFn:
+        condFn = self.__compileExpr(stmt.condition)
+        thenFn = self.__compileStmt(stmt.thenBranch)
+        if stmt.elseBranch == None:
+            def ifThen(env: LocalEnvironment) -> None:
+                if condFn(env): thenFn(env)
+            return ifThen
+        elseFn = self.__compileStmt(stmt.elseBranch)
+        def ifThenElse(env: LocalEnvironment) -> None:
+            if condFn(env): thenFn(env)
+            else: elseFn(env)
+        return ifThenElse
+
+class ClosureInterpreter():
+    def __init__(self, errorHandler: ErrorHandler, output: OutputSink = None) -> None:
+        self.__errorHandler = errorHandler
+        self.__globals = Environment()
+        self.output: OutputSink = output if output != None else OutputSink()
+        self.__compiler = ClosureCompiler(self.__globals, self.output)
+
+    def compile(self, program: list[Stmt]) -> StmtFn:
+        return self.__compiler.compile(program)
+
+    def run(self, compiled: StmtFn) -> None:
+        try:
+            compiled(None)
+        except PyLoxRuntimeError as e:
+            self.__errorHandler.runtimeError(e)
+        finally:
+            self.output.flush()
+
+    def interpret(self, program: list[Stmt]) -> None:
+        self.run(self.compile(program))
@@ -0,0 +1,157 @@
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import TokenType
+from errors import ErrorPos
+from bytecode import OpCode, Chunk
+
+BINARY_OPS: dict[TokenType, OpCode] = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+class Compiler(ExprVisitor, StmtVisitor):
+    def __init__(self) -> None:
+        self.__chunk: Chunk = Chunk()
+
+    def compile(self, program: list[Stmt]) -> Chunk:
+        self.__chunk = Chunk()
+        for stmt in program:
+            self.__compileStmt(stmt)
+        self.__emit(OpCode.HALT)
+        return self.__chunk
+
+    def __compileStmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __compileExpr(self, expr: Expr) -> None:
+        expr.accept(self)
+
+    def __emit(self, op: OpCode, pos: ErrorPos = None) -> int:
+        return self.__chunk.write(op, pos)
+
+    def __emitOperand(self, op: OpCode, operand: int, pos: ErrorPos = None) -> int:
+        self.__chunk.write(op, pos)
+        return self.__chunk.write(operand, pos)
+
+    def __emitOperands(self, op: OpCode, first: int, second: int, pos: ErrorPos = None) -> None:
+        self.__chunk.write(op, pos)
+        self.__chunk.write(first, pos)
+        self.__chunk.write(second, pos)
+
+    def __emitJump(self, op: OpCode) -> int:
+        return self.__emitOperand(op, -1)
+
+    def __patchJump(self, operandIndex: int) -> None:
+        self.__chunk.code[operandIndex] = len(self.__chunk.code)
+
+    def visitLiteralExpr(self, expr: Literal) -> None:
+        self.__emitOperand(OpCode.CONSTANT, self.__chunk.addConstant(expr.value))
+
+    def visitGroupingExpr(self, expr: Grouping) -> None:
+        self.__compileExpr(expr.expression)
+
+    def visitUnaryExpr(self, expr: Unary) -> None:
+        self.__compileExpr(expr.right)
+        if expr.operator.tokenType == TokenType.MINUS:
+            self.__emit(OpCode.NEGATE, expr.operator.pos)
+        elif expr.operator.tokenType == TokenType.BANG:
+            self.__emit(OpCode.NOT, expr.operator.pos)
+        else:
+            self.__emit(OpCode.POP)
+            self.__emit(OpCode.NIL)
+
+    def visitBinaryExpr(self, expr: Binary) -> None:
+        self.__compileExpr(expr.left)
+        if expr.operator.tokenType == TokenType.COMMA:
+            self.__emit(OpCode.POP)
+            self.__compileExpr(expr.right)
+            return
+        self.__compileExpr(expr.right)
+        self.__emit(BINARY_OPS[expr.operator.tokenType], expr.operator.pos)
+
+    def visitTernaryExpr(self, expr: Ternary) -> None:
+        self.__compileExpr(expr.left)
+        elseJump = self.__emitJump(OpCode.POP_JUMP_IF_FALSE)
+        self.__compileExpr(expr.mid)
+        endJump = self.__emitJump(OpCode.JUMP)
+        self.__patchJump(elseJump)
+        self.__compileExpr(expr.right)
+        self.__patchJump(endJump)
+
+    def visitVariableExpr(self, expr: Variable) -> None:
+        if expr.depth == None:
+            self.__emitOperand(OpCode.GET_GLOBAL, self.__chunk.addConstant(expr.name), expr.name.pos)
+        else:
+            self.__emitOperands(OpCode.GET_LOCAL, expr.depth, expr.slot, expr.name.pos)
+
+    def visitAssignmentExpr(self, expr: Assignment) -> None:
+        self.__compileExpr(expr.value)
+        if expr.depth == None:
+            self.__emitOperand(OpCode.SET_GLOBAL, self.__chunk.addConstant(expr.name), expr.name.pos)
+        else:
+            self.__emitOperands(OpCode.SET_LOCAL, expr.depth, expr.slot, expr.name.pos)
+
+    def visitLogicalExpr(self, expr: Logical) -> None:
+        self.__compileExpr(expr.left)
+        if expr.operator.tokenType == TokenType.OR:
+            endJump = self.__emitJump(OpCode.JUMP_IF_TRUE)
+        else:
+            endJump = self.__emitJump(OpCode.JUMP_IF_FALSE)
+        self.__emit(OpCode.POP)
+        self.__compileExpr(expr.right)
+        self.__patchJump(endJump)
+        self.__emit(OpCode.TO_BOOL)
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> None:
+        self.__emitOperand(OpCode.CONSTANT, self.__chunk.addConstant(None))
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> None:
+        pass
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> None:
+        self.__compileExpr(stmt.expression)
+        self.__emit(OpCode.POP)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__compileExpr(stmt.expression)
+        self.__emit(OpCode.PRINT)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer != None:
+            self.__compileExpr(stmt.initializer)
+        else:
+            self.__emit(OpCode.NIL)
+        if stmt.slot == None:
+            self.__emitOperand(OpCode.DEFINE_GLOBAL, self.__chunk.addConstant(stmt.name.lexeme))
+        else:
+            self.__emitOperand(OpCode.DEFINE_LOCAL, stmt.slot)
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        if not stmt.scoped:
+            for statement in stmt.statements:
+                self.__compileStmt(statement)
+            return
+        self.__emitOperand(OpCode.PUSH_SCOPE, stmt.slotCount)
+        for statement in stmt.statements:
+            self.__compileStmt(statement)
+        self.__emit(OpCode.POP_SCOPE)
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__compileExpr(stmt.condition)
+        elseJump = self.__emitJump(OpCode.POP_JUMP_IF_FALSE)
+        self.__compileStmt(stmt.thenBranch)
+        if stmt.elseBranch != None:
+            endJump = self.__emitJump(OpCode.JUMP)
+            self.__patchJump(elseJump)
+            self.__compileStmt(stmt.elseBranch)
+            self.__patchJump(endJump)
+        else:
+            self.__patchJump(elseJump)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import sys
+import json
+from array import array
+from typing import TextIO, TYPE_CHECKING
+
+# errors.py reports through this module, so ErrorPos is only imported for annotations.
+if TYPE_CHECKING:
+    from errors import ErrorPos
+
+# Offsets of the line starts of a source, found in one pass, so that reporting an error
+# slices out the lines it shows instead of splitting the whole source.
+class LineIndex():
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        starts = array("q", [0])
+        find = source.find
+        offset = find("\n")
+        while offset != -1:
+            starts.append(offset + 1)
+            offset = find("\n", offset + 1)
+        self.__starts = starts
+
+    def __len__(self) -> int:
+        return len(self.__starts)
+
+    # Text of the 1-based line number, without its newline. As with indexing a list of
+    # lines, 0 and negative numbers count from the end.
+    def line(self, number: int) -> str:
+        starts = self.__starts
+        index = number - 1 if number > 0 else len(starts) + number - 1
+        if not 0 <= index < len(starts):
+            return ""
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else len(self.source)
+        return self.source[starts[index]:end]
+
+# Formats errors the way they have always been printed: the message, then the source
+# lines the error spans, with a marker under the end of the error.
+def formatText(errors: list[tuple[ErrorPos, str, bool]], index: LineIndex, parts: list[str]) -> None:
+    for pos, message, _ in errors:
+        parts.append(f"Error: {message}\n\n")
+        if pos.lE - pos.lS > 0:
+            focusChar = len(index.line(pos.lE))
+            for line in range(pos.lS, pos.lE + 1):
+                linePrefix = str(line) + " | "
+                parts.append(f"\t{linePrefix}{index.line(line)}\n")
+                if line == pos.lE:
+                    parts.append("\t" + " " * len(linePrefix) + " " * focusChar + "^--here\n")
+        else:
+            linePrefix = str(pos.lS) + " | "
+            parts.append(f"\t{linePrefix}{index.line(pos.lS)}\n")
+            parts.append("\t" + " " * len(linePrefix) + " " * (pos.cE - 1) + "^--here\n")
+
+# Formats one JSON object per line and error, for tools rather than people.
+def formatJson(errors: list[tuple[ErrorPos, str, bool]], parts: list[str]) -> None:
+    for pos, message, runtime in errors:
+        parts.append(json.dumps({
+            "kind": "runtime" if runtime else "compile",
+            "line": pos.lS,
+            "column": pos.cS,
+            "endLine": pos.lE,
+            "endColumn": pos.cE,
+            "message": message,
+        }) + "\n")
+
+FORMATS = ("text", "json")
+
+# Writes errors and a note about the ones that were dropped in one write call.
+def writeDiagnostics(errors: list[tuple[ErrorPos, str, bool]], index: LineIndex, suppressed: int = 0, format: str = "text", out: TextIO = None) -> None:
+    out = out if out != None else sys.stdout
+    parts: list[str] = []
+    if format == "json":
+        formatJson(errors, parts)
+        if suppressed:
+            parts.append(json.dumps({"kind": "suppressed", "count": suppressed}) + "\n")
+    else:
+        formatText(errors, index, parts)
+        if suppressed:
+            parts.append(f"... and {suppressed} more error{'s' if suppressed != 1 else ''} not shown\n")
+    out.write("".join(parts))
@@ -0,0 +1,272 @@
+import io
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, Mapping
+from scanner import Scanner
+from fastscanner import FastScanner
+from parser import Parser
+from analyzer import Analyzer
+from optimizer import Optimizer
+from specializer import Specializer
+from resolver import Resolver
+from interpreter import Interpreter
+from stackinterpreter import StackInterpreter
+from vm import VM
+from closures import ClosureInterpreter
+from transpiler import PythonInterpreter
+from stmt import Stmt
+from errors import ErrorHandler, ErrorPos
+from stats import RunStats, phase, countNodes
+from output import OutputSink
+from plobject import PLObjType, PLObject, plValue
+
+ENGINES = {
+    "tree": Interpreter,
+    "stack": StackInterpreter,
+    "vm": VM,
+    "closure": ClosureInterpreter,
+    "python": PythonInterpreter,
+}
+
+SCANNERS = {
+    "classic": Scanner,
+    "fast": FastScanner,
+}
+
+# Runs the front end and returns the program ready for an engine, or None if it had
+# errors. Errors are left in errorHandler for the caller to report.
+# When stats is given, each phase is timed into it.
+def compileProgram(source: str, analyzer: Analyzer, errorHandler: ErrorHandler, optimize: bool = True, compactTokens: bool = False, scannerClass: type = Scanner, stats: RunStats = None) -> Optional[list[Stmt]]:
+    with phase(stats, "scan"):
+        scanner = scannerClass(source, errorHandler, compactTokens)
+        tokens = scanner.scanTokens()
+
+    with phase(stats, "parse"):
+        parser = Parser(tokens, errorHandler)
+        program = parser.parse()
+    if stats != None:
+        stats.count("tokens", len(tokens))
+        stats.count("astNodes", countNodes(program))
+    if errorHandler.hadError:
+        return None
+
+    with phase(stats, "analyze"):
+        analyzer.typeCheckProgram(program)
+    if errorHandler.hadError:
+        return None
+
+    if optimize:
+        with phase(stats, "optimize"):
+            program = Optimizer().optimize(program)
+            Specializer().specialize(program)
+    with phase(stats, "resolve"):
+        Resolver().resolve(program)
+    return program
+
+class LoxError():
+    def __init__(self, pos: ErrorPos, message: str, runtime: bool) -> None:
+        self.pos: ErrorPos = pos
+        self.message: str = message
+        self.runtime: bool = runtime
+
+    def __str__(self) -> str:
+        return f"{self.pos} {self.message}"
+
+    def __repr__(self) -> str:
+        kind = "runtime" if self.runtime else "compile"
+        return f"LoxError({kind}, {self.pos!r}, {self.message!r})"
+
+class Result():
+    def __init__(self, output: str, errors: list[LoxError], cached: bool) -> None:
+        self.output: str = output
+        self.errors: list[LoxError] = errors
+        self.cached: bool = cached
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+# Compiles and executes source strings in-process, returning what they printed and the
+# errors they raised instead of writing either to the terminal. Every execution starts
+# from empty globals. Compiled programs are kept in an LRU cache keyed by source text and
+# bounded both by entry count and by the total length of their sources, which stands in
+# for their size. Each execution writes to its own output sink, and the cache is kept under
+# a lock, so an Engine can be used from several threads at once.
+class Engine():
+    def __init__(self, backend: str = "tree", optimize: bool = True, scanner: str = "fast", maxPrograms: int = 256, maxSourceSize: int = 16 * 1024 * 1024) -> None:
+        self.__interpreterClass: type = ENGINES[backend]
+        self.__scannerClass: type = SCANNERS[scanner]
+        self.__optimize: bool = optimize
+        # The stack engine exists for deeply nested programs, so it needs a
+        # non-recursive type checker too.
+        self.__iterative: bool = backend == "stack"
+        self.maxPrograms: int = maxPrograms
+        self.maxSourceSize: int = maxSourceSize
+
+        self.__programs: OrderedDict[str, list[Stmt]] = OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__sourceSize: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # Inline cache hits and misses of the tree-walking interpreter over all
+        # executions. Cached programs keep their inline caches, so they hit on every
+        # execution after the first.
+        self.inlineCacheHits: int = 0
+        self.inlineCacheMisses: int = 0
+
+    # Returns the compiled program for source and the compile errors, which are empty
+    # whenever a program is returned.
+    def compile(self, source: str) -> tuple[Optional[list[Stmt]], list[LoxError]]:
+        program, errors, _ = self.__compile(source)
+        return program, errors
+
+    # Also returns whether the program came from the cache.
+    def __compile(self, source: str) -> tuple[Optional[list[Stmt]], list[LoxError], bool]:
+        with self.__lock:
+            program = self.__programs.get(source)
+            if program != None:
+                self.__programs.move_to_end(source)
+                self.hits += 1
+                return program, [], True
+            self.misses += 1
+
+        # Compiling is left outside the lock, so a source compiled by two threads at once
+        # is compiled twice and the later program replaces the earlier in the cache.
+        errorHandler = ErrorHandler()
+        analyzer = Analyzer(errorHandler, iterative=self.__iterative)
+        program = compileProgram(source, analyzer, errorHandler, self.__optimize, scannerClass=self.__scannerClass)
+        if program == None:
+            return None, [LoxError(pos, message, False) for pos, message in errorHandler.errors()], False
+        with self.__lock:
+            self.__remember(source, program)
+        return program, [], False
+
+    def execute(self, source: str) -> Result:
+        program, errors, cached = self.__compile(source)
+        if program == None:
+            return Result("", errors, cached)
+
+        errorHandler = ErrorHandler()
+        output = io.StringIO()
+        interpreter = self.__interpreterClass(errorHandler, OutputSink(output))
+        interpreter.interpret(program)
+        if isinstance(interpreter, Interpreter):
+            with self.__lock:
+                self.inlineCacheHits += interpreter.cacheHits
+                self.inlineCacheMisses += interpreter.cacheMisses
+        errors = [LoxError(pos, message, True) for pos, message in errorHandler.errors()]
+        return Result(output.getvalue(), errors, cached)
+
+    # Called with the lock held.
+    def __remember(self, source: str, program: list[Stmt]) -> None:
+        if len(source) > self.maxSourceSize or self.maxPrograms <= 0:
+            return
+        if source in self.__programs:
+            self.__sourceSize -= len(source)
+        self.__programs[source] = program
+        self.__sourceSize += len(source)
+        while len(self.__programs) > self.maxPrograms or self.__sourceSize > self.maxSourceSize:
+            evicted, _ = self.__programs.popitem(last=False)
+            self.__sourceSize -= len(evicted)
+            self.evictions += 1
+
+    def cacheInfo(self) -> dict[str, int]:
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "programs": len(self.__programs),
+                "sourceSize": self.__sourceSize,
+                "inlineCacheHits": self.inlineCacheHits,
+                "inlineCacheMisses": self.inlineCacheMisses,
+            }
+
+    def clearCache(self) -> None:
+        with self.__lock:
+            self.__programs.clear()
+            self.__sourceSize = 0
+
+# A program compiled once to be run any number of times, with values for its parameters
+# bound anew for each run. Parameters are globals the program reads without declaring;
+# they are type-checked as the types given at compile time and defined, in that order,
+# before the program runs. The program never changes after compiling, so it can be run
+# from several threads at once, each run in its own ExecutionContext.
+#
+# The only writes to the syntax tree during a run are the inline caches of the tree-walking
+# interpreter. Every run defines the parameters and then the program's own globals in the
+# same order, so each name always ends up in the same slot, and concurrent runs only ever
+# store the same slot in a node's cache. A cache whose shape and slot were written by two
+# different runs is therefore still right. The shapes themselves are shared by all runs,
+# and Shape.extend makes new transitions under a lock, so running needs no lock of its
+# own.
+class CompiledProgram():
+    def __init__(self, source: str, statements: list[Stmt], parameters: dict[str, PLObjType]) -> None:
+        self.__source: str = source
+        self.__statements: tuple[Stmt, ...] = tuple(statements)
+        self.__parameters: Mapping[str, PLObjType] = MappingProxyType(dict(parameters))
+
+    @property
+    def source(self) -> str:
+        return self.__source
+
+    @property
+    def statements(self) -> tuple[Stmt, ...]:
+        return self.__statements
+
+    @property
+    def parameters(self) -> Mapping[str, PLObjType]:
+        return self.__parameters
+
+    # Checks bindings against the parameters and returns their Lox values in parameter
+    # order. Every parameter needs a value of its declared type.
+    def bind(self, bindings: Optional[Mapping[str, object]] = None) -> list[tuple[str, PLObject]]:
+        bindings = bindings if bindings != None else {}
+        unknown = [name for name in bindings if name not in self.__parameters]
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+        values = []
+        for name, objType in self.__parameters.items():
+            if name not in bindings:
+                raise ValueError(f"No value bound to parameter '{name}'")
+            value = plValue(bindings[name])
+            if value.objType != objType:
+                raise TypeError(f"Parameter '{name}' is a {objType}, not a {value.objType}")
+            values.append((name, value))
+        return values
+
+    def run(self, bindings: Optional[Mapping[str, object]] = None) -> Result:
+        return ExecutionContext(self, bindings).run()
+
+# The state of one run of a CompiledProgram: an interpreter with its own globals, local
+# environments and output sink, and the errors the run raised. Output is written to the
+# context's own buffer rather than through sys.stdout, so contexts share nothing but the
+# program.
+class ExecutionContext():
+    def __init__(self, program: CompiledProgram, bindings: Optional[Mapping[str, object]] = None) -> None:
+        self.program: CompiledProgram = program
+        self.errorHandler: ErrorHandler = ErrorHandler()
+        self.output: io.StringIO = io.StringIO()
+        self.interpreter: Interpreter = Interpreter(self.errorHandler, OutputSink(self.output))
+        for name, value in program.bind(bindings):
+            self.interpreter.defineGlobal(name, value)
+
+    def run(self) -> Result:
+        self.interpreter.interpret(self.program.statements)
+        errors = [LoxError(pos, message, True) for pos, message in self.errorHandler.takeErrors()]
+        return Result(self.output.getvalue(), errors, False)
+
+# Compiles source as a program with the given parameters. Returns the program, or None and
+# the compile errors.
+def compileParameterized(source: str, parameters: Optional[dict[str, PLObjType]] = None, optimize: bool = True, scanner: str = "fast") -> tuple[Optional[CompiledProgram], list[LoxError]]:
+    parameters = parameters if parameters != None else {}
+    errorHandler = ErrorHandler()
+    analyzer = Analyzer(errorHandler)
+    for name, objType in parameters.items():
+        analyzer.typeEnvironment.define(name, objType)
+    statements = compileProgram(source, analyzer, errorHandler, optimize, scannerClass=SCANNERS[scanner])
+    if statements == None:
+        return None, [LoxError(pos, message, False) for pos, message in errorHandler.errors()]
+    return CompiledProgram(source, statements, parameters), []
@@ -1,52 +1,177 @@
 from __future__ import annotations
+import weakref
+import threading
+from typing import Union
 from plobject import PLObject, PLObjType
 from errors import PyLoxRuntimeError
 from tokens import Token
 
+# Held while a Shape makes a new transition. There is one lock for all shapes, since the
+# shapes along a chain extend the same dict of slots.
+SHAPE_LOCK = threading.Lock()
+
+# The layout of an Environment: which slot of its values holds which name. Defining a new
+# name moves an environment on to the shape that adds it, and these transitions are
+# shared, so environments that define the same names in the same order pass through the
+# same Shape objects. A slot found under a shape therefore holds in every environment
+# that has that shape, which is what inline caches check. Shapes along one chain of
+# definitions share a single dict of slots, of which each only owns those below its size.
+#
+# Shapes are shared by every environment in the process, including those of programs run
+# from several threads at once, so new transitions are made under SHAPE_LOCK: without it, two
+# threads extending the same shape could both claim the slot after it for different names.
+# Following an existing transition needs no lock.
+class Shape():
+    def __init__(self, slots: dict[str, int], size: int, parent: Shape = None) -> None:
+        self.slots: dict[str, int] = slots
+        self.size: int = size
+        # Shapes are kept alive by the environments and inline caches that refer to them
+        # and by the shapes that extend them, so an unused chain is freed as a whole.
+        self.parent: Union[Shape, None] = parent
+        self.__transitions: weakref.WeakValueDictionary[str, Shape] = weakref.WeakValueDictionary()
+
+    def extend(self, name: str) -> Shape:
+        shape = self.__transitions.get(name)
+        if shape == None:
+            with SHAPE_LOCK:
+                shape = self.__transitions.get(name)
+                if shape == None:
+                    slots = self.slots
+                    if len(slots) != self.size:
+                        # Another chain has already extended the shared dict past this shape.
+                        slots = {other: slot for other, slot in slots.items() if slot < self.size}
+                    slots[name] = self.size
+                    shape = Shape(slots, self.size + 1, self)
+                    self.__transitions[name] = shape
+        return shape
+
+EMPTY_SHAPE = Shape({}, 0)
+
 class Environment():
     def __init__(self, enclosing: Environment = None) -> None:
         self.__enclosing: Environment = enclosing
-        self.__values: dict[str, PLObject] = {}
+        self.shape: Shape = EMPTY_SHAPE
+        self.values: list[PLObject] = []
 
+    # A name belongs to the shape if its slot is below the shape's size.
     def define(self, name: str, value: PLObject) -> None:
-        self.__values[name] = value
+        shape = self.shape
+        slot = shape.slots.get(name)
+        if slot is None or slot >= shape.size:
+            self.shape = shape.extend(name)
+            self.values.append(value)
+        else:
+            self.values[slot] = value
 
     def get(self, name: Token) -> PLObject:
-        if name.lexeme in self.__values:
-            return self.__values[name.lexeme]
+        shape = self.shape
+        slot = shape.slots.get(name.lexeme)
+        if slot is not None and slot < shape.size:
+            return self.values[slot]
         elif self.__enclosing != None:
             return self.__enclosing.get(name)
         else:
             raise PyLoxRuntimeError(name.pos, f"Undefined variable '{name.lexeme}'")
 
     def assign(self, name: Token, value: PLObject) -> None:
-        if name.lexeme in self.__values:
-            self.__values[name.lexeme] = value
+        shape = self.shape
+        slot = shape.slots.get(name.lexeme)
+        if slot is not None and slot < shape.size:
+            self.values[slot] = value
         elif self.__enclosing != None:
             self.__enclosing.assign(name, value)
         else:
             raise PyLoxRuntimeError(name.pos, f"Undefined variable '{name.lexeme}'")
 
+class LocalEnvironment():
+    def __init__(self, enclosing: LocalEnvironment, size: int) -> None:
+        self.enclosing: LocalEnvironment = enclosing
+        self.values: list[PLObject] = [None] * size
+
+    def ancestor(self, depth: int) -> LocalEnvironment:
+        environment = self
+        for _ in range(depth):
+            environment = environment.enclosing
+        return environment
+
+    def getAt(self, depth: int, slot: int) -> PLObject:
+        return self.ancestor(depth).values[slot]
+
+    def assignAt(self, depth: int, slot: int, value: PLObject) -> None:
+        self.ancestor(depth).values[slot] = value
+
+# Free local environments by size. The language has no closures, so an environment is
+# unreachable once its block is left and can be handed to the next block of the same
+# size. Its slots keep their old values: the Resolver only binds a name in a block after
+# its declaration, which always runs before the name is read.
+class EnvironmentPool():
+    def __init__(self) -> None:
+        self.__free: dict[int, list[LocalEnvironment]] = {}
+
+    def acquire(self, enclosing: LocalEnvironment, size: int) -> LocalEnvironment:
+        free = self.__free.get(size)
+        if free:
+            environment = free.pop()
+            environment.enclosing = enclosing
+            return environment
+        return LocalEnvironment(enclosing, size)
+
+    def release(self, environment: LocalEnvironment) -> None:
+        free = self.__free.get(len(environment.values))
+        if free == None:
+            free = self.__free[len(environment.values)] = []
+        free.append(environment)
+
 class TypeEnvironment():
     def __init__(self, enclosing: TypeEnvironment = None) -> None:
         self.__enclosing: TypeEnvironment = enclosing
         self.__types: dict[str, PLObjType] = {}
+        # When set, receives the type every name defined or assigned here had before,
+        # or None if it was undefined.
+        self.journal: Union[dict[str, Union[PLObjType, None]], None] = None
+        # When set on the outermost environment, receives every name looked up in it.
+        self.reads: Union[set[str], None] = None
 
     def define(self, name: str, objType: PLObjType) -> None:
+        if self.journal != None and name not in self.journal:
+            self.journal[name] = self.__types.get(name)
         self.__types[name] = objType
 
+    def typeOf(self, name: str) -> Union[PLObjType, None]:
+        return self.__types.get(name)
+
+    def update(self, types: dict[str, PLObjType]) -> None:
+        self.__types.update(types)
+
+    def snapshot(self) -> dict[str, PLObjType]:
+        return dict(self.__types)
+
+    def restore(self, types: dict[str, PLObjType]) -> None:
+        self.__types = dict(types)
+
+    # Lookups walk the chain in a loop so that deeply nested blocks do not recurse.
+    def __find(self, name: str) -> Union[TypeEnvironment, None]:
+        environment = self
+        while environment.__enclosing != None:
+            if name in environment.__types:
+                return environment
+            environment = environment.__enclosing
+        if environment.reads != None:
+            environment.reads.add(name)
+        return environment if name in environment.__types else None
+
     def get(self, name: Token) -> PLObjType:
-        if name.lexeme in self.__types:
-            return self.__types[name.lexeme]
-        elif self.__enclosing != None:
-            return self.__enclosing.get(name)
-        else:
+        environment = self.__find(name.lexeme)
+        if environment == None:
             return PLObjType.ERROR
+        return environment.__types[name.lexeme]
 
-    def assign(self, name: Token, objType: PLObjType) -> None:
-        if name.lexeme in self.__types:
-            self.__types[name.lexeme] = objType
-        elif self.__enclosing != None:
-            self.__enclosing.assign(name, objType)
-        else:
-            return PLObjType.ERROR
\ No newline at end of file
+    # Returns the type assigned, or None if the name is not defined.
+    def assign(self, name: Token, objType: PLObjType) -> Union[PLObjType, None]:
+        environment = self.__find(name.lexeme)
+        if environment == None:
+            return None
+        if environment.journal != None and name.lexeme not in environment.journal:
+            environment.journal[name.lexeme] = environment.__types[name.lexeme]
+        environment.__types[name.lexeme] = objType
+        return objType
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import Tuple
+from typing import Tuple, Union
+from diagnostics import LineIndex, writeDiagnostics
 
 class ErrorPos():
     def __init__(self, lS: int, cS: int, lE: int, cE: int):
@@ -19,65 +20,70 @@ class PyLoxRuntimeError(Exception):
         self.message = message
         super().__init__(self.message)
 
+# Errors kept by default before further ones are only counted.
+MAX_ERRORS = 1000
+
+# Collects the errors of a run. Unless deduplicate is off, errors repeating the position
+# and message of one already recorded are dropped. Once maxErrors are recorded the rest
+# are only counted in suppressed, so that a systematic mistake in a huge script cannot
+# exhaust memory; with maxErrors None there is no limit.
 class ErrorHandler:
-    def __init__(self) -> None:
+    def __init__(self, maxErrors: Union[int, None] = MAX_ERRORS, format: str = "text", deduplicate: bool = True) -> None:
         self.hadError = False
         self.hadRuntimeError = False
-        self.__errors: list[Tuple[ErrorPos, str]] = []
+        self.maxErrors: Union[int, None] = maxErrors
+        self.format: str = format
+        self.deduplicate: bool = deduplicate
+        self.suppressed: int = 0
+        self.__errors: list[Tuple[ErrorPos, str, bool]] = []
+        self.__seen: set[Tuple[int, int, int, int, str]] = set()
+        self.__index: Union[LineIndex, None] = None
+
+    def __record(self, pos: ErrorPos, message: str, runtime: bool) -> None:
+        key = None
+        if self.deduplicate:
+            key = (pos.lS, pos.cS, pos.lE, pos.cE, message)
+            if key in self.__seen:
+                return
+        if self.maxErrors != None and len(self.__errors) >= self.maxErrors:
+            self.suppressed += 1
+            return
+        if key != None:
+            self.__seen.add(key)
+        self.__errors.append((pos, message, runtime))
 
     def error(self, pos: ErrorPos, message: str) -> None:
-        self.__errors.append((pos, message))
+        self.__record(pos, message, False)
         self.hadError = True
 
     def runtimeError(self, runtimeError: PyLoxRuntimeError) -> None:
-        self.__errors.append((runtimeError.pos, runtimeError.message))
+        self.__record(runtimeError.pos, runtimeError.message, True)
         self.hadRuntimeError = True
 
-    def __printSPosError(self, pos: ErrorPos, message: str, sourceLines: list[str], focus: int = -1) -> None:
-        line = pos.lS
-        if focus == -1:
-            focus = pos.cE
-        source = sourceLines[line-1]
-        linePrefix = str(line) + " | "
-        print(f"Error: {message}\n")
-        print(f"\t{linePrefix}{source}")
-        print("\t" + " "*len(linePrefix) + " "*(focus-1) + "^--here")
+    # Errors recorded since they were last reported, in the order they occurred.
+    def errors(self) -> list[Tuple[ErrorPos, str]]:
+        return [(pos, message) for pos, message, _ in self.__errors]
 
-    def __printSLineError(self, pos: ErrorPos, message: str, sourceLines: list[str]) -> None:
-        line = pos.lS
-        charStart = pos.cS
-        charEnd = pos.cE
-        source = sourceLines[line-1]
-        linePrefix = str(line) + " | "
-        print(f"Error: {message}\n")
-        print(f"\t{linePrefix}{source}")
-        print("\t" + " "*len(linePrefix) + " "*(charStart-1) + "~"*(charEnd - charStart + 1))
-        # print("\t" + " "*len(linePrefix) + " "*(focus) + "^--here")
+    # Hands the recorded errors over to the caller instead of reporting them.
+    def takeErrors(self) -> list[Tuple[ErrorPos, str]]:
+        errors = self.errors()
+        self.__clear()
+        self.hadError = False
+        self.hadRuntimeError = False
+        return errors
 
-    def __printMPosError(self, pos: ErrorPos, message: str, sourceLines: list[str], focusLine: int = -1, focusChar: int = -1) -> None:
-        if focusLine == 0: focusLine = pos.lS
-        elif focusLine == -1: focusLine = pos.lE
-        if focusChar == -1: focusChar = len(sourceLines[focusLine-1])
-        print(f"Error: {message}\n")
-        for line in range(pos.lS, pos.lE+1):
-            linePrefix = str(line) + " | "
-            source = sourceLines[line-1]
-            print(f"\t{linePrefix}{source}")
-            if line == focusLine:
-                print("\t" + " "*len(linePrefix) + " "*(focusChar) + "^--here")
+    def __clear(self) -> None:
+        self.__errors = []
+        self.__seen = set()
+        self.suppressed = 0
 
+    # Writes the recorded errors in one pass. The line index of sourceCode is kept for
+    # the next report, which in the REPL and in streaming mode is often of the same source.
     def reportErrors(self, sourceCode: str) -> bool:
         if self.hadError or self.hadRuntimeError:
-            sourceLines = sourceCode.split("\n")
-            for error in self.__errors:
-                pos, message = error
-                if pos.lE - pos.lS > 0:
-                    self.__printMPosError(pos, message, sourceLines)
-                else:
-                    if True:
-                        self.__printSPosError(pos, message, sourceLines)
-                    else:
-                        self.__printSLineError(pos, message, sourceLines)
-            self.__errors = []
+            if self.__index == None or self.__index.source is not sourceCode:
+                self.__index = LineIndex(sourceCode)
+            writeDiagnostics(self.__errors, self.__index, self.suppressed, self.format)
+            self.__clear()
             return True
-        return False
\ No newline at end of file
+        return False
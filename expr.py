@@ -24,6 +24,16 @@ class ExprVisitor(ABC):
     @abstractmethod
     def visitLogicalExpr(self, expr): pass
 
+    def visitNumberAddExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberSubtractExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberMultiplyExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberDivideExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberLessExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberLessEqualExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberGreaterExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitNumberGreaterEqualExpr(self, expr): return self.visitBinaryExpr(expr)
+    def visitStringConcatExpr(self, expr): return self.visitBinaryExpr(expr)
+
 class Expr(ABC):
     def __init__(self) -> None:
         self.pos: ErrorPos = ErrorPos(0, 0, 0, 0)
@@ -78,6 +88,42 @@ class Binary(Expr):
     def accept(self, visitor: ExprVisitor):
         return visitor.visitBinaryExpr(self)
 
+class NumberAdd(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberAddExpr(self)
+
+class NumberSubtract(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberSubtractExpr(self)
+
+class NumberMultiply(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberMultiplyExpr(self)
+
+class NumberDivide(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberDivideExpr(self)
+
+class NumberLess(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberLessExpr(self)
+
+class NumberLessEqual(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberLessEqualExpr(self)
+
+class NumberGreater(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberGreaterExpr(self)
+
+class NumberGreaterEqual(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitNumberGreaterEqualExpr(self)
+
+class StringConcat(Binary):
+    def accept(self, visitor: ExprVisitor):
+        return visitor.visitStringConcatExpr(self)
+
 class Ternary(Expr):
     def __init__(self, left: Expr, leftOp: Token, mid: Expr, rightOp: Token, right: Expr, pos: ErrorPos) -> None:
         self.pos: ErrorPos = pos
@@ -96,6 +142,11 @@ class Variable(Expr):
         self.pos: ErrorPos = pos
         self.name: Token = name
         self.rType: PLObjType = PLObjType.UNKNOWN
+        self.depth: int = None
+        self.slot: int = None
+        # Inline cache of the Interpreter: the global shape and slot of the last lookup.
+        self.cacheShape = None
+        self.cacheSlot: int = 0
     
     def accept(self, visitor: ExprVisitor):
         return visitor.visitVariableExpr(self)
@@ -106,6 +157,11 @@ class Assignment(Expr):
         self.name: Token = name
         self.value: Expr = value
         self.rType: PLObjType = PLObjType.UNKNOWN
+        self.depth: int = None
+        self.slot: int = None
+        # Inline cache of the Interpreter: the global shape and slot of the last lookup.
+        self.cacheShape = None
+        self.cacheSlot: int = 0
 
     def accept(self, visitor: ExprVisitor):
         return visitor.visitAssignmentExpr(self)
@@ -0,0 +1,180 @@
+import re
+from bisect import bisect_right
+from tokens import Token, TokenType, TokenStream
+from typing import Union, Iterator
+from errors import ErrorHandler, ErrorPos
+
+KEYWORDS: dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+
+OPERATORS: dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    "*": TokenType.STAR,
+    ";": TokenType.SEMICOLON,
+    "?": TokenType.QUERY,
+    ":": TokenType.COLON,
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+# Amount of source that iterTokens scans ahead of the tokens it has handed out.
+STREAM_CHUNK = 4096
+
+# Whitespace between lexemes is consumed as a prefix of the following match. Numbers only
+# start with decimal digits; the character-by-character Scanner also enters its number
+# branch for other numeric characters such as "²", which float() then rejects.
+MASTER_PATTERN = re.compile(r"""
+    [ \r\t\n]*
+    (?:
+         (?P<LINE_COMMENT>//[^\n]*)
+        |(?P<BLOCK_COMMENT>/\*)
+        |(?P<NUMBER>\d+(?:\.\d+)?)
+        |(?P<IDENTIFIER>[^\W\d]\w*)
+        |(?P<STRING>"[^"]*")
+        |(?P<UNTERMINATED_STRING>")
+        |(?P<OPERATOR>[!=<>]=?|[(){},.\-+*;?:/])
+        |(?P<ERROR>.)
+        |(?P<END>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+# Produces the same tokens and errors as Scanner, but matches whole lexemes with one
+# compiled pattern and derives positions from an index of line start offsets.
+class FastScanner:
+    def __init__(self, source: str, errorHandler: ErrorHandler, compact: bool = False) -> None:
+        self.source: str = source
+        self.tokens: Union[list[Token], TokenStream] = TokenStream(source) if compact else []
+        self.__compact: bool = compact
+
+        self.__lastStart: int = 0
+        self.__lineStarts: list[int] = [0]
+        newline = source.find("\n")
+        while newline != -1:
+            self.__lineStarts.append(newline + 1)
+            newline = source.find("\n", newline + 1)
+
+        self.errorHandler = errorHandler
+
+    def __error(self, offset: int, message: str) -> None:
+        line = bisect_right(self.__lineStarts, offset)
+        char = offset - self.__lineStarts[line - 1]
+        self.errorHandler.error(ErrorPos(line, char, line, char), message)
+
+    def scanTokens(self) -> Union[list[Token], TokenStream]:
+        self.__scan(0, len(self.source))
+        self.__addEOF()
+        return self.tokens
+
+    def iterTokens(self) -> Iterator[Token]:
+        self.tokens = []
+        self.__compact = False
+        position = 0
+        while position < len(self.source):
+            position = self.__scan(position, position + STREAM_CHUNK)
+            yield from self.tokens
+            self.tokens.clear()
+        self.__addEOF()
+        yield self.tokens.pop()
+
+    def __addEOF(self) -> None:
+        # The EOF token's lexeme starts at the last thing scanned.
+        if self.__compact:
+            self.tokens.append(TokenType.EOF, self.__lastStart, len(self.source))
+        else:
+            line = len(self.__lineStarts)
+            char = self.__lastStart - self.__lineStarts[line - 1] + 1
+            self.tokens.append(Token(TokenType.EOF, self.source[self.__lastStart:], "", line, char))
+
+    # Scans from position until at least stop or the end of the source and returns the
+    # offset where scanning stopped, which is always the end of a lexeme.
+    def __scan(self, position: int, stop: int) -> int:
+        source = self.source
+        length = len(source)
+        match = MASTER_PATTERN.match
+        keywords = KEYWORDS
+        operators = OPERATORS
+
+        tokens = self.tokens
+        if self.__compact:
+            addToken = tokens.append
+        else:
+            lineStarts = self.__lineStarts
+            def addToken(tokenType: TokenType, start: int, end: int, literal: Union[str, float, bool] = "") -> None:
+                line = bisect_right(lineStarts, end)
+                tokens.append(Token(tokenType, source[start:end], literal, line, start - lineStarts[line - 1] + 1))
+
+        # Scanner treats every whitespace character as a lexeme of its own.
+        lastStart = self.__lastStart
+        while position < stop:
+            m = match(source, position)
+            kind = m.lastgroup
+            start = m.start(kind)
+            position = m.end()
+            if kind == "END":
+                if start > m.start(): lastStart = start - 1
+                break
+            lastStart = start
+
+            if kind == "IDENTIFIER":
+                text = m.group(kind)
+                addToken(keywords.get(text, TokenType.IDENTIFIER), start, position, text)
+            elif kind == "OPERATOR":
+                addToken(operators[m.group(kind)], start, position)
+            elif kind == "NUMBER":
+                addToken(TokenType.NUMBER, start, position, float(m.group(kind)))
+            elif kind == "STRING":
+                addToken(TokenType.STRING, start, position, source[start + 1:position - 1])
+            elif kind == "LINE_COMMENT":
+                pass
+            elif kind == "BLOCK_COMMENT":
+                close = source.find("*/", position)
+                if close != -1:
+                    position = close + 2
+                else:
+                    # Scanner stops one character short of the end and scans that
+                    # character as ordinary input.
+                    position = max(position, length - 1)
+                    self.__error(position, "Unterminated comment")
+            elif kind == "UNTERMINATED_STRING":
+                position = length
+                self.__error(position, "Unterminated string")
+            else:
+                self.__error(position, f"Unexpected character \"{m.group(kind)}\"")
+                addToken(TokenType.ERROR, start, position)
+
+        self.__lastStart = lastStart
+        return position
+
+    def dumpTokens(self):
+        for token in self.tokens:
+            print(token)
@@ -0,0 +1,507 @@
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from operator import ne
+from typing import Union
+from expr import Expr, Literal, ErrorExpr
+from stmt import Stmt
+from tokens import Token, TokenType, TokenStream
+from fastscanner import FastScanner
+from parser import Parser
+from analyzer import Analyzer
+from plobject import PLObjType
+from errors import ErrorHandler, ErrorPos
+
+# Source scanned past the end of an edit while looking for the point where the new parse
+# lines up with the old one again. Doubled whenever that point is not reached.
+WINDOW = 512
+
+# Fewest declarations between two saved global type environments. The gap grows with
+# the number of globals so that the total cost of saving them stays linear.
+CHECKPOINT = 64
+
+# Length of the slices compared when looking for the unchanged start and end of a source.
+COMPARE_CHUNK = 4096
+
+Errors = list[tuple[ErrorPos, str]]
+Types = dict[str, PLObjType]
+
+def commonPrefix(old: str, new: str, limit: int) -> int:
+    length = 0
+    while length < limit:
+        step = min(COMPARE_CHUNK, limit - length)
+        if old[length:length + step] == new[length:length + step]:
+            length += step
+            continue
+        while old[length] == new[length]:
+            length += 1
+        break
+    return length
+
+def commonSuffix(old: str, new: str, limit: int) -> int:
+    length = 0
+    oldEnd = len(old)
+    newEnd = len(new)
+    while length < limit:
+        step = min(COMPARE_CHUNK, limit - length)
+        if old[oldEnd - length - step:oldEnd - length] == new[newEnd - length - step:newEnd - length]:
+            length += step
+            continue
+        while old[oldEnd - length - 1] == new[newEnd - length - 1]:
+            length += 1
+        break
+    return length
+
+# Stored errors get positions of their own, so that shifting a declaration never moves a
+# position that another declaration's tree shares.
+def copyErrors(errors: Errors) -> Errors:
+    return [(ErrorPos(pos.lS, pos.cS, pos.lE, pos.cE), message) for pos, message in errors]
+
+# Moves every position in the given trees and errors down by delta lines. Positions on
+# line 0 do not point into the source and stay where they are.
+def shiftLines(roots: list, delta: int) -> None:
+    seen: set[int] = set()
+    pending = list(roots)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ErrorPos):
+            if node.lS != 0 and id(node) not in seen:
+                seen.add(id(node))
+                node.lS += delta
+                node.lE += delta
+        elif isinstance(node, (Expr, Stmt, Token)):
+            pending.extend(vars(node).values())
+        elif isinstance(node, (list, tuple)):
+            pending.extend(node)
+
+# The position pos comes to once moved down by delta lines as shiftLines would move it.
+def shiftedPosition(pos: ErrorPos, delta: int) -> ErrorPos:
+    if delta == 0 or pos.lS == 0:
+        return pos
+    return ErrorPos(pos.lS + delta, pos.cS, pos.lE + delta, pos.cE)
+
+# Forgets the types the analyzer stored in a tree, which it would otherwise take over
+# instead of checking the tree again. Literals and error nodes get theirs when parsed.
+def clearTypes(root: Stmt) -> None:
+    pending: list = [root]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Expr):
+            if not isinstance(node, (Literal, ErrorExpr)):
+                node.rType = PLObjType.UNKNOWN
+            pending.extend(vars(node).values())
+        elif isinstance(node, Stmt):
+            pending.extend(vars(node).values())
+        elif isinstance(node, list):
+            pending.extend(node)
+
+# Keeps the front-end results of a script between edits. Each update re-parses only the
+# top-level declarations around the changed text: scanning starts at a declaration
+# boundary before the edit and stops at the first boundary after it that coincides with
+# a boundary of the previous version, from where the old trees are reused with their
+# line numbers shifted lazily. Type checking resumes from a saved global environment
+# before the edit, skips the declarations that read no global whose type changed, and
+# stops as soon as the globals agree with the previous run again.
+# The errors and trees match those of a full run of the front end without optimization.
+class IncrementalFrontEnd():
+    def __init__(self, iterative: bool = False) -> None:
+        self.__errorHandler = ErrorHandler(maxErrors=None, deduplicate=False)
+        self.__iterative: bool = iterative
+        self.source: str = ""
+
+        # One entry per top-level declaration.
+        self.__starts: list[int] = []
+        self.__stmts: list[Stmt] = []
+        self.__scanErrors: list[Errors] = []
+        self.__parseErrors: list[Errors] = []
+        self.__typeErrors: list[Union[Errors, None]] = []
+        # Latest type of each global the declaration defined or assigned.
+        self.__effects: list[Union[Types, None]] = []
+        # Globals the declaration looked up.
+        self.__reads: list[Union[set[str], None]] = []
+        # Global types before the declaration, saved at checkpoints only.
+        self.__snapshots: list[Union[Types, None]] = []
+        # Effects that replaced declarations had just before this one in the last check.
+        self.__replacedEffects: list[Union[Types, None]] = []
+        # Lines still to be added to the positions in the tree and errors.
+        self.__lineShifts: list[int] = []
+
+        # Type checking results are current before analyzed and from dirtyEnd on. The
+        # declarations in between are new, or are left from the last check with a
+        # global environment that may have changed since.
+        self.__analyzed: int = 0
+        self.__dirtyEnd: int = 0
+        # Declarations with scan or parse errors.
+        self.__syntaxErrors: int = 0
+        # Declarations with type errors.
+        self.__typeErrorCount: int = 0
+        # Scan errors in a source without any declarations, which have nowhere else to go.
+        self.__strayErrors: Errors = []
+
+        self.reparsed: int = 0
+        self.reanalyzed: int = 0
+
+    def update(self, source: str) -> bool:
+        old = self.source
+        self.reparsed = 0
+        self.reanalyzed = 0
+        if source == old and self.__stmts:
+            return not self.__hasErrors()
+
+        limit = min(len(old), len(source))
+        prefix = commonPrefix(old, source, limit)
+        suffix = commonSuffix(old, source, limit - prefix)
+        delta = len(source) - len(old)
+        lineDelta = source.count("\n", prefix, len(source) - suffix) - old.count("\n", prefix, len(old) - suffix)
+
+        # The declaration after a reused one must be untouched as well, because the
+        # parser looks at its first token to decide where the reused one ends.
+        starts = self.__starts
+        restart = max(0, bisect_right(starts, prefix) - 2)
+        # Old declarations can be reused behind the edit if their lines are unchanged
+        # from the start of the declaration before, whose last token the parser may
+        # have looked back at.
+        unchanged = len(old) - suffix
+        reusable = max(restart, bisect_left(starts, unchanged))
+        while reusable < len(starts):
+            lineStart = old.rfind("\n", 0, starts[reusable]) + 1
+            if lineStart >= unchanged and (lineStart + delta == 0 or source[lineStart + delta - 1] == "\n"):
+                break
+            reusable += 1
+        reusable = min(reusable + 1, len(starts))
+
+        self.source = source
+        region, resume = self.__parseRegion(restart, reusable, delta)
+        newStarts, newStmts, newScanErrors, newParseErrors, strayErrors = region
+        count = len(newStmts)
+        self.reparsed = count
+
+        # The effects the replaced declarations had in the last check, in order.
+        replaced: Types = {}
+        for index in range(restart, resume):
+            for effects in (self.__replacedEffects[index], self.__effects[index]):
+                if effects:
+                    replaced.update(effects)
+        # The range of declarations without current results grows to cover the new ones.
+        if self.__analyzed == self.__dirtyEnd:
+            analyzed = dirtyEnd = restart
+        else:
+            analyzed = min(self.__analyzed, restart)
+            dirtyEnd = self.__dirtyEnd
+        if dirtyEnd >= resume:
+            dirtyEnd += count - (resume - restart)
+        elif dirtyEnd > restart:
+            dirtyEnd = restart + count
+        dirtyEnd = max(dirtyEnd, restart + count)
+        self.__syntaxErrors -= sum(1 for index in range(restart, resume) if self.__scanErrors[index] or self.__parseErrors[index])
+        self.__syntaxErrors += sum(1 for index in range(count) if newScanErrors[index] or newParseErrors[index])
+
+        # Slice assignment moves the entries behind the edit without copying the lists.
+        self.__typeErrorCount -= sum(1 for errors in self.__typeErrors[restart:resume] if errors)
+        if delta != 0:
+            starts[restart:] = newStarts + list(map(delta.__add__, starts[resume:]))
+        else:
+            starts[restart:resume] = newStarts
+        self.__stmts[restart:resume] = newStmts
+        self.__scanErrors[restart:resume] = newScanErrors
+        self.__parseErrors[restart:resume] = newParseErrors
+        self.__typeErrors[restart:resume] = [None] * count
+        self.__effects[restart:resume] = [None] * count
+        self.__reads[restart:resume] = [None] * count
+        self.__snapshots[restart:resume] = [None] * count
+        self.__replacedEffects[restart:resume] = [None] * count
+        # The replaced effects go before the first new declaration or, failing that,
+        # before the next one that is kept. At the end there is nothing left they affect.
+        if replaced and restart < len(starts):
+            if count == 0:
+                replaced.update(self.__replacedEffects[restart] or {})
+                dirtyEnd = max(dirtyEnd, restart + 1)
+            self.__replacedEffects[restart] = replaced
+        shifts = self.__lineShifts
+        if lineDelta != 0:
+            shifts[restart:] = [0] * count + list(map(lineDelta.__add__, shifts[resume:]))
+        else:
+            shifts[restart:resume] = [0] * count
+
+        self.__strayErrors = strayErrors
+        self.__analyzed = analyzed
+        self.__dirtyEnd = dirtyEnd
+        if self.__syntaxErrors or strayErrors:
+            return False
+        self.__analyze()
+        return not self.__hasErrors()
+
+    # Parses from the declaration at restart until the parse reaches a declaration of
+    # the old version at or after reusable. Returns the new declarations and the index of
+    # the old declaration where reuse resumes.
+    def __parseRegion(self, restart: int, reusable: int, delta: int) -> tuple[tuple, int]:
+        source = self.source
+        # Scanning starts at the declaration before, whose last token the parser may
+        # look back at.
+        start = self.__starts[restart] if restart > 0 else 0
+        context = self.__starts[restart - 1] if restart > 0 else 0
+        lineStart = source.rfind("\n", 0, context) + 1
+        margin = WINDOW
+        while True:
+            end = min(len(source), max(start, self.__changeEnd(reusable, delta)) + margin)
+            result = self.__parseWindow(lineStart, context, start, end, reusable, delta)
+            if result != None:
+                return result
+            margin *= 2
+
+    def __changeEnd(self, reusable: int, delta: int) -> int:
+        if reusable < len(self.__starts):
+            return self.__starts[reusable] + delta
+        return len(self.source)
+
+    # Scans and parses source[start:end]. Unless end is the end of the source, the last
+    # token may be cut off, so a declaration is only kept if the token after it is not
+    # the last one. Returns None if no old declaration was reached before that.
+    def __parseWindow(self, lineStart: int, context: int, start: int, end: int, reusable: int, delta: int) -> Union[tuple[tuple, int], None]:
+        source = self.source
+        errorHandler = self.__errorHandler
+        oldStarts = self.__starts
+        # Padding keeps the columns of the first line; line numbers are fixed up below.
+        text = " " * (context - lineStart) + source[context:end]
+        tokens: TokenStream = FastScanner(text, errorHandler, compact=True).scanTokens()
+        first = bisect_left(tokens.starts, start - lineStart)
+        scanErrors = errorHandler.takeErrors()
+        scanOffsets = self.__errorOffsets(text, scanErrors)
+        scanned = bisect_left(scanOffsets, start - lineStart)
+        complete = end == len(source)
+        lastSafe = len(tokens) - 2
+        # Unterminated comments and strings run to the end of the source and are
+        # reported there, so old declarations behind them cannot be reused.
+        canResume = not (complete and scanOffsets and scanOffsets[-1] >= len(text) - 1)
+        baseLine = source.count("\n", 0, lineStart)
+
+        starts: list[int] = []
+        stmts: list[Stmt] = []
+        declarationScanErrors: list[Errors] = []
+        declarationParseErrors: list[Errors] = []
+        resume = len(oldStarts)
+        for stmt, follow in Parser(tokens, errorHandler).declarationEnds(first):
+            parseErrors = errorHandler.takeErrors()
+            atEnd = tokens.tokenType(follow) == TokenType.EOF
+            if not complete and follow >= lastSafe:
+                errorHandler.takeErrors()
+                return None
+
+            followOffset = tokens.starts[follow]
+            ownScanned = scanned
+            while ownScanned < len(scanErrors) and (atEnd or scanOffsets[ownScanned] < followOffset):
+                ownScanned += 1
+            ownScanErrors = copyErrors(scanErrors[scanned:ownScanned])
+            ownParseErrors = copyErrors(parseErrors)
+            scanned = ownScanned
+            if baseLine != 0:
+                shiftLines([stmt, ownScanErrors, ownParseErrors], baseLine)
+
+            starts.append(lineStart + tokens.starts[first])
+            stmts.append(stmt)
+            declarationScanErrors.append(ownScanErrors)
+            declarationParseErrors.append(ownParseErrors)
+            first = follow
+            if atEnd:
+                break
+            if not canResume:
+                continue
+
+            oldOffset = lineStart + followOffset - delta
+            index = bisect_left(oldStarts, oldOffset, reusable)
+            if index < len(oldStarts) and oldStarts[index] == oldOffset:
+                resume = index
+                break
+        else:
+            # Only whitespace and comments were left.
+            if not complete:
+                return None
+        errorHandler.takeErrors()
+        strayErrors = copyErrors(scanErrors[scanned:]) if not stmts else []
+        if baseLine != 0:
+            shiftLines(strayErrors, baseLine)
+        return (starts, stmts, declarationScanErrors, declarationParseErrors, strayErrors), resume
+
+    # Converts the positions of scan errors back to offsets into text.
+    def __errorOffsets(self, text: str, errors: Errors) -> list[int]:
+        offsets: list[int] = []
+        if not errors:
+            return offsets
+        lineStarts = [0]
+        newline = text.find("\n")
+        while newline != -1:
+            lineStarts.append(newline + 1)
+            newline = text.find("\n", newline + 1)
+        for pos, _ in errors:
+            offsets.append(lineStarts[pos.lS - 1] + pos.cS)
+        return offsets
+
+    # Type checks from the first declaration without current results. A declaration
+    # left from the last check is only checked again if it reads a global whose type
+    # differs from that check, since otherwise it would repeat its results. Checking
+    # stops once no declaration is new and every global has the same type as in the last
+    # check again.
+    def __analyze(self) -> None:
+        count = len(self.__stmts)
+        start = self.__analyzed
+        end = self.__dirtyEnd
+        stmts = self.__stmts
+        reads = self.__reads
+        effects = self.__effects
+        snapshots = self.__snapshots
+        replacedEffects = self.__replacedEffects
+        # The last check's snapshot before start is stale if declarations were replaced
+        # right before it.
+        checkpoint = start if start == count or not replacedEffects[start] else max(start - 1, 0)
+        while checkpoint > 0 and snapshots[checkpoint] == None:
+            checkpoint -= 1
+        types: Types = dict(snapshots[checkpoint]) if checkpoint > 0 else {}
+        for index in range(checkpoint, start):
+            if effects[index]:
+                types.update(effects[index])
+
+        analyzer = Analyzer(self.__errorHandler, iterative=self.__iterative)
+        environment = analyzer.typeEnvironment
+        environment.restore(types)
+        typeOf = environment.typeOf
+        size = len(types)
+
+        # Globals whose type differs from the last check at this point, with the type
+        # they had there or None if they were undefined.
+        differing: dict[str, Union[PLObjType, None]] = {}
+
+        def settle(name: str, oldType: Union[PLObjType, None]) -> None:
+            if typeOf(name) == oldType:
+                differing.pop(name, None)
+            else:
+                differing[name] = oldType
+
+        checked = 0
+        lastSnapshot = checkpoint
+        # Declarations skipped from here on have not yet applied their effects.
+        applied = start
+        index = start
+        while index < count:
+            if index >= end and not differing:
+                break
+            previous = effects[index]
+            declarationReads = reads[index]
+            replaced = replacedEffects[index]
+            if replaced or declarationReads == None:
+                # The environment is only brought up to date where it is needed, the
+                # types of differing globals are always current.
+                for skipped in effects[applied:index]:
+                    if skipped:
+                        environment.update(skipped)
+                applied = index
+            if replaced:
+                replacedEffects[index] = None
+                for name, objType in replaced.items():
+                    settle(name, objType)
+
+            snapshot = snapshots[index]
+            if snapshot != None:
+                # Snapshots of the last check stay where they are and are brought up to
+                # date, which only concerns the differing globals.
+                for name in differing:
+                    objType = typeOf(name)
+                    if objType == None:
+                        snapshot.pop(name, None)
+                    else:
+                        snapshot[name] = objType
+                lastSnapshot = index
+            elif declarationReads == None and index - lastSnapshot >= max(CHECKPOINT, size // 4):
+                snapshots[index] = environment.snapshot()
+                lastSnapshot = index
+
+            if declarationReads != None:
+                if declarationReads.isdisjoint(differing):
+                    # Same types for everything it reads, so same results as before.
+                    if previous and not differing.keys().isdisjoint(previous):
+                        for name in previous:
+                            differing.pop(name, None)
+                    index += 1
+                    continue
+                for skipped in effects[applied:index]:
+                    if skipped:
+                        environment.update(skipped)
+                clearTypes(stmts[index])
+            applied = index + 1
+
+            self.__materialize(index)
+            environment.journal = {}
+            environment.reads = set()
+            analyzer.typeCheckProgram([stmts[index]])
+            priors = environment.journal
+            reads[index] = environment.reads
+            environment.journal = None
+            environment.reads = None
+            declarationEffects = {name: typeOf(name) for name in priors}
+            effects[index] = declarationEffects or None
+            typeErrors = copyErrors(self.__errorHandler.takeErrors())
+            self.__typeErrorCount += bool(typeErrors) - bool(self.__typeErrors[index])
+            self.__typeErrors[index] = typeErrors
+            size += len(priors)
+
+            # Globals the declaration set in either check end up with the type it gave
+            # them in the last one, the others keep theirs.
+            for name, priorType in priors.items():
+                if not previous or name not in previous:
+                    settle(name, differing.get(name, priorType))
+            if previous:
+                for name, objType in previous.items():
+                    settle(name, objType)
+            checked += 1
+            index += 1
+
+        self.reanalyzed = checked
+        self.__analyzed = self.__dirtyEnd = count
+
+    def __materialize(self, index: int) -> None:
+        shift = self.__lineShifts[index]
+        if shift != 0:
+            shiftLines([self.__stmts[index], self.__scanErrors[index], self.__parseErrors[index], self.__typeErrors[index]], shift)
+            self.__lineShifts[index] = 0
+
+    def __hasErrors(self) -> bool:
+        return self.__syntaxErrors > 0 or bool(self.__strayErrors) or self.__typeErrorCount > 0
+
+    # The errors a full run of the front end would report: scan and parse errors if
+    # there are any, type errors otherwise. Like the ErrorHandler of a full run, errors
+    # repeating the position and message of an earlier one are left out.
+    def errors(self) -> Errors:
+        errors: Errors = []
+        seen: set[tuple[int, int, int, int, str]] = set()
+
+        def add(declarationErrors: Errors) -> None:
+            for pos, message in declarationErrors:
+                key = (pos.lS, pos.cS, pos.lE, pos.cE, message)
+                if key not in seen:
+                    seen.add(key)
+                    errors.append((pos, message))
+
+        add(self.__strayErrors)
+        lists = (self.__scanErrors, self.__parseErrors) if self.__syntaxErrors else (self.__typeErrors,)
+        for declarationErrors in lists:
+            for index in compress(range(len(declarationErrors)), declarationErrors):
+                self.__materialize(index)
+                add(declarationErrors[index])
+        return errors
+
+    # Every tree with its positions brought up to date. That walks every declaration
+    # behind an edit, so running the program goes through segments instead.
+    def program(self) -> list[Stmt]:
+        for index in compress(range(len(self.__lineShifts)), self.__lineShifts):
+            self.__materialize(index)
+        return list(self.__stmts)
+
+    # The program as runs of consecutive declarations, each paired with the number of
+    # lines all of their positions are still to be moved down by. Running a program looks
+    # at no position until it reports a runtime error, so the trees are left as they are
+    # and only the position of an error is moved, with shiftedPosition.
+    def segments(self) -> list[tuple[list[Stmt], int]]:
+        stmts = self.__stmts
+        shifts = self.__lineShifts
+        bounds = [0]
+        bounds.extend(compress(range(1, len(shifts)), map(ne, shifts, shifts[1:])))
+        bounds.append(len(stmts))
+        return [(stmts[start:end], shifts[start]) for start, end in zip(bounds, bounds[1:]) if start < end]
@@ -1,15 +1,22 @@
 from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from expr import NumberAdd, NumberSubtract, NumberMultiply, NumberDivide, NumberLess, NumberLessEqual, NumberGreater, NumberGreaterEqual, StringConcat
 from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
 from tokens import TokenType, Token
 from typing import Union
 from errors import PyLoxRuntimeError, ErrorHandler
-from plobject import PLObjType, PLObject
-from environment import Environment
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE, plBool, plNumber
+from environment import Environment, LocalEnvironment, EnvironmentPool
+from output import OutputSink
 
 class Interpreter(ExprVisitor, StmtVisitor):
-    def __init__(self, errorHandler: ErrorHandler) -> None:
+    def __init__(self, errorHandler: ErrorHandler, output: OutputSink = None) -> None:
         self.__errorHandler = errorHandler
-        self.__environment = Environment()
+        self.__globals = Environment()
+        self.__environment: LocalEnvironment = None
+        self.__pool = EnvironmentPool()
+        self.output: OutputSink = output if output != None else OutputSink()
+        self.cacheHits: int = 0
+        self.cacheMisses: int = 0
 
     def __evaluate(self, expr: Expr) -> PLObject:
         return expr.accept(self)
@@ -23,6 +30,8 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 self.__execute(stmt)
         except PyLoxRuntimeError as e:
             self.__errorHandler.runtimeError(e)
+        finally:
+            self.output.flush()
 
     def visitLiteralExpr(self, expr: Literal) -> PLObject:
         return expr.value
@@ -37,8 +46,8 @@ class Interpreter(ExprVisitor, StmtVisitor):
             if expr.operator.tokenType == TokenType.MINUS:
                 return -right
             elif expr.operator.tokenType == TokenType.BANG:
-                return PLObject(PLObjType.BOOL, not right)
-            return PLObject(PLObjType.NIL, None)
+                return plBool(not right)
+            return NIL
         except PyLoxRuntimeError as e:
             raise PyLoxRuntimeError(expr.operator.pos, e.message)
 
@@ -72,28 +81,100 @@ class Interpreter(ExprVisitor, StmtVisitor):
         except PyLoxRuntimeError as e:
             raise PyLoxRuntimeError(expr.operator.pos, e.message)
 
+    def visitNumberAddExpr(self, expr: NumberAdd) -> PLObject:
+        return plNumber(expr.left.accept(self).value + expr.right.accept(self).value)
+
+    def visitNumberSubtractExpr(self, expr: NumberSubtract) -> PLObject:
+        return plNumber(expr.left.accept(self).value - expr.right.accept(self).value)
+
+    def visitNumberMultiplyExpr(self, expr: NumberMultiply) -> PLObject:
+        return plNumber(expr.left.accept(self).value * expr.right.accept(self).value)
+
+    def visitNumberDivideExpr(self, expr: NumberDivide) -> PLObject:
+        left = expr.left.accept(self).value
+        right = expr.right.accept(self).value
+        if right == 0:
+            raise PyLoxRuntimeError(expr.operator.pos, "Division by zero")
+        return plNumber(left / right)
+
+    def visitNumberLessExpr(self, expr: NumberLess) -> PLObject:
+        return TRUE if expr.left.accept(self).value < expr.right.accept(self).value else FALSE
+
+    def visitNumberLessEqualExpr(self, expr: NumberLessEqual) -> PLObject:
+        return TRUE if expr.left.accept(self).value <= expr.right.accept(self).value else FALSE
+
+    def visitNumberGreaterExpr(self, expr: NumberGreater) -> PLObject:
+        return TRUE if expr.left.accept(self).value > expr.right.accept(self).value else FALSE
+
+    def visitNumberGreaterEqualExpr(self, expr: NumberGreaterEqual) -> PLObject:
+        return TRUE if expr.left.accept(self).value >= expr.right.accept(self).value else FALSE
+
+    def visitStringConcatExpr(self, expr: StringConcat) -> PLObject:
+        return PLObject(PLObjType.STRING, expr.left.accept(self).value + expr.right.accept(self).value)
+
     def visitTernaryExpr(self, expr: Ternary) -> PLObject:
         if self.__evaluate(expr.left):
             return self.__evaluate(expr.mid)
         else:
             return self.__evaluate(expr.right)
 
+    # Globals are looked up by name, so Variable and Assignment nodes cache the slot they
+    # found together with the shape of the globals at the time. As long as the globals
+    # still have that shape, which is always the case when a program is run again, the
+    # slot is used without a lookup. Both paths are inlined, since most nodes of a program
+    # run only once and a miss must not cost more than the plain lookup did.
     def visitVariableExpr(self, expr: Variable) -> PLObject:
-        return self.__environment.get(expr.name)
+        if expr.depth == None:
+            globals = self.__globals
+            shape = globals.shape
+            if expr.cacheShape is shape:
+                self.cacheHits += 1
+                return globals.values[expr.cacheSlot]
+            self.cacheMisses += 1
+            slot = shape.slots.get(expr.name.lexeme)
+            if slot is None or slot >= shape.size:
+                return globals.get(expr.name)
+            expr.cacheShape = shape
+            expr.cacheSlot = slot
+            return globals.values[slot]
+        return self.__environment.getAt(expr.depth, expr.slot)
 
     def visitAssignmentExpr(self, expr: Assignment) -> PLObject:
         value = self.__evaluate(expr.value)
-        self.__environment.assign(expr.name, value)
+        if expr.depth == None:
+            globals = self.__globals
+            shape = globals.shape
+            if expr.cacheShape is shape:
+                self.cacheHits += 1
+                globals.values[expr.cacheSlot] = value
+                return value
+            self.cacheMisses += 1
+            slot = shape.slots.get(expr.name.lexeme)
+            if slot is None or slot >= shape.size:
+                globals.assign(expr.name, value)
+                return value
+            expr.cacheShape = shape
+            expr.cacheSlot = slot
+            globals.values[slot] = value
+        else:
+            self.__environment.assignAt(expr.depth, expr.slot, value)
         return value
 
+    # Defines a global before the program runs, such as a parameter bound by the caller.
+    def defineGlobal(self, name: str, value: PLObject) -> None:
+        self.__globals.define(name, value)
+
+    def cacheInfo(self) -> dict[str, int]:
+        return {"hits": self.cacheHits, "misses": self.cacheMisses}
+
     def visitLogicalExpr(self, expr: Logical) -> PLObject:
         left = self.__evaluate(expr.left)
 
         if expr.operator.tokenType == TokenType.OR:
-            if left: return PLObject(PLObjType.BOOL, bool(left))
+            if left: return TRUE
         else:
-            if not left: return PLObject(PLObjType.BOOL, bool(left))
-        return PLObject(PLObjType.BOOL, bool(self.__evaluate(expr.right)))
+            if not left: return FALSE
+        return TRUE if self.__evaluate(expr.right) else FALSE
 
     def visitErrorExpr(self, expr: ErrorExpr):
         return None
@@ -105,23 +186,31 @@ class Interpreter(ExprVisitor, StmtVisitor):
         self.__evaluate(stmt.expression)
 
     def visitPrintStmt(self, stmt: PrintStmt) -> None:
-        value = self.__evaluate(stmt.expression)
-        print(value)
+        self.output.write(self.__evaluate(stmt.expression))
 
     def visitVarStmt(self, stmt: VarStmt) -> None:
-        value: PLObject = PLObject(PLObjType.NIL, None)
+        value: PLObject = NIL
         if stmt.initializer != None:
             value = self.__evaluate(stmt.initializer)
-        self.__environment.define(stmt.name.lexeme, value)
+        if stmt.slot == None:
+            self.__globals.define(stmt.name.lexeme, value)
+        else:
+            self.__environment.values[stmt.slot] = value
 
     def visitBlockStmt(self, stmt: BlockStmt) -> None:
-        previous: Environment = self.__environment
+        if not stmt.scoped:
+            for statement in stmt.statements:
+                self.__execute(statement)
+            return
+        previous: LocalEnvironment = self.__environment
+        environment = self.__pool.acquire(previous, stmt.slotCount)
         try:
-            self.__environment = Environment(previous)
+            self.__environment = environment
             for statement in stmt.statements:
                 self.__execute(statement)
         finally:
             self.__environment = previous
+            self.__pool.release(environment)
 
     def visitIfStmt(self, stmt: IfStmt) -> None:
         if self.__evaluate(stmt.condition):
@@ -0,0 +1,205 @@
+from typing import Union
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import TokenType
+from errors import PyLoxRuntimeError
+from plobject import PLObjType, PLObject, plBool
+
+FOLDABLE_OPS = {
+    TokenType.PLUS: lambda left, right: left + right,
+    TokenType.MINUS: lambda left, right: left - right,
+    TokenType.STAR: lambda left, right: left * right,
+    TokenType.SLASH: lambda left, right: left / right,
+    TokenType.LESS: lambda left, right: left < right,
+    TokenType.LESS_EQUAL: lambda left, right: left <= right,
+    TokenType.GREATER: lambda left, right: left > right,
+    TokenType.GREATER_EQUAL: lambda left, right: left >= right,
+    TokenType.EQUAL_EQUAL: lambda left, right: left == right,
+    TokenType.BANG_EQUAL: lambda left, right: left != right,
+}
+
+NUMBER_RESULT_OPS = (TokenType.MINUS, TokenType.STAR, TokenType.SLASH)
+BOOL_RESULT_OPS = (
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.BANG_EQUAL,
+)
+
+class Optimizer(ExprVisitor, StmtVisitor):
+    def optimize(self, program: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for stmt in program:
+            try:
+                stmt = self.__optimizeStmt(stmt)
+            except RecursionError:
+                # Too deeply nested to optimize recursively. Every subtree rewritten before
+                # the limit was hit is equivalent to the original, so the rest is kept as is.
+                pass
+            if stmt != None:
+                optimized.append(stmt)
+        return optimized
+
+    def __optimizeStmt(self, stmt: Stmt) -> Union[Stmt, None]:
+        return stmt.accept(self)
+
+    def __optimizeExpr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def __isConstant(self, expr: Expr, objType: PLObjType, value) -> bool:
+        return isinstance(expr, Literal) and expr.value.objType == objType and expr.value.value == value
+
+    # The Analyzer types variables by their last assignment in program order, which a
+    # branch not taken at runtime can invalidate. Identities are only applied to operands
+    # whose type follows from the operators alone.
+    def __provenType(self, expr: Expr) -> PLObjType:
+        if isinstance(expr, Literal):
+            return expr.value.objType
+        elif isinstance(expr, Grouping):
+            return self.__provenType(expr.expression)
+        elif isinstance(expr, Unary):
+            return PLObjType.NUMBER if expr.operator.tokenType == TokenType.MINUS else PLObjType.BOOL
+        elif isinstance(expr, Binary):
+            tokenType = expr.operator.tokenType
+            if tokenType in NUMBER_RESULT_OPS: return PLObjType.NUMBER
+            elif tokenType in BOOL_RESULT_OPS: return PLObjType.BOOL
+            elif tokenType == TokenType.COMMA: return self.__provenType(expr.right)
+            leftType = self.__provenType(expr.left)
+            if leftType == self.__provenType(expr.right): return leftType
+        elif isinstance(expr, Ternary):
+            midType = self.__provenType(expr.mid)
+            if midType == self.__provenType(expr.right): return midType
+        elif isinstance(expr, Logical):
+            return PLObjType.BOOL
+        return PLObjType.UNKNOWN
+
+    def __fold(self, value: PLObject, expr: Expr) -> Literal:
+        return Literal(value, expr.pos)
+
+    def visitLiteralExpr(self, expr: Literal) -> Expr:
+        return expr
+
+    def visitGroupingExpr(self, expr: Grouping) -> Expr:
+        inner = self.__optimizeExpr(expr.expression)
+        if isinstance(inner, Literal):
+            return self.__fold(inner.value, expr)
+        return inner
+
+    def visitUnaryExpr(self, expr: Unary) -> Expr:
+        expr.right = self.__optimizeExpr(expr.right)
+        right = expr.right
+        if isinstance(right, Literal):
+            try:
+                if expr.operator.tokenType == TokenType.MINUS:
+                    return self.__fold(-right.value, expr)
+                elif expr.operator.tokenType == TokenType.BANG:
+                    return self.__fold(plBool(not right.value), expr)
+            except PyLoxRuntimeError:
+                return expr
+        elif isinstance(right, Unary) and right.operator.tokenType == expr.operator.tokenType:
+            innerType = self.__provenType(right.right)
+            if expr.operator.tokenType == TokenType.MINUS and innerType == PLObjType.NUMBER:
+                return right.right
+            elif expr.operator.tokenType == TokenType.BANG and innerType == PLObjType.BOOL:
+                return right.right
+        return expr
+
+    def visitBinaryExpr(self, expr: Binary) -> Expr:
+        expr.left = self.__optimizeExpr(expr.left)
+        expr.right = self.__optimizeExpr(expr.right)
+        left, right = expr.left, expr.right
+        tokenType = expr.operator.tokenType
+
+        if tokenType == TokenType.COMMA:
+            if isinstance(left, Literal) and isinstance(right, Literal):
+                return self.__fold(right.value, expr)
+            return expr
+
+        if isinstance(left, Literal) and isinstance(right, Literal) and tokenType in FOLDABLE_OPS:
+            try:
+                return self.__fold(FOLDABLE_OPS[tokenType](left.value, right.value), expr)
+            except PyLoxRuntimeError:
+                return expr
+
+        # x + 0 and 0 + x are not identities: they turn -0 into 0.
+        NUMBER = PLObjType.NUMBER
+        STRING = PLObjType.STRING
+        if tokenType == TokenType.STAR:
+            if self.__isConstant(right, NUMBER, 1) and self.__provenType(left) == NUMBER: return left
+            if self.__isConstant(left, NUMBER, 1) and self.__provenType(right) == NUMBER: return right
+        elif tokenType == TokenType.SLASH:
+            if self.__isConstant(right, NUMBER, 1) and self.__provenType(left) == NUMBER: return left
+        elif tokenType == TokenType.MINUS:
+            if self.__isConstant(right, NUMBER, 0) and self.__provenType(left) == NUMBER: return left
+        elif tokenType == TokenType.PLUS:
+            if self.__isConstant(right, STRING, "") and self.__provenType(left) == STRING: return left
+            if self.__isConstant(left, STRING, "") and self.__provenType(right) == STRING: return right
+        return expr
+
+    def visitTernaryExpr(self, expr: Ternary) -> Expr:
+        expr.left = self.__optimizeExpr(expr.left)
+        expr.mid = self.__optimizeExpr(expr.mid)
+        expr.right = self.__optimizeExpr(expr.right)
+        if isinstance(expr.left, Literal):
+            return expr.mid if expr.left.value else expr.right
+        return expr
+
+    def visitVariableExpr(self, expr: Variable) -> Expr:
+        return expr
+
+    def visitAssignmentExpr(self, expr: Assignment) -> Expr:
+        expr.value = self.__optimizeExpr(expr.value)
+        return expr
+
+    def visitLogicalExpr(self, expr: Logical) -> Expr:
+        expr.left = self.__optimizeExpr(expr.left)
+        expr.right = self.__optimizeExpr(expr.right)
+        left, right = expr.left, expr.right
+        if isinstance(left, Literal):
+            isOr = expr.operator.tokenType == TokenType.OR
+            if bool(left.value) == isOr:
+                return self.__fold(plBool(isOr), expr)
+            elif isinstance(right, Literal):
+                return self.__fold(plBool(right.value), expr)
+            elif self.__provenType(right) == PLObjType.BOOL:
+                return right
+        return expr
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> Expr:
+        return expr
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> Stmt:
+        return stmt
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> Union[Stmt, None]:
+        stmt.expression = self.__optimizeExpr(stmt.expression)
+        if isinstance(stmt.expression, Literal):
+            return None
+        return stmt
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> Stmt:
+        stmt.expression = self.__optimizeExpr(stmt.expression)
+        return stmt
+
+    def visitVarStmt(self, stmt: VarStmt) -> Stmt:
+        if stmt.initializer != None:
+            stmt.initializer = self.__optimizeExpr(stmt.initializer)
+        return stmt
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> Stmt:
+        stmt.statements = self.optimize(stmt.statements)
+        return stmt
+
+    def visitIfStmt(self, stmt: IfStmt) -> Union[Stmt, None]:
+        stmt.condition = self.__optimizeExpr(stmt.condition)
+        if isinstance(stmt.condition, Literal):
+            branch = stmt.thenBranch if stmt.condition.value else stmt.elseBranch
+            return self.__optimizeStmt(branch) if branch != None else None
+        stmt.thenBranch = self.__optimizeStmt(stmt.thenBranch)
+        if stmt.thenBranch == None:
+            stmt.thenBranch = BlockStmt([])
+        if stmt.elseBranch != None:
+            stmt.elseBranch = self.__optimizeStmt(stmt.elseBranch)
+        return stmt
@@ -0,0 +1,38 @@
+import sys
+from typing import TextIO
+from plobject import PLObject, plText
+
+# Characters of output collected before they are written to the stream.
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# Where the print statement of an engine writes. Printed lines are collected and written
+# to the stream in chunks of about bufferSize characters, when the engine finishes a
+# program, or on flush. A stream of None stands for whatever sys.stdout is at the time of
+# writing, so that redirecting stdout around a run still captures its output. A
+# bufferSize of 0 writes every line as it is printed.
+class OutputSink():
+    def __init__(self, stream: TextIO = None, bufferSize: int = OUTPUT_BUFFER_SIZE) -> None:
+        self.stream: TextIO = stream
+        self.bufferSize: int = bufferSize
+        self.__lines: list[str] = []
+        self.__pending: int = 0
+
+    def write(self, value: PLObject) -> None:
+        text = plText(value)
+        self.__lines.append(text)
+        self.__pending += len(text) + 1
+        if self.__pending >= self.bufferSize:
+            self.drain()
+
+    # Hands the collected lines to the stream without flushing the stream itself.
+    def drain(self) -> None:
+        if self.__lines:
+            lines = self.__lines
+            self.__lines = []
+            self.__pending = 0
+            stream = self.stream if self.stream != None else sys.stdout
+            stream.write("\n".join(lines) + "\n")
+
+    def flush(self) -> None:
+        self.drain()
+        (self.stream if self.stream != None else sys.stdout).flush()
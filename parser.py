@@ -1,17 +1,96 @@
-from tokens import Token, TokenType
+from tokens import Token, TokenType, TokenStream, TokenWindow
 from errors import ErrorHandler, ErrorPos
 from expr import Expr, Binary, Ternary, Unary, Literal, Grouping, ErrorExpr, Ternary, Variable, Assignment, Logical
 from stmt import Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
-from typing import Union
-from plobject import PLObjType, PLObject
+from typing import Union, Iterator
+from enum import IntEnum
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE
 
 class ParseError(Exception):
     pass
 
+class Precedence(IntEnum):
+    COMMA = 1
+    ASSIGNMENT = 2
+    OR = 3
+    AND = 4
+    TERNARY = 5
+    EQUALITY = 6
+    COMPARISON = 7
+    TERM = 8
+    FACTOR = 9
+    UNBOUNDED = 10
+
+PRIMARY_TOKENS = (
+    TokenType.IDENTIFIER,
+    TokenType.NUMBER,
+    TokenType.STRING,
+    TokenType.FALSE,
+    TokenType.TRUE,
+    TokenType.NIL,
+    TokenType.LEFT_PAREN,
+)
+
+# Binding power, node type and the operator kind used in error messages for every
+# operator that can follow an operand.
+INFIX_RULES: dict[TokenType, tuple[Precedence, type, str]] = {
+    TokenType.COMMA: (Precedence.COMMA, Binary, "Binary"),
+    TokenType.EQUAL: (Precedence.ASSIGNMENT, Assignment, "Assignment"),
+    TokenType.OR: (Precedence.OR, Logical, "Logical"),
+    TokenType.AND: (Precedence.AND, Logical, "Logical"),
+    TokenType.QUERY: (Precedence.TERNARY, Ternary, "Ternary"),
+    TokenType.BANG_EQUAL: (Precedence.EQUALITY, Binary, "Binary"),
+    TokenType.EQUAL_EQUAL: (Precedence.EQUALITY, Binary, "Binary"),
+    TokenType.GREATER: (Precedence.COMPARISON, Binary, "Binary"),
+    TokenType.GREATER_EQUAL: (Precedence.COMPARISON, Binary, "Binary"),
+    TokenType.LESS: (Precedence.COMPARISON, Binary, "Binary"),
+    TokenType.LESS_EQUAL: (Precedence.COMPARISON, Binary, "Binary"),
+    TokenType.MINUS: (Precedence.TERM, Binary, "Binary"),
+    TokenType.PLUS: (Precedence.TERM, Binary, "Binary"),
+    TokenType.SLASH: (Precedence.FACTOR, Binary, "Binary"),
+    TokenType.STAR: (Precedence.FACTOR, Binary, "Binary"),
+}
+
+# Frames of the explicit stacks expressions and statements are parsed with. Each waits for
+# the expression or statement parsed after it was pushed:
+#   (EXPRESSION,) checks that a whole expression was found,
+#   (GROUPING, leftParen) closes a parenthesized expression,
+#   (PREFIX, operators) applies unary operators, the innermost last,
+#   [BLOCK, leftBrace, statements] collects the declarations of a block,
+#   [THEN, condition, None] and [ELSE, condition, thenBranch] take the branches of an if.
+# An operand is pushed as the precedence it is parsed at, and replaced by an OperandFrame
+# once an infix operator follows it.
+EXPRESSION = 0
+GROUPING = 1
+PREFIX = 2
+BLOCK = 3
+THEN = 4
+ELSE = 5
+
+# An operand parsed by precedence climbing: the expression so far and the infix operator,
+# if any, whose right operand is awaited. A ternary awaits its middle operand and then its
+# right one.
+class OperandFrame():
+    __slots__ = ("minPrecedence", "ceiling", "expr", "operator", "rule", "mid", "colon")
+
+    def __init__(self, minPrecedence: int) -> None:
+        self.minPrecedence: int = minPrecedence
+        self.ceiling: int = Precedence.UNBOUNDED
+        self.expr: Expr = None
+        self.operator: Token = None
+        self.rule: tuple[Precedence, type, str] = None
+        self.mid: Expr = None
+        self.colon: Token = None
+
 class Parser():
-    def __init__(self, tokens: list[Token], errorHandler: ErrorHandler) -> None:
-        self.tokens: list[Token] = tokens
+    def __init__(self, tokens: Union[list[Token], TokenStream, TokenWindow], errorHandler: ErrorHandler) -> None:
+        self.tokens: Union[list[Token], TokenStream, TokenWindow] = tokens
+        if isinstance(tokens, (TokenStream, TokenWindow)):
+            self.__tokenType = tokens.tokenType
+        else:
+            self.__tokenType = lambda index: tokens[index].tokenType
         self.__current: int = 0
+        self.__constants: dict[tuple[PLObjType, Union[str, float]], PLObject] = {}
 
         self.errorHandler = errorHandler
 
@@ -30,10 +109,12 @@ class Parser():
         return self.tokens[self.__current]
 
     def __isAtEnd(self) -> bool:
-        return self.__peek().tokenType == TokenType.EOF
+        return self.__tokenType(self.__current) == TokenType.EOF
 
+    # Before the first token there is no previous one; wrapping around to the EOF token
+    # would make positions at the start depend on the end of the source.
     def __previous(self) -> Token:
-        return self.tokens[self.__current - 1]
+        return self.tokens[max(self.__current - 1, 0)]
 
     def __advance(self) -> Token:
         if not self.__isAtEnd(): self.__current += 1
@@ -41,7 +122,7 @@ class Parser():
 
     def __check(self, tokenType: TokenType) -> bool:
         if self.__isAtEnd(): return False
-        return self.__peek().tokenType == tokenType
+        return self.__tokenType(self.__current) == tokenType
 
     def __match(self, types: list[TokenType]):
         for tokenType in types:
@@ -68,8 +149,8 @@ class Parser():
     def __synchronize(self):
         self.__advance()
         while not self.__isAtEnd():
-            if self.__previous().tokenType == TokenType.SEMICOLON: return
-            if self.__peek().tokenType in (
+            if self.__tokenType(self.__current - 1) == TokenType.SEMICOLON: return
+            if self.__tokenType(self.__current) in (
                 TokenType.CLASS,
                 TokenType.FUN,
                 TokenType.FOR,
@@ -81,139 +162,143 @@ class Parser():
             ) : return
             self.__advance()
 
-    def __primary(self) -> Expr:
-        if self.__match([TokenType.FALSE]):
-            return Literal(PLObject(PLObjType.BOOL, False), self.__posFromTokens())
-        if self.__match([TokenType.TRUE]):
-            return Literal(PLObject(PLObjType.BOOL, True), self.__posFromTokens())
-        if self.__match([TokenType.NIL]):
-            return Literal(PLObject(PLObjType.NIL, None), self.__posFromTokens())
-
-        if self.__match([TokenType.STRING]):
-            return Literal(PLObject(PLObjType.STRING, self.__previous().literal),
-            self.__posFromTokens())
-        if self.__match([TokenType.NUMBER]):
-            return Literal(PLObject(PLObjType.NUMBER, self.__previous().literal),
-            self.__posFromTokens())
-
-        if self.__match([TokenType.IDENTIFIER]):
-            return Variable(self.__previous(), self.__posFromTokens())
-
-        if self.__match([TokenType.LEFT_PAREN]):
-            openingBracket = self.__previous()
-            expr = self.__expression()
-            if self.__consume(TokenType.RIGHT_PAREN) == None:
-                self.__error(openingBracket.pos, "Expected closing bracket")
-            return Grouping(expr, self.__posFromTokens(openingBracket, self.__previous()))
-
-        return ErrorExpr(self.__posFromTokens())
-
-    def __unary(self) -> Expr:
-        if self.__match([TokenType.BANG, TokenType.MINUS]):
-            operator = self.__previous()
-            right = self.__unary()
-            if self.__checkErrorExpr(right, operator, f"Unary operator {operator.lexeme} expected operand"):
-                return ErrorExpr(self.__posFromTokens())
-            return Unary(operator, right, self.__posTokenToExpr(operator, right))
-        return self.__primary()
-
-    def __factor(self) -> Expr:
-        expr = self.__unary()
-        while self.__match([TokenType.SLASH, TokenType.STAR]):
-            operator = self.__previous()
-            right = self.__unary()
-            self.__checkErrorExpr(expr, operator, f"Binary operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Binary operator {operator.lexeme} expected right operand")
-            expr = Binary(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __term(self) -> Expr:
-        expr = self.__factor()
-        while self.__match([TokenType.MINUS, TokenType.PLUS]):
-            operator = self.__previous()
-            right = self.__factor()
-            self.__checkErrorExpr(expr, operator, f"Binary operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Binary operator {operator.lexeme} expected right operand")
-            expr = Binary(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __comparison(self) -> Expr:
-        expr = self.__term()
-        while self.__match([TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL]):
-            operator = self.__previous()
-            right = self.__term()
-            self.__checkErrorExpr(expr, operator, f"Binary operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Binary operator {operator.lexeme} expected right operand")
-            expr = Binary(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __equality(self) -> Expr:
-        expr = self.__comparison()
-        while self.__match([TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL]):
-            operator = self.__previous()
-            right = self.__comparison()
-            self.__checkErrorExpr(expr, operator, f"Binary operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Binary operator {operator.lexeme} expected right operand")
-            expr = Binary(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __ternary(self) -> Expr:
-        expr = self.__equality()
-        if self.__match([TokenType.QUERY]):
-            leftOp = self.__previous()
-            midExpr = self.__equality()
-            rightOp = self.__consume(TokenType.COLON)
-            right = self.__equality()
-            if not rightOp:
-                self.__error(leftOp.pos, "Ternary operator expected colon")
-                rightOp = Token(TokenType.ERROR, "ERROR", "", leftOp.line, leftOp.char)
-            self.__checkErrorExpr(expr, leftOp, f"Ternary operator {leftOp.lexeme} expected condition")
-            self.__checkErrorExpr(midExpr, rightOp, f"Ternary operator {rightOp.lexeme} expected left operand")
-            self.__checkErrorExpr(right, rightOp, f"Ternary operator {rightOp.lexeme} expected right operand")
-            expr = Ternary(expr, leftOp, midExpr, rightOp, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __and(self) -> Expr:
-        expr = self.__ternary()
-        while self.__match([TokenType.AND]):
-            operator = self.__previous()
-            right = self.__ternary()
-            self.__checkErrorExpr(expr, operator, f"Logical operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Logical operator {operator.lexeme} expected right operand")
-            expr = Logical(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __or(self) -> Expr:
-        expr = self.__and()
-        while self.__match([TokenType.OR]):
-            operator = self.__previous()
-            right = self.__and()
-            self.__checkErrorExpr(expr, operator, f"Logical operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Logical operator {operator.lexeme} expected right operand")
-            expr = Logical(expr, operator, right, self.__posFromExprs(expr, right))
-        return expr
-
-    def __assignment(self) -> Expr:
-        expr = self.__or()
-        if self.__match([TokenType.EQUAL]):
-            value = self.__or()
-            if isinstance(expr, Variable):
-                name = expr.name
-                return Assignment(name, value, self.__posFromExprs(expr, value))
-            else:
-                self.__error(self.__posFromExprs(expr, value), f"Invalid assignment target")
-        return expr
-
+    def __constant(self, objType: PLObjType, value: Union[str, float]) -> PLObject:
+        key = (objType, value)
+        if key not in self.__constants:
+            self.__constants[key] = PLObject(objType, value)
+        return self.__constants[key]
+
+    # Parses a primary other than a parenthesized expression, given the type of the current
+    # token, or returns an ErrorExpr without consuming anything if there is none.
+    def __primary(self, tokenType: TokenType) -> Expr:
+        if tokenType in PRIMARY_TOKENS and tokenType != TokenType.LEFT_PAREN:
+            token = self.__advance()
+        else:
+            return ErrorExpr(self.__posFromTokens())
+
+        if tokenType == TokenType.IDENTIFIER:
+            return Variable(token, self.__posFromTokens())
+        elif tokenType == TokenType.NUMBER:
+            return Literal(self.__constant(PLObjType.NUMBER, token.literal), self.__posFromTokens())
+        elif tokenType == TokenType.STRING:
+            return Literal(self.__constant(PLObjType.STRING, token.literal), self.__posFromTokens())
+        elif tokenType == TokenType.FALSE:
+            return Literal(FALSE, self.__posFromTokens())
+        elif tokenType == TokenType.TRUE:
+            return Literal(TRUE, self.__posFromTokens())
+        return Literal(NIL, self.__posFromTokens())
+
+    # Precedence climbing over INFIX_RULES. Each operator's right operand is parsed at the
+    # next higher precedence, so left-associative operators loop in their frame. Assignment
+    # and the ternary operator do not chain: once one is built, only operators of strictly
+    # lower precedence may follow it.
+    #
+    # Operands nested in parentheses, behind unary operators or to the right of an operator
+    # are parsed with an explicit stack of frames rather than by recursing, so their depth
+    # is not limited by Python's recursion limit. Each frame checks what it waited for in
+    # the order the recursive descent would have, so errors are the same.
     def __expression(self) -> Expr:
-        expr = self.__assignment()
-        while self.__match([TokenType.COMMA]):
-            operator = self.__previous()
-            right = self.__assignment()
-            self.__checkErrorExpr(expr, operator, f"Binary operator {operator.lexeme} expected left operand")
-            self.__checkErrorExpr(right, operator, f"Binary operator {operator.lexeme} expected right operand")
-            expr = Binary(expr, operator, right, self.__posFromExprs(expr, right))
-        self.__checkErrorExpr(expr, Token(TokenType.ERROR, "", "", 0, 0), "Expected expression")
-        return expr
+        tokenType = self.__tokenType
+        primary = self.__primary
+        operand = self.__operand
+        frames: list = [(EXPRESSION,)]
+        push = frames.append
+        minPrecedence = Precedence.COMMA
+        while True:
+            push(minPrecedence)
+            current = tokenType(self.__current)
+            if current == TokenType.BANG or current == TokenType.MINUS:
+                operators = []
+                while current == TokenType.BANG or current == TokenType.MINUS:
+                    operators.append(self.__advance())
+                    current = tokenType(self.__current)
+                push((PREFIX, operators))
+            if current == TokenType.LEFT_PAREN:
+                push((GROUPING, self.__advance()))
+                push((EXPRESSION,))
+                minPrecedence = Precedence.COMMA
+                continue
+            expr = primary(current)
+
+            # Hands expr to the frames waiting for it until one needs another operand.
+            while True:
+                frame = frames[-1]
+                frameType = type(frame)
+                if frameType is OperandFrame:
+                    nextPrecedence = operand(frame, expr)
+                    if nextPrecedence != None:
+                        minPrecedence = nextPrecedence
+                        break
+                    expr = frame.expr
+                elif frameType is not tuple:
+                    rule = INFIX_RULES.get(tokenType(self.__current))
+                    if rule != None and rule[0] >= frame:
+                        frame = frames[-1] = OperandFrame(frame)
+                        minPrecedence = operand(frame, expr)
+                        break
+                elif frame[0] == EXPRESSION:
+                    if isinstance(expr, ErrorExpr):
+                        self.__error(Token(TokenType.ERROR, "", "", 0, 0).pos, "Expected expression")
+                    if len(frames) == 1:
+                        return expr
+                elif frame[0] == GROUPING:
+                    leftParen = frame[1]
+                    if self.__consume(TokenType.RIGHT_PAREN) == None:
+                        self.__error(leftParen.pos, "Expected closing bracket")
+                    expr = Grouping(expr, self.__posFromTokens(leftParen, self.__previous()))
+                else:
+                    for operator in reversed(frame[1]):
+                        self.__checkErrorExpr(expr, operator, f"Unary operator {operator.lexeme} expected operand")
+                        expr = Unary(operator, expr, self.__posTokenToExpr(operator, expr))
+                frames.pop()
+
+    # Gives an OperandFrame the operand it waited for and takes the next infix operator its
+    # precedence allows. Returns the precedence the operand after that operator is parsed
+    # at, or None once the frame's expression is complete.
+    def __operand(self, frame: OperandFrame, expr: Expr) -> Union[int, None]:
+        operator = frame.operator
+        if operator == None:
+            frame.expr = expr
+        else:
+            precedence, nodeType, kind = frame.rule
+            if nodeType is Ternary:
+                if frame.mid == None:
+                    frame.mid = expr
+                    frame.colon = self.__consume(TokenType.COLON)
+                    return Precedence.EQUALITY
+                condition, midExpr, colon = frame.expr, frame.mid, frame.colon
+                if not colon:
+                    self.__error(operator.pos, "Ternary operator expected colon")
+                self.__checkErrorExpr(condition, operator, f"Ternary operator {operator.lexeme} expected condition")
+                self.__checkErrorExpr(midExpr, colon, f"Ternary operator {colon.lexeme} expected left operand")
+                self.__checkErrorExpr(expr, colon, f"Ternary operator {colon.lexeme} expected right operand")
+                frame.expr = Ternary(condition, operator, midExpr, colon, expr, self.__posFromExprs(condition, expr))
+                frame.mid = None
+                frame.ceiling = precedence
+            elif nodeType is Assignment:
+                target = frame.expr
+                if not isinstance(target, Variable):
+                    self.__error(self.__posFromExprs(target, expr), f"Invalid assignment target")
+                frame.expr = Assignment(target.name, expr, self.__posFromExprs(target, expr))
+                frame.ceiling = precedence
+            else:
+                left = frame.expr
+                self.__checkErrorExpr(left, operator, f"{kind} operator {operator.lexeme} expected left operand")
+                self.__checkErrorExpr(expr, operator, f"{kind} operator {operator.lexeme} expected right operand")
+                frame.expr = nodeType(left, operator, expr, self.__posFromExprs(left, expr))
+                frame.ceiling = precedence + 1
+
+        rule = INFIX_RULES.get(self.__tokenType(self.__current))
+        if rule == None: return None
+        precedence, nodeType, kind = rule
+        if precedence < frame.minPrecedence or precedence >= frame.ceiling: return None
+        frame.operator = self.__advance()
+        frame.rule = rule
+        if nodeType is Ternary:
+            return Precedence.EQUALITY
+        elif nodeType is Assignment:
+            return Precedence.OR
+        return precedence + 1
 
     def __printStatement(self) -> Stmt:
         printKwd = self.__previous()
@@ -222,16 +307,6 @@ class Parser():
                 self.__error(self.__posTokenToExpr(printKwd, value), "Expected semicolon")
         return PrintStmt(value)
 
-    def __blockStatement(self) -> Stmt:
-        leftParen = self.__previous()
-        statements: list[Stms] = []
-        while not self.__check(TokenType.RIGHT_BRACE) and not self.__isAtEnd():
-            statements.append(self.__declaration())
-        if self.__consume(TokenType.RIGHT_BRACE) == None:
-            #TODO: Add position to statements
-            self.__error(self.__posTokenToExpr(leftParen, leftParen), "Expected closing brace")
-        return BlockStmt(statements)
-
     def __expressionStatement(self) -> Stmt:
         expr: Expr = self.__expression()
         if self.__consume(TokenType.SEMICOLON) == None:
@@ -250,27 +325,76 @@ class Parser():
                 self.__error(self.__posTokenToExpr(varKwd, initializer if initializer != None else name), "Expected semicolon")
         return VarStmt(name, initializer)
 
-    def __ifStatement(self) -> Stmt:
+    # Parses the condition of an if-statement after its keyword.
+    def __ifCondition(self) -> Expr:
         ifKwd = self.__previous()
         if self.__consume(TokenType.LEFT_PAREN) == None:
             self.__error(self.__posFromTokens(ifKwd, ifKwd), "Expected '(' after 'if'")
         condition = self.__expression()
         if self.__consume(TokenType.RIGHT_PAREN) == None:
             self.__error(self.__posFromTokens(ifKwd, ifKwd), "Expected ')' after if-condition")
-        thenBranch = self.__statement()
-        elseBranch = None
-        if self.__match([TokenType.ELSE]):
-            elseBranch = self.__statement()
-        return IfStmt(condition, thenBranch, elseBranch)
-        
+        return condition
+
+    # Blocks and if-statements nested in each other are parsed with an explicit stack of
+    # open ones rather than by recursing, so their depth is not limited by Python's
+    # recursion limit. Every statement of a block is a declaration, which on a parse error
+    # is synchronized and replaced by an ErrorStmt, as __declaration does; an error outside
+    # every open block is left to the caller's __declaration.
     def __statement(self) -> Stmt:
-        if self.__match([TokenType.PRINT]):
-            return self.__printStatement()
-        elif self.__match([TokenType.LEFT_BRACE]):
-            return self.__blockStatement()
-        elif self.__match([TokenType.IF]):
-            return self.__ifStatement()
-        return self.__expressionStatement()
+        frames: list[list] = []
+        statement = None
+        while True:
+            try:
+                if statement == None:
+                    if frames and frames[-1][0] == BLOCK and self.__match([TokenType.VAR]):
+                        statement = self.__variableStatement()
+                    elif self.__match([TokenType.PRINT]):
+                        statement = self.__printStatement()
+                    elif self.__match([TokenType.LEFT_BRACE]):
+                        frames.append([BLOCK, self.__previous(), []])
+                    elif self.__match([TokenType.IF]):
+                        frames.append([THEN, self.__ifCondition(), None])
+                    else:
+                        statement = self.__expressionStatement()
+
+                # Hands the statement to the frames waiting for it and closes the blocks
+                # that end here, until a frame needs another statement.
+                while True:
+                    if statement != None:
+                        if not frames:
+                            return statement
+                        frame = frames[-1]
+                        if frame[0] == BLOCK:
+                            frame[2].append(statement)
+                        elif frame[0] == THEN and self.__match([TokenType.ELSE]):
+                            frame[0] = ELSE
+                            frame[2] = statement
+                        elif frame[0] == THEN:
+                            frames.pop()
+                            statement = IfStmt(frame[1], statement, None)
+                            continue
+                        else:
+                            frames.pop()
+                            statement = IfStmt(frame[1], frame[2], statement)
+                            continue
+                        statement = None
+
+                    frame = frames[-1]
+                    if frame[0] != BLOCK or (not self.__check(TokenType.RIGHT_BRACE) and not self.__isAtEnd()):
+                        break
+                    frames.pop()
+                    if self.__consume(TokenType.RIGHT_BRACE) == None:
+                        #TODO: Add position to statements
+                        leftBrace = frame[1]
+                        self.__error(self.__posTokenToExpr(leftBrace, leftBrace), "Expected closing brace")
+                    statement = BlockStmt(frame[2])
+            except ParseError:
+                while frames and frames[-1][0] != BLOCK:
+                    frames.pop()
+                if not frames:
+                    raise
+                self.__synchronize()
+                statement = ErrorStmt()
 
     def __declaration(self) -> Stmt:
         try:
@@ -282,7 +406,16 @@ class Parser():
             return ErrorStmt()
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[Stmt]:
+        while not self.__isAtEnd():
+            yield self.__declaration()
+
+    # Like declarations, but starts at the token at index start and also yields the index
+    # of the token that follows each declaration.
+    def declarationEnds(self, start: int = 0) -> Iterator[tuple[Stmt, int]]:
+        self.__current = start
         while not self.__isAtEnd():
-            statements.append(self.__declaration())
-        return statements
\ No newline at end of file
+            declaration = self.__declaration()
+            yield declaration, self.__current
\ No newline at end of file
@@ -1,6 +1,5 @@
 from __future__ import annotations
 from enum import Enum
-from pickle import NONE
 from errors import PyLoxRuntimeError
 
 class PLObjType(Enum):
@@ -15,6 +14,8 @@ class PLObjType(Enum):
         return self.name
 
 class PLObject():
+    __slots__ = ("objType", "value")
+
     def __init__(self, objType: PLObjType, value) -> None:
         self.objType: PLObjType = objType
         self.value = value
@@ -23,9 +24,7 @@ class PLObject():
         if self.objType == PLObjType.NIL:
             return "nil"
         elif self.objType == PLObjType.NUMBER:
-            txt = str(self.value)
-            if txt.endswith(".0"):
-                return txt[:-2]
+            return numberText(self.value)
         elif self.objType == PLObjType.BOOL:
             return "true" if self.value else "false"
         return str(self.value)
@@ -33,9 +32,13 @@ class PLObject():
     def __repr__(self) -> str:
         return f"{self.objType}: {str(self)}"
 
+    # Unpickled values go through plObject so that shared constants stay shared.
+    def __reduce__(self):
+        return (plObject, (self.objType, self.value))
+
     def __neg__(self) -> PLObject:
         if self.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.NUMBER, -self.value)
+            return plNumber(-self.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad type for negation: '{self.objType}'")
 
@@ -44,7 +47,7 @@ class PLObject():
 
     def __add__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.NUMBER, self.value + other.value)
+            return plNumber(self.value + other.value)
         elif self.objType == PLObjType.STRING and other.objType == PLObjType.STRING:
             return PLObject(PLObjType.STRING, self.value + other.value)
         else:
@@ -52,13 +55,13 @@ class PLObject():
 
     def __sub__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.NUMBER, self.value - other.value)
+            return plNumber(self.value - other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for subtraction: '{self.objType}' and '{other.objType}'")
     
     def __mul__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.NUMBER, self.value * other.value)
+            return plNumber(self.value * other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for multiplication: '{self.objType}' and '{other.objType}'")
 
@@ -67,42 +70,109 @@ class PLObject():
             if other.value == 0:
                 raise PyLoxRuntimeError(None, "Division by zero")
             else:
-                return PLObject(PLObjType.NUMBER, self.value / other.value)
+                return plNumber(self.value / other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for division: '{self.objType}' and '{other.objType}'")
 
     def __lt__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.BOOL, self.value < other.value)
+            return plBool(self.value < other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for less-than comparison: '{self.objType}' and '{other.objType}'")
 
     def __le__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.BOOL, self.value <= other.value)
+            return plBool(self.value <= other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for less-equals comparison: '{self.objType}' and '{other.objType}'")
 
     def __gt__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.BOOL, self.value > other.value)
+            return plBool(self.value > other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for greater-than comparison: '{self.objType}' and '{other.objType}'")
 
     def __ge__(self, other: PLObject) -> PLObject:
         if self.objType == PLObjType.NUMBER and other.objType == PLObjType.NUMBER:
-            return PLObject(PLObjType.BOOL, self.value >= other.value)
+            return plBool(self.value >= other.value)
         else:
             raise PyLoxRuntimeError(None, f"Bad types for greater-equals comparison: '{self.objType}' and '{other.objType}'")
 
     def __eq__(self, other: PLObject) -> PLObject:
         if self.objType == other.objType:
-            return PLObject(PLObjType.BOOL, self.value == other.value)
+            return plBool(self.value == other.value)
         else:
-            return PLObject(PLObjType.BOOL, False)
+            return FALSE
 
     def __ne__(self, other: PLObject) -> PLObject:
         if self.objType == other.objType:
-            return PLObject(PLObjType.BOOL, self.value != other.value)
+            return plBool(self.value != other.value)
         else:
-            return PLObject(PLObjType.BOOL, True)
\ No newline at end of file
+            return TRUE
+
+NIL: PLObject = PLObject(PLObjType.NIL, None)
+TRUE: PLObject = PLObject(PLObjType.BOOL, True)
+FALSE: PLObject = PLObject(PLObjType.BOOL, False)
+
+# Zero is left out so that -0 and 0 keep distinct objects.
+SMALL_NUMBERS: dict[float, PLObject] = {
+    float(n): PLObject(PLObjType.NUMBER, float(n)) for n in range(-128, 1025) if n != 0
+}
+
+# Printed forms of the small whole numbers, which are the most common numbers by far.
+SMALL_NUMBER_TEXT: dict[float, str] = {float(n): str(n) for n in range(-128, 1025) if n != 0}
+
+# Formats a number as Lox prints it: whole numbers without the ".0" Python adds.
+def numberText(value: float) -> str:
+    text = SMALL_NUMBER_TEXT.get(value)
+    if text is None:
+        text = repr(value)
+        if text[-2:] == ".0":
+            return text[:-2]
+    return text
+
+# Formats a value as Lox prints it; a faster equivalent of str for the print statement.
+def plText(obj: PLObject) -> str:
+    objType = obj.objType
+    if objType is PLObjType.STRING:
+        return obj.value
+    elif objType is PLObjType.NUMBER:
+        return numberText(obj.value)
+    elif objType is PLObjType.BOOL:
+        return "true" if obj.value else "false"
+    elif objType is PLObjType.NIL:
+        return "nil"
+    return str(obj.value)
+
+def plBool(value: bool) -> PLObject:
+    return TRUE if value else FALSE
+
+def plNumber(value: float) -> PLObject:
+    obj = SMALL_NUMBERS.get(value)
+    if obj is None:
+        return PLObject(PLObjType.NUMBER, value)
+    return obj
+
+def plObject(objType: PLObjType, value) -> PLObject:
+    if objType == PLObjType.NIL:
+        return NIL
+    elif objType == PLObjType.BOOL:
+        return plBool(value)
+    elif objType == PLObjType.NUMBER:
+        return plNumber(value)
+    return PLObject(objType, value)
+
+# The Lox value of a Python value: None, a bool, a number or a str. PLObjects are
+# returned as they are.
+def plValue(value) -> PLObject:
+    if isinstance(value, PLObject):
+        return value
+    elif value is None:
+        return NIL
+    elif isinstance(value, bool):
+        return plBool(value)
+    elif isinstance(value, (int, float)):
+        return plNumber(float(value))
+    elif isinstance(value, str):
+        return PLObject(PLObjType.STRING, value)
+    raise TypeError(f"No Lox value for a Python '{type(value).__name__}'")
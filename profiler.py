@@ -0,0 +1,133 @@
+import sys
+import time
+from typing import TextIO
+from expr import Expr
+from stmt import Stmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from errors import ErrorPos, ErrorHandler
+from interpreter import Interpreter
+
+# Number of nodes and lines listed in a hotspot report.
+REPORT_LIMIT = 20
+
+clock = time.perf_counter
+
+# Statements carry no position of their own, so they are placed where the expression or
+# name they start with is.
+def stmtPos(stmt: Stmt) -> ErrorPos:
+    if isinstance(stmt, (ExprStmt, PrintStmt)):
+        return stmt.expression.pos
+    elif isinstance(stmt, VarStmt):
+        return stmt.name.pos
+    elif isinstance(stmt, IfStmt):
+        return stmt.condition.pos
+    elif isinstance(stmt, BlockStmt) and stmt.statements:
+        return stmtPos(stmt.statements[0])
+    return ErrorPos(0, 0, 0, 0)
+
+def nodePos(node) -> ErrorPos:
+    return node.pos if isinstance(node, Expr) else stmtPos(node)
+
+class NodeStats():
+    def __init__(self, node, pos: ErrorPos) -> None:
+        self.node = node
+        self.pos: ErrorPos = pos
+        self.kind: str = type(node).__name__
+        self.count: int = 0
+        # Seconds spent in the node including its children, and excluding them.
+        self.total: float = 0.0
+        self.own: float = 0.0
+        # Name of the node in reports and stack frames.
+        self.label: str = f"{self.kind} {pos.lS}:{pos.cS}"
+
+# Collects execution counts and times per syntax tree node while a ProfilingInterpreter
+# runs. Every node entered is pushed on a stack of frames, so that the time of a node can
+# be split into the time of its children and its own, and so that the own time can be
+# charged to the whole stack of nodes above it for collapsed-stack output.
+class Profiler():
+    def __init__(self) -> None:
+        self.nodes: dict[int, NodeStats] = {}
+        self.stacks: dict[tuple[str, ...], float] = {}
+        # Frames are [stats, seconds spent in children].
+        self.__frames: list[list] = []
+        self.__labels: list[str] = []
+
+    def enter(self, node) -> None:
+        stats = self.nodes.get(id(node))
+        if stats == None:
+            stats = self.nodes[id(node)] = NodeStats(node, nodePos(node))
+        stats.count += 1
+        self.__frames.append([stats, 0.0])
+        self.__labels.append(stats.label)
+
+    def exit(self, elapsed: float) -> None:
+        stats, children = self.__frames.pop()
+        own = elapsed - children
+        stack = tuple(self.__labels)
+        self.__labels.pop()
+        stats.total += elapsed
+        stats.own += own
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + own
+        if self.__frames:
+            self.__frames[-1][1] += elapsed
+
+    # Returns (line, executions, own seconds) for every line a node was executed on,
+    # the slowest first. Own times are summed, so nested nodes are not counted twice.
+    def lines(self) -> list[tuple[int, int, float]]:
+        perLine: dict[int, list] = {}
+        for stats in self.nodes.values():
+            entry = perLine.setdefault(stats.pos.lS, [0, 0.0])
+            entry[0] += stats.count
+            entry[1] += stats.own
+        return sorted(((line, count, own) for line, (count, own) in perLine.items()), key=lambda entry: -entry[2])
+
+    def hotspots(self) -> list[NodeStats]:
+        return sorted(self.nodes.values(), key=lambda stats: -stats.own)
+
+    def report(self, source: str = None, limit: int = REPORT_LIMIT, out: TextIO = None) -> None:
+        out = out if out != None else sys.stderr
+        sourceLines = source.split("\n") if source != None else []
+        elapsed = sum(stats.own for stats in self.nodes.values())
+        print(f"--- profile: {sum(stats.count for stats in self.nodes.values())} node executions, {elapsed * 1000:.1f} ms", file=out)
+
+        print(f"\n{'node':<28} {'count':>9} {'own ms':>10} {'total ms':>10} {'own %':>7}", file=out)
+        for stats in self.hotspots()[:limit]:
+            share = stats.own / elapsed * 100 if elapsed else 0.0
+            print(f"{stats.label:<28} {stats.count:>9} {stats.own * 1000:>10.3f} {stats.total * 1000:>10.3f} {share:>6.1f}%", file=out)
+
+        print(f"\n{'line':>6} {'count':>9} {'own ms':>10} {'own %':>7}  source", file=out)
+        for line, count, own in self.lines()[:limit]:
+            share = own / elapsed * 100 if elapsed else 0.0
+            text = sourceLines[line - 1].strip() if 0 < line <= len(sourceLines) else ""
+            print(f"{line:>6} {count:>9} {own * 1000:>10.3f} {share:>6.1f}%  {text}", file=out)
+
+    # Writes one "frame;frame;frame microseconds" line per distinct stack, the collapsed
+    # format read by flamegraph.pl, speedscope and inferno.
+    def writeCollapsed(self, out: TextIO) -> None:
+        for stack, seconds in self.stacks.items():
+            micros = round(seconds * 1_000_000)
+            if micros > 0:
+                out.write(f"{';'.join(stack)} {micros}\n")
+
+# The tree-walking interpreter with every visit method timed. Nodes dispatch through
+# accept, which calls back into these overrides for children as well, so the plain
+# Interpreter is untouched and pays nothing when profiling is off.
+class ProfilingInterpreter(Interpreter):
+    def __init__(self, errorHandler: ErrorHandler, profiler: Profiler = None) -> None:
+        super().__init__(errorHandler)
+        self.profiler: Profiler = profiler if profiler != None else Profiler()
+
+def profiledVisit(visit):
+    def visitNode(self, node):
+        profiler = self.profiler
+        profiler.enter(node)
+        start = clock()
+        try:
+            return visit(self, node)
+        finally:
+            profiler.exit(clock() - start)
+    visitNode.__name__ = visit.__name__
+    return visitNode
+
+for name in dir(Interpreter):
+    if name.startswith("visit"):
+        setattr(ProfilingInterpreter, name, profiledVisit(getattr(Interpreter, name)))
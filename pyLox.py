@@ -1,58 +1,248 @@
-import sys
+import os
+import time
+import argparse
 from expr import Expr, Binary, Unary, Literal, Grouping, AstPrinter
-from tokens import Token, TokenType
+from tokens import Token, TokenType, TokenWindow
 from scanner import Scanner
 from parser import Parser
 from analyzer import Analyzer
+from optimizer import Optimizer
+from specializer import Specializer
+from resolver import Resolver
 from interpreter import Interpreter
-from errors import ErrorHandler
+from stmt import Stmt
+from errors import ErrorHandler, PyLoxRuntimeError, MAX_ERRORS
+from diagnostics import FORMATS
+from cache import ProgramCache
+from engine import ENGINES, SCANNERS, compileProgram
+from incremental import IncrementalFrontEnd, shiftedPosition
+from profiler import Profiler, ProfilingInterpreter
+from stats import RunStats, phase
 
-def run(source: str, analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler) -> None:
-    scanner = Scanner(source, errorHandler)
-    tokens = scanner.scanTokens()
+# Number of top-level declarations handed to the engine at once in streaming mode.
+STREAM_BATCH = 64
+
+# Seconds between checks of a watched script for changes.
+WATCH_INTERVAL = 0.1
+
+# When stats is given, the phases of the run are measured into it. A program loaded from
+# the cache has no front-end phases but a "load" phase instead.
+def run(source: str, analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler, optimize: bool = True, compactTokens: bool = False, scannerClass: type = Scanner, cache: ProgramCache = None, stats: RunStats = None) -> None:
+    if stats != None:
+        stats.start()
+    try:
+        program = None
+        if cache != None:
+            with phase(stats, "load"):
+                program = cache.load(source, optimize)
+            if stats != None:
+                stats.cached = program != None
+        if program == None:
+            program = compileProgram(source, analyzer, errorHandler, optimize, compactTokens, scannerClass, stats)
+            if program == None:
+                errorHandler.reportErrors(source)
+                return
+            if cache != None:
+                cache.store(source, optimize, program)
+        with phase(stats, "interpret"):
+            interpreter.interpret(program)
+        if stats != None and isinstance(interpreter, Interpreter):
+            stats.countCache(interpreter.cacheInfo())
+    finally:
+        if stats != None:
+            stats.stop()
     errorHandler.reportErrors(source)
 
-    parser = Parser(tokens, errorHandler)
-    program = parser.parse()
-    if errorHandler.reportErrors(source):
-        return
-    
-    analyzer.typeCheckProgram(program)
-    if errorHandler.reportErrors(source):
-        return
+# Scans, parses, checks and executes one top-level declaration at a time so that the
+# tokens and syntax trees of a huge script are never all in memory at once. Unlike run,
+# declarations before the first error have already been executed when it is reported.
+def runStream(source: str, analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler, optimize: bool = True, scannerClass: type = Scanner) -> None:
+    parser = Parser(TokenWindow(scannerClass(source, errorHandler).iterTokens()), errorHandler)
+    specializer = Specializer()
+    resolver = Resolver()
+    batch: list[Stmt] = []
+    for declaration in parser.declarations():
+        if not errorHandler.hadError:
+            analyzer.typeCheckProgram([declaration])
+        if errorHandler.hadError:
+            break
+
+        program = [declaration]
+        if optimize:
+            program = Optimizer().optimize(program)
+            specializer.specialize(program)
+        resolver.resolve(program)
+        batch.extend(program)
+        if len(batch) >= STREAM_BATCH:
+            interpreter.interpret(batch)
+            batch = []
+            if errorHandler.hadRuntimeError:
+                break
 
-    interpreter.interpret(program)
+    if batch and not errorHandler.hadRuntimeError:
+        # The batch still runs after a compile error in a later declaration. Its runtime
+        # errors come first in the source, so the compile errors are set aside until it
+        # has run.
+        suppressed = errorHandler.suppressed
+        compileErrors = errorHandler.takeErrors()
+        interpreter.interpret(batch)
+        for pos, message in compileErrors:
+            errorHandler.error(pos, message)
+        errorHandler.suppressed += suppressed
     errorHandler.reportErrors(source)
 
-def runFile(file: str, analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler) -> None:
+# Exit status of a script run: 65 for compile errors, 70 for runtime errors.
+def exitStatus(errorHandler: ErrorHandler) -> int:
+    if errorHandler.hadError:
+        return 65
+    elif errorHandler.hadRuntimeError:
+        return 70
+    return 0
+
+def runFile(file: str, analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler, optimize: bool = True, compactTokens: bool = False, scannerClass: type = Scanner, stream: bool = False, useCache: bool = True, profiler: Profiler = None, collapsedFile: str = None, stats: RunStats = None, statsFile: str = None) -> None:
     with open(file, "r") as f:
         source = f.read()
-        if run(source, analyzer, interpreter, errorHandler):
-            if errorHandler.hadError:
-                exit(65)
-            elif ErrorHandler.hadRuntimeError:
-                exit(70)
+    if stream:
+        runStream(source, analyzer, interpreter, errorHandler, optimize, scannerClass)
+    else:
+        run(source, analyzer, interpreter, errorHandler, optimize, compactTokens, scannerClass, ProgramCache(file) if useCache else None, stats)
+    if stats != None:
+        if statsFile != None:
+            with open(statsFile, "w") as f:
+                stats.write(f)
+        else:
+            stats.write()
+    if profiler != None:
+        profiler.report(source)
+        if collapsedFile != None:
+            with open(collapsedFile, "w") as f:
+                profiler.writeCollapsed(f)
+    status = exitStatus(errorHandler)
+    if status != 0:
+        exit(status)
 
-def runRepl(analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler) -> None:
+# Runs the program of a front end that checked without errors. Declarations are run in
+# the segments the front end keeps them in, so that only the position of a runtime error
+# is brought up to date rather than every position behind the last edit.
+def runChecked(frontEnd: IncrementalFrontEnd, interpreterClass: type, errorHandler: ErrorHandler) -> None:
+    runtimeErrors = ErrorHandler()
+    interpreter = interpreterClass(runtimeErrors)
+    resolver = Resolver()
+    for statements, shift in frontEnd.segments():
+        resolver.resolve(statements)
+        interpreter.interpret(statements)
+        if runtimeErrors.hadRuntimeError:
+            for pos, message in runtimeErrors.errors():
+                errorHandler.runtimeError(PyLoxRuntimeError(shiftedPosition(pos, shift), message))
+            break
+
+# Re-checks a script whenever it is saved and runs it if it is free of errors. Only the
+# declarations around each edit are parsed and type checked again. Programs are run
+# unoptimized, because the optimizer would rewrite the trees that are kept for the next
+# check.
+def runWatch(file: str, interpreterClass: type, iterative: bool = False, maxErrors: int = MAX_ERRORS, errorFormat: str = "text") -> None:
+    frontEnd = IncrementalFrontEnd(iterative)
+    modified = None
+    print(f"Watching {file}, press Ctrl+C to stop")
+    try:
+        while True:
+            try:
+                current = os.stat(file).st_mtime_ns
+                if current == modified:
+                    time.sleep(WATCH_INTERVAL)
+                    continue
+                with open(file, "r") as f:
+                    source = f.read()
+            except OSError as e:
+                print(f"Error: {e.strerror}")
+                time.sleep(WATCH_INTERVAL)
+                continue
+            modified = current
+
+            start = time.perf_counter()
+            ok = frontEnd.update(source)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"--- checked in {elapsed:.1f} ms ({frontEnd.reparsed} declarations parsed, {frontEnd.reanalyzed} type checked)")
+            errorHandler = ErrorHandler(maxErrors, errorFormat)
+            if not ok:
+                for pos, message in frontEnd.errors():
+                    errorHandler.error(pos, message)
+            else:
+                runChecked(frontEnd, interpreterClass, errorHandler)
+            errorHandler.reportErrors(source)
+    except KeyboardInterrupt:
+        pass
+
+def runRepl(analyzer: Analyzer, interpreter: Interpreter, errorHandler: ErrorHandler, optimize: bool = True, compactTokens: bool = False, scannerClass: type = Scanner) -> None:
     print("PyLox REPL:")
     while True:
         errorHandler.hadError = False
         errorHandler.hadRuntimeError = False
         line = input("> ")
         if line == "" or line == "exit": break
-        run(line, analyzer, interpreter, errorHandler)
+        run(line, analyzer, interpreter, errorHandler, optimize, compactTokens, scannerClass)
+
+# Argument type of --max-errors: a count of errors, of which 0 stands for no limit.
+def errorLimit(text: str) -> int:
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {value}")
+    return value
 
 def pyLox():
-    errorHandler = ErrorHandler()
-    analyzer = Analyzer(errorHandler)
-    interpreter = Interpreter(errorHandler)
-    if len(sys.argv) > 2:
-        print("Usage: python pyLox.py [script]")
-        exit(1)
-    elif len(sys.argv) == 2:
-        runFile(sys.argv[1], analyzer, interpreter, errorHandler)
+    argParser = argparse.ArgumentParser(prog="pyLox.py")
+    argParser.add_argument("script", nargs="?")
+    argParser.add_argument("--engine", choices=ENGINES.keys(), default="tree",
+        help="execution engine: the AST tree-walker, the explicit-stack AST walker, the bytecode VM, the closure compiler or the Python transpiler")
+    argParser.add_argument("--no-optimize", dest="optimize", action="store_false",
+        help="disable constant folding, algebraic simplification and type specialization")
+    argParser.add_argument("--compact-tokens", dest="compactTokens", action="store_true",
+        help="store scanned tokens in compact arrays instead of one object per token")
+    argParser.add_argument("--scanner", choices=SCANNERS.keys(), default="classic",
+        help="scanner implementation: the character-by-character scanner or the regex-based fast scanner")
+    argParser.add_argument("--stream", action="store_true",
+        help="execute a script one top-level declaration at a time as it is parsed")
+    argParser.add_argument("--no-cache", dest="cache", action="store_false",
+        help="neither read nor write the per-user compiled program cache")
+    argParser.add_argument("--watch", action="store_true",
+        help="re-check and re-run the script every time it changes")
+    argParser.add_argument("--profile", action="store_true",
+        help="time every executed syntax tree node and print the hottest nodes and lines (tree engine only)")
+    argParser.add_argument("--profile-collapsed", dest="profileCollapsed", metavar="FILE",
+        help="with --profile, also write collapsed stacks for flamegraph tools to FILE")
+    argParser.add_argument("--max-errors", dest="maxErrors", type=errorLimit, default=MAX_ERRORS, metavar="N",
+        help=f"report at most N errors and only count the rest, 0 for no limit (default: {MAX_ERRORS})")
+    argParser.add_argument("--error-format", dest="errorFormat", choices=FORMATS, default="text",
+        help="report errors with source excerpts or as one JSON object per line")
+    argParser.add_argument("--stats", action="store_true",
+        help="print the time and peak memory of each phase and counts of tokens, nodes and allocations as JSON on stderr")
+    argParser.add_argument("--stats-file", dest="statsFile", metavar="FILE",
+        help="with --stats, write the JSON to FILE instead")
+    args = argParser.parse_args()
+    if args.profile and (args.engine != "tree" or args.script == None or args.watch):
+        argParser.error("--profile needs a script and the tree engine")
+    if args.profileCollapsed != None and not args.profile:
+        argParser.error("--profile-collapsed needs --profile")
+    if args.stats and (args.script == None or args.watch or args.stream):
+        argParser.error("--stats needs a script and cannot be combined with --watch or --stream")
+    if args.statsFile != None and not args.stats:
+        argParser.error("--stats-file needs --stats")
+
+    errorHandler = ErrorHandler(args.maxErrors or None, args.errorFormat)
+    # The stack engine is meant for programs nested too deeply for recursion, so the
+    # type checker has to avoid recursing as well.
+    analyzer = Analyzer(errorHandler, iterative=args.engine == "stack")
+    profiler = Profiler() if args.profile else None
+    interpreter = ProfilingInterpreter(errorHandler, profiler) if args.profile else ENGINES[args.engine](errorHandler)
+    scannerClass = SCANNERS[args.scanner]
+    if args.watch:
+        if args.script == None:
+            argParser.error("--watch needs a script")
+        runWatch(args.script, ENGINES[args.engine], args.engine == "stack", args.maxErrors or None, args.errorFormat)
+    elif args.script != None:
+        runFile(args.script, analyzer, interpreter, errorHandler, args.optimize, args.compactTokens, scannerClass, args.stream, args.cache, profiler, args.profileCollapsed, RunStats() if args.stats else None, args.statsFile)
     else:
-        runRepl(analyzer, interpreter, errorHandler)
+        runRepl(analyzer, interpreter, errorHandler, args.optimize, args.compactTokens, scannerClass)
 
 def tempMain():
     expr = Binary(Unary(Token(TokenType.MINUS, "-", "", 1), Literal(123)), 
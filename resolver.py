@@ -0,0 +1,117 @@
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from typing import Tuple, Union
+
+class ScopeEnd():
+    def __init__(self, block: BlockStmt) -> None:
+        self.block: BlockStmt = block
+
+# The visit methods schedule sub-statements and sub-expressions on explicit stacks rather
+# than recursing, so arbitrarily deep programs can be resolved. Statements are resolved in
+# program order because declarations change the scopes; expressions only read them.
+# Blocks that declare no variables get no scope of their own unless elideScopes is off,
+# so the engines run them without creating an environment.
+class Resolver(ExprVisitor, StmtVisitor):
+    def __init__(self, elideScopes: bool = True) -> None:
+        self.elideScopes: bool = elideScopes
+        self.__scopes: list[dict[str, int]] = []
+        self.__statements: list[Union[Stmt, ScopeEnd]] = []
+        self.__expressions: list[Expr] = []
+
+    def resolve(self, program: list[Stmt]) -> None:
+        statements = self.__statements
+        statements.extend(reversed(program))
+        while statements:
+            stmt = statements.pop()
+            if isinstance(stmt, ScopeEnd):
+                stmt.block.slotCount = len(self.__scopes[-1])
+                self.__scopes.pop()
+            else:
+                stmt.accept(self)
+
+    def __resolveStmt(self, stmt: Stmt) -> None:
+        self.__statements.append(stmt)
+
+    def __resolveExpr(self, expr: Expr) -> None:
+        expressions = self.__expressions
+        expressions.append(expr)
+        while expressions:
+            expressions.pop().accept(self)
+
+    def __schedule(self, expr: Expr) -> None:
+        self.__expressions.append(expr)
+
+    def __lookup(self, name: str) -> Tuple[int, int]:
+        for depth, scope in enumerate(reversed(self.__scopes)):
+            if name in scope:
+                return depth, scope[name]
+        return None, None
+
+    def visitLiteralExpr(self, expr: Literal) -> None:
+        pass
+
+    def visitGroupingExpr(self, expr: Grouping) -> None:
+        self.__schedule(expr.expression)
+
+    def visitUnaryExpr(self, expr: Unary) -> None:
+        self.__schedule(expr.right)
+
+    def visitBinaryExpr(self, expr: Binary) -> None:
+        self.__schedule(expr.left)
+        self.__schedule(expr.right)
+
+    def visitTernaryExpr(self, expr: Ternary) -> None:
+        self.__schedule(expr.left)
+        self.__schedule(expr.mid)
+        self.__schedule(expr.right)
+
+    def visitVariableExpr(self, expr: Variable) -> None:
+        expr.depth, expr.slot = self.__lookup(expr.name.lexeme)
+
+    def visitAssignmentExpr(self, expr: Assignment) -> None:
+        self.__schedule(expr.value)
+        expr.depth, expr.slot = self.__lookup(expr.name.lexeme)
+
+    def visitLogicalExpr(self, expr: Logical) -> None:
+        self.__schedule(expr.left)
+        self.__schedule(expr.right)
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> None:
+        pass
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> None:
+        pass
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> None:
+        self.__resolveExpr(stmt.expression)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__resolveExpr(stmt.expression)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer != None:
+            self.__resolveExpr(stmt.initializer)
+        if not self.__scopes:
+            stmt.slot = None
+            return
+        scope = self.__scopes[-1]
+        if stmt.name.lexeme not in scope:
+            scope[stmt.name.lexeme] = len(scope)
+        stmt.slot = scope[stmt.name.lexeme]
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        # Branches of an if are statements, not declarations, so only the direct
+        # children of a block can declare names in it.
+        stmt.scoped = not self.elideScopes or any(isinstance(statement, VarStmt) for statement in stmt.statements)
+        if stmt.scoped:
+            self.__scopes.append({})
+            self.__statements.append(ScopeEnd(stmt))
+        else:
+            stmt.slotCount = 0
+        self.__statements.extend(reversed(stmt.statements))
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__resolveExpr(stmt.condition)
+        if stmt.elseBranch != None:
+            self.__resolveStmt(stmt.elseBranch)
+        self.__resolveStmt(stmt.thenBranch)
@@ -1,11 +1,12 @@
-from tokens import Token, TokenType
-from typing import Union, Tuple
+from tokens import Token, TokenType, TokenStream
+from typing import Union, Tuple, Iterator
 from errors import ErrorHandler, ErrorPos
 
 class Scanner:
-    def __init__(self, source:str, errorHandler: ErrorHandler) -> None:
+    def __init__(self, source:str, errorHandler: ErrorHandler, compact: bool = False) -> None:
         self.source: str = source
-        self.tokens: list[Token] = []
+        self.tokens: Union[list[Token], TokenStream] = TokenStream(source) if compact else []
+        self.__compact: bool = compact
 
         self.__start: int = 0
         self.__current: int = 0
@@ -47,14 +48,16 @@ class Scanner:
         self.errorHandler.error(pos, message)
 
     def __addToken(self, tokenType: TokenType, literal: Union[str, float, bool] = "") -> None:
+        if self.__compact:
+            self.tokens.append(tokenType, self.__start, self.__current, literal)
+            return
         lexeme = self.source[self.__start:self.__current]
         self.tokens.append(Token(tokenType, lexeme, literal, self.__line, self.__char - (len(lexeme)-1)))
 
     def __string(self) -> None:
         while self.__peek() != "\"" and not self.__isAtEnd():
-            if self.__peek() == "\n":
+            if self.__advance() == "\n":
                 self.__newLine()
-            self.__advance()
         
         if self.__isAtEnd():
             self.__error("Unterminated string")
@@ -161,7 +164,7 @@ class Scanner:
                 self.__error(f"Unexpected character \"{currentChar}\"")
                 self.__addToken(TokenType.ERROR)
 
-    def scanTokens(self) -> list[Token]:
+    def scanTokens(self) -> Union[list[Token], TokenStream]:
         while not self.__isAtEnd():
             self.__start = self.__current
             self.__scanToken()
@@ -169,6 +172,20 @@ class Scanner:
         self.__addToken(TokenType.EOF)
         return self.tokens
 
+    # Yields each Token as soon as it is scanned instead of collecting them all; the
+    # compact representation does not apply.
+    def iterTokens(self) -> Iterator[Token]:
+        self.tokens = []
+        self.__compact = False
+        while not self.__isAtEnd():
+            self.__start = self.__current
+            self.__scanToken()
+            if self.tokens:
+                yield self.tokens.pop()
+
+        self.__addToken(TokenType.EOF)
+        yield self.tokens.pop()
+
     def dumpTokens(self):
         for token in self.tokens:
             print(token)
\ No newline at end of file
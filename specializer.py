@@ -0,0 +1,202 @@
+from typing import Callable, Any, Tuple
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from expr import NumberAdd, NumberSubtract, NumberMultiply, NumberDivide, NumberLess, NumberLessEqual, NumberGreater, NumberGreaterEqual, StringConcat
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import TokenType
+from plobject import PLObjType
+
+NUMBER_NODES = {
+    TokenType.PLUS: NumberAdd,
+    TokenType.MINUS: NumberSubtract,
+    TokenType.STAR: NumberMultiply,
+    TokenType.SLASH: NumberDivide,
+    TokenType.LESS: NumberLess,
+    TokenType.LESS_EQUAL: NumberLessEqual,
+    TokenType.GREATER: NumberGreater,
+    TokenType.GREATER_EQUAL: NumberGreaterEqual,
+}
+
+STRING_NODES = {
+    TokenType.PLUS: StringConcat,
+}
+
+COMPARISONS = (
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.BANG_EQUAL,
+)
+
+Changes = dict[Tuple[int, str], PLObjType]
+
+# The Analyzer types a variable by its most recent assignment in program order, even
+# when that assignment sits in a branch that may not run. Specialized nodes skip the
+# runtime type checks entirely, so this pass re-derives operand types from the
+# Analyzer's literal and operator typing but merges variable types where branches join:
+# a variable that may hold different types afterwards becomes UNKNOWN and keeps the
+# generic node.
+class Specializer(ExprVisitor, StmtVisitor):
+    def __init__(self) -> None:
+        self.__scopes: list[dict[str, PLObjType]] = [{}]
+        self.__trail: list[Tuple[int, str, PLObjType]] = []
+
+    def specialize(self, program: list[Stmt]) -> None:
+        for stmt in program:
+            try:
+                self.__specializeStmt(stmt)
+            except RecursionError:
+                # Too deeply nested to specialize recursively. The nodes rewritten so far
+                # are still correct, but the walk did not finish, so nothing is known about
+                # the variables the statement declares or assigns.
+                self.__forget(stmt)
+
+    def __specializeStmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __specializeExpr(self, expr: Expr) -> Tuple[Expr, PLObjType]:
+        return expr.accept(self)
+
+    def __lookup(self, name: str) -> Tuple[int, PLObjType]:
+        for index in range(len(self.__scopes) - 1, -1, -1):
+            if name in self.__scopes[index]:
+                return index, self.__scopes[index][name]
+        return -1, PLObjType.UNKNOWN
+
+    def __setType(self, index: int, name: str, objType: PLObjType) -> None:
+        self.__trail.append((index, name, self.__scopes[index].get(name, PLObjType.UNKNOWN)))
+        self.__scopes[index][name] = objType
+
+    def __forget(self, stmt: Stmt) -> None:
+        if isinstance(stmt, VarStmt):
+            self.__setType(len(self.__scopes) - 1, stmt.name.lexeme, PLObjType.UNKNOWN)
+        pending: list = [stmt]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Assignment):
+                index, _ = self.__lookup(node.name.lexeme)
+                if index >= 0:
+                    self.__setType(index, node.name.lexeme, PLObjType.UNKNOWN)
+            for child in vars(node).values():
+                if isinstance(child, (Expr, Stmt)):
+                    pending.append(child)
+                elif isinstance(child, list):
+                    pending.extend(child)
+
+    def __branch(self, body: Callable[[], Any]) -> Tuple[Any, Changes]:
+        mark = len(self.__trail)
+        result = body()
+        changes: Changes = {}
+        while len(self.__trail) > mark:
+            index, name, previous = self.__trail.pop()
+            if index >= len(self.__scopes): continue
+            if (index, name) not in changes:
+                changes[(index, name)] = self.__scopes[index][name]
+            self.__scopes[index][name] = previous
+        return result, changes
+
+    def __join(self, first: Changes, second: Changes) -> None:
+        for index, name in set(first) | set(second):
+            current = self.__scopes[index].get(name, PLObjType.UNKNOWN)
+            firstType = first.get((index, name), current)
+            secondType = second.get((index, name), current)
+            self.__setType(index, name, firstType if firstType == secondType else PLObjType.UNKNOWN)
+
+    def __joinTypes(self, first: PLObjType, second: PLObjType) -> PLObjType:
+        return first if first == second else PLObjType.UNKNOWN
+
+    def visitLiteralExpr(self, expr: Literal) -> Tuple[Expr, PLObjType]:
+        return expr, expr.value.objType
+
+    def visitGroupingExpr(self, expr: Grouping) -> Tuple[Expr, PLObjType]:
+        expr.expression, objType = self.__specializeExpr(expr.expression)
+        return expr, objType
+
+    def visitUnaryExpr(self, expr: Unary) -> Tuple[Expr, PLObjType]:
+        expr.right, rightType = self.__specializeExpr(expr.right)
+        if expr.operator.tokenType == TokenType.BANG:
+            return expr, PLObjType.BOOL
+        elif rightType == PLObjType.NUMBER:
+            return expr, PLObjType.NUMBER
+        return expr, PLObjType.UNKNOWN
+
+    def visitBinaryExpr(self, expr: Binary) -> Tuple[Expr, PLObjType]:
+        expr.left, leftType = self.__specializeExpr(expr.left)
+        expr.right, rightType = self.__specializeExpr(expr.right)
+        tokenType = expr.operator.tokenType
+
+        if tokenType == TokenType.COMMA:
+            return expr, rightType
+
+        specialized = None
+        resultType = PLObjType.BOOL if tokenType in COMPARISONS else PLObjType.UNKNOWN
+        if leftType == PLObjType.NUMBER and rightType == PLObjType.NUMBER and tokenType in NUMBER_NODES:
+            specialized = NUMBER_NODES[tokenType]
+            if resultType != PLObjType.BOOL: resultType = PLObjType.NUMBER
+        elif leftType == PLObjType.STRING and rightType == PLObjType.STRING and tokenType in STRING_NODES:
+            specialized = STRING_NODES[tokenType]
+            resultType = PLObjType.STRING
+
+        if specialized != None:
+            node = specialized(expr.left, expr.operator, expr.right, expr.pos)
+            node.rType = expr.rType
+            return node, resultType
+        return expr, resultType
+
+    def visitTernaryExpr(self, expr: Ternary) -> Tuple[Expr, PLObjType]:
+        expr.left, _ = self.__specializeExpr(expr.left)
+        (expr.mid, midType), midChanges = self.__branch(lambda: self.__specializeExpr(expr.mid))
+        (expr.right, rightType), rightChanges = self.__branch(lambda: self.__specializeExpr(expr.right))
+        self.__join(midChanges, rightChanges)
+        return expr, self.__joinTypes(midType, rightType)
+
+    def visitVariableExpr(self, expr: Variable) -> Tuple[Expr, PLObjType]:
+        _, objType = self.__lookup(expr.name.lexeme)
+        return expr, objType
+
+    def visitAssignmentExpr(self, expr: Assignment) -> Tuple[Expr, PLObjType]:
+        expr.value, valueType = self.__specializeExpr(expr.value)
+        index, _ = self.__lookup(expr.name.lexeme)
+        if index >= 0:
+            self.__setType(index, expr.name.lexeme, valueType)
+        return expr, valueType
+
+    def visitLogicalExpr(self, expr: Logical) -> Tuple[Expr, PLObjType]:
+        expr.left, _ = self.__specializeExpr(expr.left)
+        (expr.right, _), rightChanges = self.__branch(lambda: self.__specializeExpr(expr.right))
+        self.__join(rightChanges, {})
+        return expr, PLObjType.BOOL
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> Tuple[Expr, PLObjType]:
+        return expr, PLObjType.ERROR
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> None:
+        pass
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> None:
+        stmt.expression, _ = self.__specializeExpr(stmt.expression)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        stmt.expression, _ = self.__specializeExpr(stmt.expression)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        objType = PLObjType.NIL
+        if stmt.initializer != None:
+            stmt.initializer, objType = self.__specializeExpr(stmt.initializer)
+        self.__setType(len(self.__scopes) - 1, stmt.name.lexeme, objType)
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__scopes.append({})
+        try:
+            self.specialize(stmt.statements)
+        finally:
+            self.__scopes.pop()
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        stmt.condition, _ = self.__specializeExpr(stmt.condition)
+        _, thenChanges = self.__branch(lambda: self.__specializeStmt(stmt.thenBranch))
+        elseChanges: Changes = {}
+        if stmt.elseBranch != None:
+            _, elseChanges = self.__branch(lambda: self.__specializeStmt(stmt.elseBranch))
+        self.__join(thenChanges, elseChanges)
@@ -0,0 +1,233 @@
+import operator
+from expr import Literal, Grouping, Unary, Binary, Ternary, Variable, Assignment, Logical
+from expr import NumberAdd, NumberSubtract, NumberMultiply, NumberDivide, NumberLess, NumberLessEqual, NumberGreater, NumberGreaterEqual, StringConcat
+from stmt import Stmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import TokenType
+from errors import PyLoxRuntimeError, ErrorHandler
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE, plBool, plNumber
+from environment import Environment, LocalEnvironment, EnvironmentPool
+from output import OutputSink
+
+# Work items are (action, node) pairs. EVAL and EXEC expand a node into further work;
+# the remaining actions combine the values its children left on the value stack.
+EVAL = 0
+EXEC = 1
+UNARY = 2
+BINARY = 3
+NUMERIC = 4
+BRANCH = 5
+LOGICAL = 6
+TO_BOOL = 7
+ASSIGN = 8
+DISCARD = 9
+PRINT = 10
+DEFINE = 11
+IF = 12
+LEAVE = 13
+
+GENERIC_OPS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+    TokenType.SLASH: operator.truediv,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.EQUAL_EQUAL: operator.eq,
+    TokenType.BANG_EQUAL: operator.ne,
+}
+
+NUMERIC_OPS = {
+    NumberAdd: (operator.add, plNumber),
+    NumberSubtract: (operator.sub, plNumber),
+    NumberMultiply: (operator.mul, plNumber),
+    NumberLess: (operator.lt, plBool),
+    NumberLessEqual: (operator.le, plBool),
+    NumberGreater: (operator.gt, plBool),
+    NumberGreaterEqual: (operator.ge, plBool),
+}
+
+# Evaluates with explicit work and value stacks instead of Python recursion, so that
+# nesting depth is bounded by memory rather than by the recursion limit. Behaves like
+# Interpreter otherwise.
+class StackInterpreter():
+    def __init__(self, errorHandler: ErrorHandler, output: OutputSink = None) -> None:
+        self.__errorHandler = errorHandler
+        self.__globals = Environment()
+        self.__environment: LocalEnvironment = None
+        self.__pool = EnvironmentPool()
+        self.output: OutputSink = output if output != None else OutputSink()
+
+    def interpret(self, program: list[Stmt]) -> None:
+        work = [(EXEC, stmt) for stmt in reversed(program)]
+        try:
+            self.__run(work)
+        except PyLoxRuntimeError as e:
+            self.__environment = None
+            self.__errorHandler.runtimeError(e)
+        finally:
+            self.output.flush()
+
+    def __run(self, work: list) -> None:
+        values: list[PLObject] = []
+        globals = self.__globals
+        write = self.output.write
+        acquire = self.__pool.acquire
+        release = self.__pool.release
+        push = values.append
+        pop = values.pop
+        schedule = work.append
+        NUMBER = PLObjType.NUMBER
+
+        while work:
+            action, node = work.pop()
+            if action == EVAL:
+                nodeType = type(node)
+                if nodeType is Literal:
+                    push(node.value)
+                elif nodeType is Variable:
+                    if node.depth == None:
+                        push(globals.get(node.name))
+                    else:
+                        push(self.__environment.getAt(node.depth, node.slot))
+                elif nodeType in NUMERIC_OPS or nodeType is NumberDivide or nodeType is StringConcat:
+                    schedule((NUMERIC, node))
+                    schedule((EVAL, node.right))
+                    schedule((EVAL, node.left))
+                elif nodeType is Binary:
+                    schedule((BINARY, node))
+                    schedule((EVAL, node.right))
+                    schedule((EVAL, node.left))
+                elif nodeType is Grouping:
+                    schedule((EVAL, node.expression))
+                elif nodeType is Unary:
+                    schedule((UNARY, node))
+                    schedule((EVAL, node.right))
+                elif nodeType is Ternary:
+                    schedule((BRANCH, node))
+                    schedule((EVAL, node.left))
+                elif nodeType is Logical:
+                    schedule((LOGICAL, node))
+                    schedule((EVAL, node.left))
+                elif nodeType is Assignment:
+                    schedule((ASSIGN, node))
+                    schedule((EVAL, node.value))
+                else:
+                    push(None)
+
+            elif action == NUMERIC:
+                right = pop().value
+                left = pop().value
+                nodeType = type(node)
+                if nodeType is NumberDivide:
+                    if right == 0:
+                        raise PyLoxRuntimeError(node.operator.pos, "Division by zero")
+                    push(plNumber(left / right))
+                elif nodeType is StringConcat:
+                    push(PLObject(PLObjType.STRING, left + right))
+                else:
+                    op, wrap = NUMERIC_OPS[nodeType]
+                    push(wrap(op(left, right)))
+
+            elif action == BINARY:
+                right = pop()
+                left = pop()
+                tokenType = node.operator.tokenType
+                if tokenType == TokenType.COMMA:
+                    push(right)
+                elif tokenType in GENERIC_OPS:
+                    try:
+                        push(GENERIC_OPS[tokenType](left, right))
+                    except PyLoxRuntimeError as e:
+                        raise PyLoxRuntimeError(node.operator.pos, e.message)
+                else:
+                    push(PLObject(PLObjType.ERROR, None))
+
+            elif action == UNARY:
+                right = pop()
+                tokenType = node.operator.tokenType
+                if tokenType == TokenType.MINUS:
+                    if right.objType is NUMBER:
+                        push(plNumber(-right.value))
+                    else:
+                        try:
+                            push(-right)
+                        except PyLoxRuntimeError as e:
+                            raise PyLoxRuntimeError(node.operator.pos, e.message)
+                elif tokenType == TokenType.BANG:
+                    push(FALSE if right else TRUE)
+                else:
+                    push(NIL)
+
+            elif action == BRANCH:
+                schedule((EVAL, node.mid if pop() else node.right))
+
+            elif action == LOGICAL:
+                left = pop()
+                if node.operator.tokenType == TokenType.OR:
+                    if left:
+                        push(TRUE)
+                        continue
+                elif not left:
+                    push(FALSE)
+                    continue
+                schedule((TO_BOOL, None))
+                schedule((EVAL, node.right))
+
+            elif action == TO_BOOL:
+                push(TRUE if pop() else FALSE)
+
+            elif action == ASSIGN:
+                value = values[-1]
+                if node.depth == None:
+                    globals.assign(node.name, value)
+                else:
+                    self.__environment.assignAt(node.depth, node.slot, value)
+
+            elif action == EXEC:
+                nodeType = type(node)
+                if nodeType is ExprStmt:
+                    schedule((DISCARD, None))
+                    schedule((EVAL, node.expression))
+                elif nodeType is PrintStmt:
+                    schedule((PRINT, None))
+                    schedule((EVAL, node.expression))
+                elif nodeType is VarStmt:
+                    schedule((DEFINE, node))
+                    if node.initializer != None:
+                        schedule((EVAL, node.initializer))
+                    else:
+                        push(NIL)
+                elif nodeType is BlockStmt:
+                    if node.scoped:
+                        schedule((LEAVE, self.__environment))
+                        self.__environment = acquire(self.__environment, node.slotCount)
+                    for statement in reversed(node.statements):
+                        schedule((EXEC, statement))
+                elif nodeType is IfStmt:
+                    schedule((IF, node))
+                    schedule((EVAL, node.condition))
+
+            elif action == DISCARD:
+                pop()
+
+            elif action == PRINT:
+                write(pop())
+
+            elif action == DEFINE:
+                value = pop()
+                if node.slot == None:
+                    globals.define(node.name.lexeme, value)
+                else:
+                    self.__environment.values[node.slot] = value
+
+            elif action == IF:
+                if pop():
+                    schedule((EXEC, node.thenBranch))
+                elif node.elseBranch != None:
+                    schedule((EXEC, node.elseBranch))
+
+            elif action == LEAVE:
+                release(self.__environment)
+                self.__environment = node
@@ -0,0 +1,114 @@
+import sys
+import json
+import time
+import platform
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import TextIO
+from expr import Expr
+from stmt import Stmt
+from plobject import PLObject
+from environment import Environment, LocalEnvironment
+
+# Bump when the layout of the stats document changes.
+FORMAT_VERSION = 1
+
+# Classes whose instances are counted while a run is measured, by the name they are
+# reported under.
+COUNTED_CLASSES = {
+    "plObjects": (PLObject,),
+    "environments": (Environment, LocalEnvironment),
+}
+
+def countNodes(program: list[Stmt]) -> int:
+    count = 0
+    pending: list = [program]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (Expr, Stmt)):
+            count += 1
+            pending.extend(vars(node).values())
+        elif isinstance(node, list):
+            pending.extend(node)
+    return count
+
+# Records the wall time and peak traced memory of each phase of a run together with the
+# sizes of what the phases produced. Memory is traced with tracemalloc, which slows every
+# allocation down, so the times of a measured run are higher than those of a plain one
+# and should only be compared with each other.
+class RunStats():
+    def __init__(self) -> None:
+        self.phases: dict[str, dict[str, float]] = {}
+        self.counts: dict[str, int] = {}
+        self.cached: bool = False
+        self.__started: bool = False
+        self.__constructors: list[tuple[type, object]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            self.phases[name] = {"seconds": elapsed, "peakBytes": max(peak - before, 0)}
+
+    def count(self, name: str, value: int) -> None:
+        self.counts[name] = value
+
+    # Records the hits and misses of the interpreter's inline caches and their hit rate.
+    def countCache(self, info: dict[str, int]) -> None:
+        self.counts["inlineCacheHits"] = info["hits"]
+        self.counts["inlineCacheMisses"] = info["misses"]
+        lookups = info["hits"] + info["misses"]
+        self.counts["inlineCacheHitRate"] = info["hits"] / lookups if lookups else 0.0
+
+    # Starts tracing memory and counting the instances of COUNTED_CLASSES. Counting
+    # wraps their constructors for the duration of the run, so that runs without stats
+    # execute the constructors untouched. Every start must be paired with a stop.
+    def start(self) -> None:
+        self.__started = not tracemalloc.is_tracing()
+        if self.__started:
+            tracemalloc.start()
+        for name, classes in COUNTED_CLASSES.items():
+            self.counts[name] = 0
+            for cls in classes:
+                self.__constructors.append((cls, cls.__init__))
+                cls.__init__ = self.__countingConstructor(name, cls.__init__)
+
+    def stop(self) -> None:
+        for cls, constructor in reversed(self.__constructors):
+            cls.__init__ = constructor
+        self.__constructors = []
+        if self.__started:
+            tracemalloc.stop()
+            self.__started = False
+
+    def __countingConstructor(self, name: str, constructor):
+        counts = self.counts
+        def countingConstructor(obj, *args, **kwargs):
+            counts[name] += 1
+            constructor(obj, *args, **kwargs)
+        return countingConstructor
+
+    def toJson(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "python": platform.python_version(),
+            "cached": self.cached,
+            "totalSeconds": sum(phase["seconds"] for phase in self.phases.values()),
+            "phases": self.phases,
+            "counts": self.counts,
+        }
+
+    def write(self, out: TextIO = None) -> None:
+        out = out if out != None else sys.stderr
+        json.dump(self.toJson(), out, indent=2)
+        out.write("\n")
+
+# The context for timing name in stats, or one that does nothing when stats is None.
+def phase(stats: RunStats, name: str):
+    return stats.phase(name) if stats != None else nullcontext()
@@ -22,36 +22,41 @@ class Stmt(ABC):
 
 class ErrorStmt(Stmt):
     def accept(self, visitor: StmtVisitor):
-        visitor.visitErrorStmt(self)
+        return visitor.visitErrorStmt(self)
 
 class ExprStmt(Stmt):
     def __init__(self, expr: Expr) -> None:
         self.expression: Expr = expr
     
     def accept(self, visitor: StmtVisitor):
-        visitor.visitExpressionStmt(self)
+        return visitor.visitExpressionStmt(self)
 
 class PrintStmt(Stmt):
     def __init__(self, expr: Expr) -> None:
         self.expression: Expr = expr
 
     def accept(self, visitor: StmtVisitor):
-        visitor.visitPrintStmt(self)
+        return visitor.visitPrintStmt(self)
 
 class VarStmt(Stmt):
     def __init__(self, name: Token, initializer: Expr) -> None:
         self.name: Token = name
         self.initializer: Expr = initializer
+        self.slot: int = None
 
     def accept(self, visitor: StmtVisitor):
-        visitor.visitVarStmt(self)
+        return visitor.visitVarStmt(self)
 
 class BlockStmt(Stmt):
     def __init__(self, statements: list[Stmt]) -> None:
         self.statements: list[Stmt] = statements
+        self.slotCount: int = 0
+        # Cleared by the Resolver for blocks that declare nothing, which run in the
+        # environment around them.
+        self.scoped: bool = True
 
     def accept(self, visitor: StmtVisitor):
-        visitor.visitBlockStmt(self)
+        return visitor.visitBlockStmt(self)
 
 class IfStmt(Stmt):
     def __init__(self, condition: Expr, thenBranch: Stmt, elseBranch: Stmt):
@@ -60,4 +65,4 @@ class IfStmt(Stmt):
         self.elseBranch: Stmt = elseBranch
 
     def accept(self, visitor: StmtVisitor):
-        visitor.visitIfStmt(self)
\ No newline at end of file
+        return visitor.visitIfStmt(self)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import random
+from errors import ErrorHandler, ErrorPos
+from expr import Expr
+from stmt import Stmt
+from tokens import Token
+from plobject import PLObject
+
+# Random Lox sources and comparable dumps of what the front end makes of them, shared by
+# the differential tests.
+
+NAMES = ["a", "b", "c", "d"]
+
+ATOMS = ["1", "2", "0", "3.5", "\"s\"", "\"t\"", "true", "false", "nil"] + NAMES
+
+BINARY_OPERATORS = ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!=", ","]
+
+# Lexemes strung together at random into mostly malformed token sequences.
+TOKEN_SOUP = ["a", "b", "1", "2", "\"s\"", "true", "nil", "-", "!", "(", ")", "+", "*", "/", "-",
+    "==", "!=", "<", ">=", "and", "or", "?", ":", "=", ",", "{", "}", ";", "var", "print", "if", "else"]
+
+# Characters random scanner inputs are made of, including ones that start no token.
+CHARACTERS = "abcxyz_019 \t\n\r.;,+-*/!=<>(){}?:\"@#$%&é"
+
+def expression(r: random.Random, depth: int) -> str:
+    if depth <= 0 or r.random() < 0.3:
+        return r.choice(ATOMS)
+    kind = r.randint(0, 9)
+    if kind < 4:
+        return f"{expression(r, depth - 1)} {r.choice(BINARY_OPERATORS)} {expression(r, depth - 1)}"
+    elif kind == 4:
+        return f"({expression(r, depth - 1)})"
+    elif kind == 5:
+        return f"{r.choice(['-', '!'])}{expression(r, depth - 1)}"
+    elif kind == 6:
+        return f"{expression(r, depth - 1)} ? {expression(r, depth - 1)} : {expression(r, depth - 1)}"
+    elif kind == 7:
+        return f"{expression(r, depth - 1)} {r.choice(['and', 'or'])} {expression(r, depth - 1)}"
+    return f"{r.choice(NAMES)} = {expression(r, depth - 1)}"
+
+def statement(r: random.Random, depth: int) -> str:
+    kind = r.randint(0, 9)
+    if kind < 3:
+        return f"print {expression(r, 3)};"
+    elif kind < 5:
+        return f"var {r.choice(NAMES)} = {expression(r, 3)};"
+    elif kind == 5 and depth > 0:
+        return "{ " + " ".join(statement(r, depth - 1) for _ in range(r.randint(0, 4))) + " }"
+    elif kind == 6 and depth > 0:
+        elseBranch = f" else {statement(r, depth - 1)}" if r.random() < 0.5 else ""
+        return f"if ({expression(r, 2)}) {statement(r, depth - 1)}{elseBranch}"
+    return f"{expression(r, 3)};"
+
+# A program that declares every name before its random statements.
+def program(r: random.Random, statements: int = None) -> str:
+    statements = statements if statements != None else r.randint(1, 8)
+    return "var a = 1; var b = 2; var c = \"x\"; var d = true;\n" + "\n".join(statement(r, 3) for _ in range(statements))
+
+def tokenSoup(r: random.Random) -> str:
+    return " ".join(r.choice(TOKEN_SOUP) for _ in range(r.randint(1, 14))) + r.choice([";", ""])
+
+def characters(r: random.Random, length: int) -> str:
+    return "".join(r.choice(CHARACTERS) for _ in range(length))
+
+# A structural, comparable form of tokens, trees and positions. Every attribute of every
+# node takes part, so two dumps are equal only if the trees are.
+def dump(node):
+    if isinstance(node, ErrorPos):
+        return repr(node)
+    elif isinstance(node, Token):
+        return (node.tokenType.name, node.lexeme, repr(node.literal), repr(node.pos))
+    elif isinstance(node, PLObject):
+        return (node.objType.name, repr(node.value))
+    elif isinstance(node, (Expr, Stmt)):
+        return (type(node).__name__, tuple(sorted((name, dump(value)) for name, value in vars(node).items())))
+    elif isinstance(node, (list, tuple)):
+        return tuple(dump(item) for item in node)
+    return repr(node)
+
+def errors(errorHandler: ErrorHandler) -> list[tuple[str, str]]:
+    return [(repr(pos), message) for pos, message in errorHandler.errors()]
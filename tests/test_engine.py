@@ -0,0 +1,74 @@
+import io
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from engine import Engine
+from environment import Shape, Environment
+from errors import PyLoxRuntimeError
+from tokens import Token, TokenType
+from plobject import plNumber
+
+# Slots that hold up every thread which has read their size until a second thread has read
+# it too, or until a timeout, so that two threads extending the same shape at once both get
+# past the check of its size before either writes its slot, if nothing keeps them apart.
+class RacingSlots(dict):
+    def __init__(self) -> None:
+        super().__init__()
+        self.waiting = threading.Barrier(2, timeout=0.5)
+
+    def __len__(self) -> int:
+        size = super().__len__()
+        try:
+            self.waiting.wait()
+        except threading.BrokenBarrierError:
+            pass
+        return size
+
+def testConcurrentExtendsKeepTheirOwnSlots():
+    root = Shape(RacingSlots(), 0)
+    shapes = {}
+    def extend(name: str) -> None:
+        shapes[name] = root.extend(name)
+    threads = [threading.Thread(target=extend, args=(name,)) for name in ("x", "y")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in ("x", "y"):
+        shape = shapes[name]
+        assert {other: slot for other, slot in shape.slots.items() if slot < shape.size} == {name: 0}
+        assert root.extend(name) is shape
+
+    environment = Environment()
+    environment.shape = shapes["x"]
+    environment.values.append(plNumber(1))
+    with pytest.raises(PyLoxRuntimeError, match="Undefined variable 'y'"):
+        environment.get(Token(TokenType.IDENTIFIER, "y", None, 1, 1))
+
+# Executions write to their own buffers, never to sys.stdout, so threads sharing an Engine
+# get their own output, and what another thread prints meanwhile ends up in none of it.
+def testConcurrentExecutionsKeepTheirOwnOutput():
+    engine = Engine(maxPrograms=4)
+    sources = [f"var n = {index};" + " print n;" * 2000 for index in range(8)]
+    stdout = io.StringIO()
+    done = threading.Event()
+    def printElsewhere() -> None:
+        while not done.is_set():
+            print("elsewhere")
+    with redirect_stdout(stdout):
+        printer = threading.Thread(target=printElsewhere)
+        printer.start()
+        try:
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(engine.execute, sources * 4))
+        finally:
+            done.set()
+            printer.join()
+    assert set(stdout.getvalue().splitlines()) <= {"elsewhere"}
+    for index, result in enumerate(results):
+        assert result.ok
+        assert result.output == f"{index % 8}\n" * 2000
+    info = engine.cacheInfo()
+    assert info["hits"] + info["misses"] == len(results)
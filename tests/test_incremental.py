@@ -0,0 +1,115 @@
+import io
+import random
+from contextlib import redirect_stdout
+from incremental import IncrementalFrontEnd
+from engine import compileProgram
+from analyzer import Analyzer
+from resolver import Resolver
+from interpreter import Interpreter
+from errors import ErrorHandler
+from fastscanner import FastScanner
+from pyLox import runChecked
+from generate import program, statement, dump, errors
+
+# Applies random edits to random scripts and checks after each one that the incremental
+# front end reports the errors of a full run of the front end, builds the same trees and,
+# run in segments, prints the same output and runtime errors.
+
+# Text inserted at random offsets, chosen to open and close comments, strings and blocks,
+# to introduce bad characters and to change the types of globals.
+SNIPPETS = ["var x = 1;\n", "print a;", "{", "}", "/*", "*/", "\"", "@", "\n", ";", "a = \"s\";",
+    "if (a) ", "else ", " ", "b = 2;\n", "print a + b;\n", "var a = true;", "print 1 / 0;\n"]
+
+EDITS_PER_SCRIPT = 25
+
+def mutate(r: random.Random, source: str) -> str:
+    kind = r.random()
+    if kind < 0.3 and source:
+        start = r.randrange(len(source))
+        return source[:start] + source[start + r.randint(1, 12):]
+    elif kind < 0.6:
+        offset = r.randint(0, len(source))
+        return source[:offset] + r.choice(SNIPPETS) + source[offset:]
+    elif kind < 0.8:
+        offset = r.randint(0, len(source))
+        return source[:offset] + statement(r, 2) + "\n" + source[offset:]
+    digits = [offset for offset, char in enumerate(source) if char.isdigit()]
+    if digits:
+        offset = r.choice(digits)
+        return source[:offset] + r.choice("0123456789") + source[offset + 1:]
+    return source
+
+def fullFrontEnd(source: str, iterative: bool) -> tuple:
+    errorHandler = ErrorHandler()
+    statements = compileProgram(source, Analyzer(errorHandler, iterative), errorHandler, optimize=False, scannerClass=FastScanner)
+    return statements, errors(errorHandler)
+
+def frontEndErrors(frontEnd: IncrementalFrontEnd) -> list[tuple[str, str]]:
+    return [(repr(pos), message) for pos, message in frontEnd.errors()]
+
+def fullRun(statements: list) -> tuple:
+    errorHandler = ErrorHandler()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        Interpreter(errorHandler).interpret(statements)
+    return output.getvalue(), errors(errorHandler)
+
+def incrementalRun(frontEnd: IncrementalFrontEnd) -> tuple:
+    errorHandler = ErrorHandler()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        runChecked(frontEnd, Interpreter, errorHandler)
+    return output.getvalue(), errors(errorHandler)
+
+def checkEdits(seed: int, iterative: bool) -> None:
+    r = random.Random(seed)
+    source = "\n".join(program(random.Random(script)) for script in range(seed, seed + r.randint(1, 6)))
+    # One front end has its trees compared, which brings all of their positions up to
+    # date. The other is only run, so that its positions stay shifted lazily.
+    compared = IncrementalFrontEnd(iterative)
+    executed = IncrementalFrontEnd(iterative)
+    for step in range(EDITS_PER_SCRIPT):
+        context = f"seed {seed}, edit {step}: {source!r}"
+        statements, expectedErrors = fullFrontEnd(source, iterative)
+        for frontEnd in (compared, executed):
+            assert frontEnd.update(source) == (statements != None), context
+            assert frontEndErrors(frontEnd) == expectedErrors, context
+        if statements != None:
+            # Trees are compared before running, which fills in their inline caches.
+            Resolver().resolve(statements)
+            trees = compared.program()
+            Resolver().resolve(trees)
+            assert dump(trees) == dump(statements), context
+            assert incrementalRun(executed) == fullRun(statements), context
+        source = mutate(r, source)
+
+# Lines inserted in front of a runtime error move it down without its declaration being
+# parsed again, so only running in segments puts it in the right place.
+def testRuntimeErrorBehindInsertedLines():
+    source = "var a = 1;\nprint a;\n{ print a / 0; }\nprint a;\n"
+    frontEnd = IncrementalFrontEnd()
+    for step in range(6):
+        statements, _ = fullFrontEnd(source, False)
+        assert frontEnd.update(source)
+        Resolver().resolve(statements)
+        output, runtimeErrors = incrementalRun(frontEnd)
+        assert (output, runtimeErrors) == fullRun(statements)
+        errorLine = source.count("\n", 0, source.index("{ print a / 0")) + 1
+        assert runtimeErrors[0][0].startswith(f"({errorLine}:")
+        source = ("var z = 2;\n" if step % 2 else "\n/* a\ncomment */ print 3;") + source
+
+def testRandomEdits():
+    for seed in range(60):
+        checkEdits(seed, iterative=False)
+
+def testRandomEditsIterative():
+    for seed in range(60, 90):
+        checkEdits(seed, iterative=True)
+
+# Small windows and checkpoints make edits cross window and checkpoint boundaries.
+def testRandomEditsSmallWindows(monkeypatch):
+    import incremental
+    monkeypatch.setattr(incremental, "WINDOW", 16)
+    monkeypatch.setattr(incremental, "CHECKPOINT", 2)
+    for seed in range(90, 130):
+        checkEdits(seed, iterative=False)
@@ -0,0 +1,100 @@
+import os
+import random
+from scanner import Scanner
+from parser import Parser
+from errors import ErrorHandler
+from engine import Engine
+from generate import program, tokenSoup, dump, errors
+import legacyparser
+
+# The precedence-climbing Parser must build exactly the trees, positions and errors of the
+# recursive-descent parser it replaced.
+
+def parsed(parserClass: type, source: str) -> tuple:
+    errorHandler = ErrorHandler()
+    tokens = Scanner(source, errorHandler).scanTokens()
+    try:
+        statements = parserClass(tokens, errorHandler).parse()
+    except RecursionError:
+        return "RecursionError"
+    return dump(statements), errors(errorHandler)
+
+def assertSameParse(source: str) -> None:
+    assert parsed(Parser, source) == parsed(legacyparser.Parser, source), repr(source)
+
+def testSampleScript():
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test.txt")) as f:
+        assertSameParse(f.read())
+
+def testOperatorPrecedenceAndErrors():
+    for source in [
+        "1 + 2 * 3 - 4 / 5;", "a = b = 1;", "a ? b : c ? d : 1;", "a = 1 ? 2 : 3;", "1, 2, 3;",
+        "!-!-a;", "a or b and c or d;", "1 < 2 == 3 >= 4 != 5;", "(1 + 2;", "1 +;", "= 1;",
+        "1 = 2;", "a ? b;", "a ? : c;", "print;", "var;", "var a = ;", "{ print 1;", "if (a print 1;",
+    ]:
+        assertSameParse(source)
+
+def testRandomTokenSequences():
+    r = random.Random(11)
+    for _ in range(8000):
+        assertSameParse(tokenSoup(r))
+
+def testRandomPrograms():
+    r = random.Random(12)
+    for _ in range(1500):
+        assertSameParse(program(r))
+
+# Wraps source in layers of parentheses, unary operators, ifs, elses and blocks, with some
+# layers left unclosed or broken to exercise error recovery at every depth.
+def nested(r: random.Random, depth: int) -> str:
+    expression = "a"
+    statement = "print a;"
+    for _ in range(depth):
+        kind = r.randint(0, 9)
+        if kind < 2:
+            expression = f"({expression}{r.choice([')', ')', ')', ''])}"
+        elif kind < 4:
+            expression = r.choice(["-", "!", "- -"]) + expression
+        elif kind == 4:
+            expression = f"b {r.choice(['+', '=', '?'])} {expression}"
+        elif kind == 5:
+            statement = f"if ({expression}) {statement}"
+        elif kind == 6:
+            statement = f"if (b) print a; else {statement}"
+        elif kind == 7:
+            statement = f"{{ var a = {expression}; {statement} }}"
+        elif kind == 8:
+            statement = f"{{ {statement}{r.choice([' }', ' }', ''])}"
+        else:
+            statement = f"print {expression}; {statement}"
+    return statement
+
+def testNestedConstructs():
+    r = random.Random(13)
+    for _ in range(3000):
+        assertSameParse(nested(r, r.randint(1, 30)))
+
+# Nesting far beyond Python's recursion limit parses, and runs on the stack engine.
+def testDeepNesting():
+    depth = 20000
+    engine = Engine(backend="stack")
+    for source, output in [
+        ("print " + "(" * depth + "1" + ")" * depth + ";", "1"),
+        ("print " + "-" * depth + "1;", "1"),
+        ("print " + "!" * depth + "true;", "true"),
+        ("if (true) " * depth + "print 1;", "1"),
+        ("if (true) { " * depth + "print 2;" + " }" * depth, "2"),
+        ("if (false) print 0;" + " else if (false) print 0;" * depth + " else print 3;", "3"),
+        ("var a = 1; print " + "(a - -(" * depth + "a" + "))" * depth + ";", str(depth + 1)),
+    ]:
+        result = engine.execute(source)
+        assert result.errors == [] and result.output == output + "\n", source[:40]
+
+# Every unclosed block reports its own error.
+def testDeepNestingErrors():
+    depth = 20000
+    errorHandler = ErrorHandler(maxErrors=None)
+    source = "print " + "(" * depth + "1;\n{ " + "if (true) { " * depth + "print -;"
+    Parser(Scanner(source, errorHandler).scanTokens(), errorHandler).parse()
+    messages = [message for _, message in errorHandler.errors()]
+    assert messages == ["Expected closing bracket", "Unary operator - expected operand"] + ["Expected closing brace"] * (depth + 1)
@@ -0,0 +1,60 @@
+import random
+from scanner import Scanner
+from fastscanner import FastScanner, STREAM_CHUNK
+from errors import ErrorHandler
+from generate import program, characters, tokenSoup, dump, errors
+
+# FastScanner must produce exactly the tokens and errors of Scanner, as a token list, as
+# a compact TokenStream and when streamed with iterTokens.
+
+def scanned(scannerClass: type, source: str, compact: bool = False) -> tuple:
+    errorHandler = ErrorHandler()
+    tokens = scannerClass(source, errorHandler, compact).scanTokens()
+    return dump(list(tokens)), errors(errorHandler)
+
+def streamed(scannerClass: type, source: str) -> tuple:
+    errorHandler = ErrorHandler()
+    tokens = list(scannerClass(source, errorHandler).iterTokens())
+    return dump(tokens), errors(errorHandler)
+
+def sources(seed: int, count: int) -> list[str]:
+    r = random.Random(seed)
+    result = [
+        "", " ", "\n", "/", "//", "/*", "/* a", "/* a */", "a /* b\n c */ d", "\"", "\"a\nb", "\"a\" \"b",
+        "1.", "1.5.", ".5", "12.34abc", "@", "a@b", "!=== <= >= ==", "// comment\nprint 1;",
+    ]
+    for index in range(count):
+        kind = index % 3
+        if kind == 0:
+            result.append(characters(r, r.randint(1, 40)))
+        elif kind == 1:
+            result.append(tokenSoup(r))
+        else:
+            result.append(program(r))
+    return result
+
+def testScanTokensMatchesScanner():
+    for source in sources(1, 3000):
+        assert scanned(FastScanner, source) == scanned(Scanner, source), repr(source)
+
+def testCompactTokensMatchScanner():
+    for source in sources(2, 1500):
+        expected = scanned(Scanner, source)
+        assert scanned(FastScanner, source, compact=True) == expected, repr(source)
+        assert scanned(Scanner, source, compact=True) == expected, repr(source)
+
+def testIterTokensMatchesScanner():
+    for source in sources(3, 1500):
+        assert streamed(FastScanner, source) == streamed(Scanner, source), repr(source)
+        assert streamed(FastScanner, source) == scanned(Scanner, source), repr(source)
+
+# Sources longer than the chunks iterTokens scans ahead, so that tokens, comments and
+# strings straddle chunk boundaries.
+def testIterTokensAcrossChunks():
+    r = random.Random(4)
+    for _ in range(20):
+        parts = []
+        while sum(len(part) for part in parts) < 3 * STREAM_CHUNK:
+            parts.append(r.choice([program(r), characters(r, 200), "/* " + characters(r, 300) + " */", "\"" + characters(r, 100).replace("\"", "") + "\""]))
+        source = "\n".join(parts)
+        assert streamed(FastScanner, source) == scanned(Scanner, source)
@@ -0,0 +1,41 @@
+import io
+from analyzer import Analyzer
+from errors import ErrorHandler
+from engine import ENGINES
+from output import OutputSink
+from pyLox import runStream
+
+# Streaming runs declarations in batches while later ones are still being compiled, but
+# must report errors in source order all the same.
+
+# Keeps the errors it reports instead of writing them.
+class KeptErrors(ErrorHandler):
+    def reportErrors(self, sourceCode: str) -> bool:
+        self.reported = [(pos.lS, message) for pos, message in self.errors()]
+        self.reportedSuppressed = self.suppressed
+        return bool(self.reported)
+
+def streamed(source: str, backend: str, maxErrors: int = None) -> tuple:
+    errorHandler = KeptErrors(maxErrors)
+    output = io.StringIO()
+    interpreter = ENGINES[backend](errorHandler, OutputSink(output))
+    runStream(source, Analyzer(errorHandler, backend == "stack"), interpreter, errorHandler)
+    return output.getvalue(), errorHandler
+
+def testRuntimeErrorBeforeCompileErrorIsReportedFirst():
+    for backend in ENGINES:
+        output, errorHandler = streamed("var a = 1;\nprint a / 0;\nprint 5;\nprint -true;\n", backend)
+        assert output == ""
+        assert errorHandler.reported == [(2, "Division by zero"), (4, "Bad type for negation: 'BOOL'")], backend
+        assert errorHandler.hadError and errorHandler.hadRuntimeError
+
+def testBatchBeforeCompileErrorRuns():
+    output, errorHandler = streamed("print 1;\nprint 2;\nprint -true;\nprint 3;\n", "tree")
+    assert output == "1\n2\n"
+    assert errorHandler.reported == [(3, "Bad type for negation: 'BOOL'")]
+
+# Compile errors set aside while the batch runs count against the limit after its errors.
+def testErrorLimitKeepsSourceOrder():
+    output, errorHandler = streamed("print 1 / 0;\nprint -true;\n", "tree", maxErrors=1)
+    assert errorHandler.reported == [(1, "Division by zero")]
+    assert errorHandler.reportedSuppressed == 1
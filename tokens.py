@@ -1,5 +1,7 @@
+from array import array
+from bisect import bisect_right
 from enum import Enum
-from typing import Union
+from typing import Union, Iterator
 from errors import ErrorPos
 
 class AutoNumber(Enum):
@@ -66,3 +68,104 @@ class Token:
 
     def __str__(self) -> str:
         return f"[{self.tokenType.name}] \"{self.lexeme}\" at {self.pos}"
+
+TOKEN_TYPES: list[TokenType] = list(TokenType)
+
+NO_LITERAL = -1
+LEXEME_LITERAL = -2
+STRING_LITERAL = -3
+
+# Column-oriented alternative to a list of Tokens. Only the kind, the source offsets and
+# a literal index are stored per token; lexemes are sliced from the source and line and
+# column are derived from the offsets when a Token is actually requested.
+class TokenStream:
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.kinds: array = array("B")
+        self.starts: array = array("I")
+        self.ends: array = array("I")
+        self.literals: array = array("i")
+        self.literalValues: list[float] = []
+
+        self.__literalIndices: dict[float, int] = {}
+        self.__lineStarts: Union[array, None] = None
+        self.__cachedIndex: int = -1
+        self.__cachedToken: Union[Token, None] = None
+
+    def append(self, tokenType: TokenType, start: int, end: int, literal: Union[str, float, bool] = "") -> None:
+        if tokenType == TokenType.STRING:
+            index = STRING_LITERAL
+        elif isinstance(literal, float):
+            index = self.__literalIndices.get(literal)
+            if index == None:
+                index = len(self.literalValues)
+                self.__literalIndices[literal] = index
+                self.literalValues.append(literal)
+        elif literal == "":
+            index = NO_LITERAL
+        else:
+            index = LEXEME_LITERAL
+        self.kinds.append(tokenType.value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.literals.append(index)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def tokenType(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def lexeme(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def literal(self, index: int) -> Union[str, float]:
+        literalIndex = self.literals[index]
+        if literalIndex == NO_LITERAL: return ""
+        elif literalIndex == LEXEME_LITERAL: return self.lexeme(index)
+        elif literalIndex == STRING_LITERAL: return self.source[self.starts[index] + 1:self.ends[index] - 1]
+        return self.literalValues[literalIndex]
+
+    def position(self, index: int) -> tuple[int, int]:
+        if self.__lineStarts == None:
+            lineStarts = array("I", [0])
+            newline = self.source.find("\n")
+            while newline != -1:
+                lineStarts.append(newline + 1)
+                newline = self.source.find("\n", newline + 1)
+            self.__lineStarts = lineStarts
+        # Like the Scanner, a token is placed on the line where it ends.
+        line = bisect_right(self.__lineStarts, self.ends[index])
+        return line, self.starts[index] - self.__lineStarts[line - 1] + 1
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0: index += len(self)
+        if index != self.__cachedIndex:
+            line, char = self.position(index)
+            self.__cachedToken = Token(self.tokenType(index), self.lexeme(index), self.literal(index), line, char)
+            self.__cachedIndex = index
+        return self.__cachedToken
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
+
+# Lets the Parser index into a token iterator. The Parser only ever looks at its current
+# token and the one before it, so older tokens are dropped as it advances.
+class TokenWindow:
+    def __init__(self, tokens: Iterator[Token]) -> None:
+        self.__tokens: Iterator[Token] = tokens
+        self.__window: list[Token] = []
+        self.__base: int = 0
+
+    def __getitem__(self, index: int) -> Token:
+        while self.__base + len(self.__window) <= index:
+            self.__window.append(next(self.__tokens))
+        if index - self.__base > 1:
+            del self.__window[:index - self.__base - 1]
+            self.__base = index - 1
+        return self.__window[index - self.__base]
+
+    def tokenType(self, index: int) -> TokenType:
+        return self[index].tokenType
+
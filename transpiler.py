@@ -0,0 +1,318 @@
+from typing import Any, Union
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import StmtVisitor, Stmt, ErrorStmt, ExprStmt, PrintStmt, VarStmt, BlockStmt, IfStmt
+from tokens import Token, TokenType
+from errors import PyLoxRuntimeError, ErrorHandler, ErrorPos
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE, plBool, plNumber
+from environment import Environment
+from closures import ClosureCompiler
+from output import OutputSink
+
+BOXED_OPS = {
+    TokenType.PLUS: "_add",
+    TokenType.MINUS: "_sub",
+    TokenType.STAR: "_mul",
+    TokenType.SLASH: "_div",
+    TokenType.LESS: "_lt",
+    TokenType.LESS_EQUAL: "_le",
+    TokenType.GREATER: "_gt",
+    TokenType.GREATER_EQUAL: "_ge",
+}
+
+RAW_OPS = {
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.STAR: "*",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+}
+
+COMPARISONS = (TokenType.LESS, TokenType.LESS_EQUAL, TokenType.GREATER, TokenType.GREATER_EQUAL)
+
+def _wrap(op):
+    def boxed(left: PLObject, right: PLObject, pos: ErrorPos) -> PLObject:
+        try:
+            return op(left, right)
+        except PyLoxRuntimeError as e:
+            raise PyLoxRuntimeError(pos, e.message)
+    return boxed
+
+def _neg(right: PLObject, pos: ErrorPos) -> PLObject:
+    try:
+        return -right
+    except PyLoxRuntimeError as e:
+        raise PyLoxRuntimeError(pos, e.message)
+
+def _rawDiv(left: float, right: float, pos: ErrorPos) -> float:
+    if right == 0:
+        raise PyLoxRuntimeError(pos, "Division by zero")
+    return left / right
+
+def _setGlobal(globals: Environment, name: Token, value: PLObject) -> PLObject:
+    globals.assign(name, value)
+    return value
+
+RUNTIME = {
+    "_PL": PLObject,
+    "_NUM": PLObjType.NUMBER,
+    "_NIL": NIL,
+    "_TRUE": TRUE,
+    "_FALSE": FALSE,
+    "_num": plNumber,
+    "_bool": plBool,
+    "_ERROR": PLObjType.ERROR,
+    "_add": _wrap(lambda l, r: l + r),
+    "_sub": _wrap(lambda l, r: l - r),
+    "_mul": _wrap(lambda l, r: l * r),
+    "_div": _wrap(lambda l, r: l / r),
+    "_lt": _wrap(lambda l, r: l < r),
+    "_le": _wrap(lambda l, r: l <= r),
+    "_gt": _wrap(lambda l, r: l > r),
+    "_ge": _wrap(lambda l, r: l >= r),
+    "_neg": _neg,
+    "_rdiv": _rawDiv,
+    "_setg": _setGlobal,
+}
+
+class Transpiler(ExprVisitor, StmtVisitor):
+    def __init__(self) -> None:
+        self.__lines: list[str] = []
+        self.__indent: int = 1
+        self.__constants: list[Any] = []
+        self.__scopes: list[dict[str, str]] = []
+        self.__localCount: int = 0
+        self.__temps: dict[Any, str] = {}
+
+    def transpile(self, program: list[Stmt]) -> tuple[str, list[Any]]:
+        self.__lines = ["def _main(_g, _w):"]
+        self.__indent = 1
+        self.__constants = []
+        self.__scopes = []
+        self.__localCount = 0
+        for stmt in program:
+            self.__emitStmt(stmt)
+        self.__line("pass")
+        return "\n".join(self.__lines) + "\n", self.__constants
+
+    def __line(self, code: str) -> None:
+        self.__lines.append("    " * self.__indent + code)
+
+    def __constant(self, value: Any) -> str:
+        self.__constants.append(value)
+        return f"_k{len(self.__constants) - 1}"
+
+    def __emitStmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __expr(self, expr: Expr) -> str:
+        if not self.__temps and self.__isRawRoot(expr):
+            return self.__guarded(expr)
+        return expr.accept(self)
+
+    def __lookupLocal(self, name: str) -> Union[str, None]:
+        for scope in reversed(self.__scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def __variableKey(self, expr: Variable) -> str:
+        local = self.__lookupLocal(expr.name.lexeme)
+        return local if local != None else "global:" + expr.name.lexeme
+
+    def __readVariable(self, expr: Variable) -> str:
+        key = self.__variableKey(expr)
+        if key in self.__temps:
+            return self.__temps[key]
+        local = self.__lookupLocal(expr.name.lexeme)
+        if local != None:
+            return local
+        return f"_g.get({self.__constant(expr.name)})"
+
+    # Arithmetic over operands the Analyzer typed as NUMBER runs on raw floats. Variable
+    # types are only known at the point of analysis, so the raw path is guarded by a
+    # type test on the variables it reads and falls back to PLObject arithmetic.
+    def __isNumeric(self, expr: Expr) -> bool:
+        if isinstance(expr, Literal):
+            return expr.value.objType == PLObjType.NUMBER
+        elif isinstance(expr, Variable):
+            return expr.rType == PLObjType.NUMBER
+        elif isinstance(expr, Grouping):
+            return self.__isNumeric(expr.expression)
+        elif isinstance(expr, Unary):
+            return expr.operator.tokenType == TokenType.MINUS and self.__isNumeric(expr.right)
+        elif isinstance(expr, Binary):
+            return (expr.operator.tokenType in BOXED_OPS and expr.operator.tokenType not in COMPARISONS
+                and self.__isNumeric(expr.left) and self.__isNumeric(expr.right))
+        return False
+
+    def __isRawRoot(self, expr: Expr) -> bool:
+        if isinstance(expr, Binary) and expr.operator.tokenType in COMPARISONS:
+            return self.__isNumeric(expr.left) and self.__isNumeric(expr.right)
+        return isinstance(expr, (Unary, Binary)) and self.__isNumeric(expr)
+
+    def __collectVariables(self, expr: Expr, found: list[Variable]) -> None:
+        if isinstance(expr, Variable):
+            found.append(expr)
+        elif isinstance(expr, Grouping):
+            self.__collectVariables(expr.expression, found)
+        elif isinstance(expr, Unary):
+            self.__collectVariables(expr.right, found)
+        elif isinstance(expr, Binary):
+            self.__collectVariables(expr.left, found)
+            self.__collectVariables(expr.right, found)
+
+    def __raw(self, expr: Expr) -> str:
+        if isinstance(expr, Literal):
+            return repr(float(expr.value.value))
+        elif isinstance(expr, Variable):
+            return f"{self.__temps[self.__variableKey(expr)]}.value"
+        elif isinstance(expr, Grouping):
+            return self.__raw(expr.expression)
+        elif isinstance(expr, Unary):
+            return f"(-{self.__raw(expr.right)})"
+        elif expr.operator.tokenType == TokenType.SLASH:
+            return f"_rdiv({self.__raw(expr.left)}, {self.__raw(expr.right)}, {self.__constant(expr.operator.pos)})"
+        return f"({self.__raw(expr.left)} {RAW_OPS[expr.operator.tokenType]} {self.__raw(expr.right)})"
+
+    def __guarded(self, expr: Expr) -> str:
+        wrap = "_num" if self.__isNumeric(expr) else "_bool"
+        variables: list[Variable] = []
+        self.__collectVariables(expr, variables)
+        reads: list[str] = []
+        for variable in variables:
+            key = self.__variableKey(variable)
+            if key not in self.__temps:
+                read = self.__readVariable(variable)
+                self.__temps[key] = f"_t{len(self.__temps)}"
+                reads.append(f"({self.__temps[key]} := {read})")
+        try:
+            raw = f"{wrap}({self.__raw(expr)})"
+            if not reads:
+                return raw
+            checks = " and ".join(f"{temp}.objType is _NUM" for temp in self.__temps.values())
+            return f"({raw} if ({', '.join(reads)},) and {checks} else {expr.accept(self)})"
+        finally:
+            self.__temps = {}
+
+    def visitLiteralExpr(self, expr: Literal) -> str:
+        return self.__constant(expr.value)
+
+    def visitGroupingExpr(self, expr: Grouping) -> str:
+        return self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: Unary) -> str:
+        right = self.__expr(expr.right)
+        if expr.operator.tokenType == TokenType.MINUS:
+            return f"_neg({right}, {self.__constant(expr.operator.pos)})"
+        elif expr.operator.tokenType == TokenType.BANG:
+            return f"(_FALSE if {right} else _TRUE)"
+        return f"({right}, _NIL)[1]"
+
+    def visitBinaryExpr(self, expr: Binary) -> str:
+        left = self.__expr(expr.left)
+        right = self.__expr(expr.right)
+        tokenType = expr.operator.tokenType
+        if tokenType in BOXED_OPS:
+            return f"{BOXED_OPS[tokenType]}({left}, {right}, {self.__constant(expr.operator.pos)})"
+        elif tokenType == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        elif tokenType == TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+        elif tokenType == TokenType.COMMA:
+            return f"({left}, {right})[1]"
+        return f"({left}, {right}, _PL(_ERROR, None))[2]"
+
+    def visitTernaryExpr(self, expr: Ternary) -> str:
+        condition = self.__expr(expr.left)
+        return f"({self.__expr(expr.mid)} if {condition} else {self.__expr(expr.right)})"
+
+    def visitVariableExpr(self, expr: Variable) -> str:
+        return self.__readVariable(expr)
+
+    def visitAssignmentExpr(self, expr: Assignment) -> str:
+        value = self.__expr(expr.value)
+        local = self.__lookupLocal(expr.name.lexeme)
+        if local != None:
+            return f"({local} := {value})"
+        return f"_setg(_g, {self.__constant(expr.name)}, {value})"
+
+    def visitLogicalExpr(self, expr: Logical) -> str:
+        keyword = "or" if expr.operator.tokenType == TokenType.OR else "and"
+        return f"(_TRUE if ({self.__expr(expr.left)} {keyword} {self.__expr(expr.right)}) else _FALSE)"
+
+    def visitErrorExpr(self, expr: ErrorExpr) -> str:
+        return "None"
+
+    def visitErrorStmt(self, stmt: ErrorStmt) -> None:
+        pass
+
+    def visitExpressionStmt(self, stmt: ExprStmt) -> None:
+        self.__line(self.__expr(stmt.expression))
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__line(f"_w({self.__expr(stmt.expression)})")
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        value = self.__expr(stmt.initializer) if stmt.initializer != None else "_NIL"
+        if not self.__scopes:
+            self.__line(f"_g.define({stmt.name.lexeme!r}, {value})")
+            return
+        scope = self.__scopes[-1]
+        if stmt.name.lexeme not in scope:
+            self.__localCount += 1
+            scope[stmt.name.lexeme] = f"_l{self.__localCount}_{stmt.name.lexeme}"
+        self.__line(f"{scope[stmt.name.lexeme]} = {value}")
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__scopes.append({})
+        try:
+            for statement in stmt.statements:
+                self.__emitStmt(statement)
+        finally:
+            self.__scopes.pop()
+
+    def __branch(self, stmt: Stmt) -> None:
+        self.__indent += 1
+        self.__emitStmt(stmt)
+        self.__line("pass")
+        self.__indent -= 1
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__line(f"if {self.__expr(stmt.condition)}:")
+        self.__branch(stmt.thenBranch)
+        if stmt.elseBranch != None:
+            self.__line("else:")
+            self.__branch(stmt.elseBranch)
+
+class PythonInterpreter():
+    def __init__(self, errorHandler: ErrorHandler, output: OutputSink = None) -> None:
+        self.__errorHandler = errorHandler
+        self.__globals = Environment()
+        self.output: OutputSink = output if output != None else OutputSink()
+        self.__closureCompiler = ClosureCompiler(self.__globals, self.output)
+
+    def compile(self, program: list[Stmt]):
+        try:
+            source, constants = Transpiler().transpile(program)
+            namespace = dict(RUNTIME)
+            namespace.update((f"_k{index}", value) for index, value in enumerate(constants))
+            exec(compile(source, "<lox>", "exec"), namespace)
+            return namespace["_main"]
+        except (SyntaxError, RecursionError, MemoryError):
+            # CPython's parser has hard nesting limits (e.g. 100 indentation levels);
+            # programs beyond them still run through the closure backend.
+            closure = self.__closureCompiler.compile(program)
+            return lambda globals, write: closure(None)
+
+    def run(self, compiled) -> None:
+        try:
+            compiled(self.__globals, self.output.write)
+        except PyLoxRuntimeError as e:
+            self.__errorHandler.runtimeError(e)
+        finally:
+            self.output.flush()
+
+    def interpret(self, program: list[Stmt]) -> None:
+        self.run(self.compile(program))
@@ -0,0 +1,245 @@
+from typing import Union
+from expr import ExprVisitor, Expr, Literal, Grouping, Unary, Binary, Ternary, ErrorExpr, Variable, Assignment, Logical
+from stmt import ExprStmt
+from tokens import TokenType
+from errors import ErrorHandler, ErrorPos
+from analyzer import Analyzer
+from plobject import PLObjType, PLObject, plBool, plNumber
+
+# NumPy is only needed to evaluate expressions over columns, so everything else runs
+# without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Types of the values vectorized evaluation can hold in an array.
+VECTOR_TYPES = (PLObjType.NUMBER, PLObjType.BOOL)
+
+def requireNumpy() -> None:
+    if np == None:
+        raise ImportError("vectorized evaluation needs NumPy, which is not installed")
+
+# The type a column is bound as: bool arrays hold BOOLs and numeric arrays NUMBERs.
+def columnType(column) -> PLObjType:
+    if column.dtype.kind == "b":
+        return PLObjType.BOOL
+    elif column.dtype.kind in "iuf":
+        return PLObjType.NUMBER
+    raise TypeError(f"Cannot bind a column of dtype '{column.dtype}' to a Lox variable")
+
+# The subexpressions of an expression, in the order they are evaluated.
+def children(expr: Expr) -> tuple:
+    if isinstance(expr, Grouping):
+        return (expr.expression,)
+    elif isinstance(expr, Unary):
+        return (expr.right,)
+    elif isinstance(expr, (Binary, Logical)):
+        return (expr.left, expr.right)
+    elif isinstance(expr, Ternary):
+        return (expr.left, expr.mid, expr.right)
+    elif isinstance(expr, Assignment):
+        return (expr.value,)
+    return ()
+
+# Forgets the types the analyzer left on an expression, which hold for the bindings it was
+# last checked with, so that it is checked anew for the types of other columns.
+def clearTypes(expr: Expr) -> None:
+    pending = [expr]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Literal):
+            node.rType = node.value.objType
+        elif not isinstance(node, ErrorExpr):
+            node.rType = PLObjType.UNKNOWN
+        pending.extend(children(node))
+
+# The value of an expression for every row of the columns it was evaluated over. Rows in
+# which scalar evaluation would have stopped with a runtime error are marked in failed,
+# and errors holds the row, position and message of each such error in row order. The
+# values of failed rows are meaningless.
+class VectorResult():
+    def __init__(self, values, rType: PLObjType, failed, errors: list[tuple[int, ErrorPos, str]]) -> None:
+        self.values = values
+        self.rType: PLObjType = rType
+        self.failed = failed
+        self.errors: list[tuple[int, ErrorPos, str]] = errors
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    # The value of a row as scalar evaluation returns it, or None if the row failed.
+    def value(self, row: int) -> Union[PLObject, None]:
+        if self.failed[row]:
+            return None
+        elif self.rType == PLObjType.BOOL:
+            return plBool(bool(self.values[row]))
+        return plNumber(float(self.values[row]))
+
+# Evaluates an expression over columns of bindings for its free variables at once, so
+# that each node costs a few array operations instead of one visit per row. Only
+# expressions built from NUMBERs and BOOLs can be held in arrays, which typeCheck makes
+# sure of before evaluate is called.
+#
+# Scalar evaluation short-circuits logical operators and evaluates one branch of a
+# ternary, and stops at the first runtime error. Here both sides are computed for every
+# row, while the mask of active rows tracks which rows scalar evaluation would actually
+# reach; errors are only recorded for those, and a row that fails drops out of it.
+class VectorEvaluator(ExprVisitor):
+    def __init__(self, columns: dict[str, object]) -> None:
+        requireNumpy()
+        self.columns: dict = {}
+        self.types: dict[str, PLObjType] = {}
+        self.rows: int = None
+        for name, column in columns.items():
+            column = np.asarray(column)
+            if column.ndim != 1:
+                raise ValueError(f"Column '{name}' must be one-dimensional")
+            if self.rows == None:
+                self.rows = len(column)
+            elif len(column) != self.rows:
+                raise ValueError(f"Column '{name}' has {len(column)} rows instead of {self.rows}")
+            self.types[name] = columnType(column)
+            self.columns[name] = column if self.types[name] == PLObjType.BOOL else column.astype(np.float64)
+        if self.rows == None:
+            self.rows = 1
+        self.__active = None
+        self.__failed = None
+        self.__errors: list[tuple[int, ErrorPos, str]] = []
+
+    # Type-checks expr with the columns bound as globals and reports, through
+    # errorHandler, type errors and subexpressions that cannot be vectorized. Returns
+    # whether expr can be evaluated.
+    def typeCheck(self, expr: Expr, errorHandler: ErrorHandler) -> bool:
+        clearTypes(expr)
+        before = len(errorHandler.errors())
+        analyzer = Analyzer(errorHandler)
+        for name, objType in self.types.items():
+            analyzer.typeEnvironment.define(name, objType)
+        analyzer.typeCheckProgram([ExprStmt(expr)])
+        pending = [expr]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Logical):
+                # The analyzer types logical expressions as BOOL without looking at their
+                # operands, which have to be NUMBERs or BOOLs here as well.
+                analyzer.typeCheckProgram([ExprStmt(node.left), ExprStmt(node.right)])
+            if len(errorHandler.errors()) != before:
+                return False
+            if isinstance(node, Assignment):
+                errorHandler.error(node.pos, "Cannot vectorize an assignment")
+            elif node.rType not in VECTOR_TYPES:
+                errorHandler.error(node.pos, f"Cannot vectorize a value of type '{node.rType}'")
+            else:
+                pending.extend(reversed(children(node)))
+        return len(errorHandler.errors()) == before
+
+    # Evaluates an expression that passed typeCheck.
+    def evaluate(self, expr: Expr) -> VectorResult:
+        self.__active = np.ones(self.rows, dtype=bool)
+        self.__failed = np.zeros(self.rows, dtype=bool)
+        self.__errors = []
+        # Rows that are not active are computed too; what they divide by or overflow to
+        # does not matter.
+        with np.errstate(all="ignore"):
+            values = expr.accept(self)
+        errors = sorted(self.__errors, key=lambda error: error[0])
+        return VectorResult(values, expr.rType, self.__failed, errors)
+
+    # Evaluates expr for the active rows in which mask holds.
+    def __evaluateWhere(self, mask, expr: Expr):
+        active = self.__active
+        self.__active = active & mask
+        try:
+            return expr.accept(self)
+        finally:
+            self.__active = active & ~self.__failed
+
+    def __fail(self, mask, pos: ErrorPos, message: str) -> None:
+        rows = mask & self.__active
+        if rows.any():
+            self.__failed |= rows
+            self.__active = self.__active & ~rows
+            self.__errors.extend((int(row), pos, message) for row in np.flatnonzero(rows))
+
+    # Truthiness as bool gives it: every number but 0 is true, NaN included.
+    def __truth(self, values, objType: PLObjType):
+        return values if objType == PLObjType.BOOL else values != 0
+
+    def visitLiteralExpr(self, expr: Literal):
+        if expr.rType == PLObjType.BOOL:
+            return np.full(self.rows, bool(expr.value.value))
+        return np.full(self.rows, expr.value.value, dtype=np.float64)
+
+    def visitGroupingExpr(self, expr: Grouping):
+        return expr.expression.accept(self)
+
+    def visitVariableExpr(self, expr: Variable):
+        return self.columns[expr.name.lexeme]
+
+    def visitUnaryExpr(self, expr: Unary):
+        right = expr.right.accept(self)
+        if expr.operator.tokenType == TokenType.MINUS:
+            return -right
+        return ~self.__truth(right, expr.right.rType)
+
+    def visitBinaryExpr(self, expr: Binary):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        tokenType = expr.operator.tokenType
+        if tokenType == TokenType.PLUS:
+            return left + right
+        elif tokenType == TokenType.MINUS:
+            return left - right
+        elif tokenType == TokenType.STAR:
+            return left * right
+        elif tokenType == TokenType.SLASH:
+            zero = right == 0
+            self.__fail(zero, expr.operator.pos, "Division by zero")
+            return left / right
+        elif tokenType == TokenType.LESS:
+            return left < right
+        elif tokenType == TokenType.LESS_EQUAL:
+            return left <= right
+        elif tokenType == TokenType.GREATER:
+            return left > right
+        elif tokenType == TokenType.GREATER_EQUAL:
+            return left >= right
+        elif tokenType == TokenType.EQUAL_EQUAL:
+            # Values of different types are never equal, not even true and 1.
+            if expr.left.rType != expr.right.rType:
+                return np.zeros(self.rows, dtype=bool)
+            return left == right
+        elif tokenType == TokenType.BANG_EQUAL:
+            if expr.left.rType != expr.right.rType:
+                return np.ones(self.rows, dtype=bool)
+            return left != right
+        return right
+
+    def visitTernaryExpr(self, expr: Ternary):
+        condition = self.__truth(expr.left.accept(self), expr.left.rType)
+        mid = self.__evaluateWhere(condition, expr.mid)
+        right = self.__evaluateWhere(~condition, expr.right)
+        return np.where(condition, mid, right)
+
+    def visitLogicalExpr(self, expr: Logical):
+        left = self.__truth(expr.left.accept(self), expr.left.rType)
+        if expr.operator.tokenType == TokenType.OR:
+            right = self.__evaluateWhere(~left, expr.right)
+            return left | self.__truth(right, expr.right.rType)
+        right = self.__evaluateWhere(left, expr.right)
+        return left & self.__truth(right, expr.right.rType)
+
+    def visitAssignmentExpr(self, expr: Assignment):
+        raise TypeError("Cannot vectorize an assignment")
+
+    def visitErrorExpr(self, expr: ErrorExpr):
+        raise TypeError("Cannot vectorize an erroneous expression")
+
+# Type-checks and evaluates expr over columns, or returns None after reporting through
+# errorHandler why it cannot be vectorized.
+def evaluateColumns(expr: Expr, columns: dict[str, object], errorHandler: ErrorHandler) -> Union[VectorResult, None]:
+    evaluator = VectorEvaluator(columns)
+    if not evaluator.typeCheck(expr, errorHandler):
+        return None
+    return evaluator.evaluate(expr)
@@ -0,0 +1,199 @@
+from stmt import Stmt
+from errors import PyLoxRuntimeError, ErrorHandler
+from plobject import PLObjType, PLObject, NIL, TRUE, FALSE, plNumber
+from environment import Environment, LocalEnvironment, EnvironmentPool
+from bytecode import OpCode, Chunk
+from compiler import Compiler
+from output import OutputSink
+
+class VM():
+    def __init__(self, errorHandler: ErrorHandler, output: OutputSink = None) -> None:
+        self.__errorHandler = errorHandler
+        self.__globals = Environment()
+        self.__compiler = Compiler()
+        self.__pool = EnvironmentPool()
+        self.output: OutputSink = output if output != None else OutputSink()
+
+    def compile(self, program: list[Stmt]) -> Chunk:
+        return self.__compiler.compile(program)
+
+    def interpret(self, program: list[Stmt]) -> None:
+        self.run(self.compile(program))
+
+    def run(self, chunk: Chunk) -> None:
+        try:
+            self.__run(chunk)
+        except PyLoxRuntimeError as e:
+            self.__errorHandler.runtimeError(e)
+        finally:
+            self.output.flush()
+
+    def __run(self, chunk: Chunk) -> None:
+        CONSTANT = OpCode.CONSTANT.value
+        NIL_OP = OpCode.NIL.value
+        POP = OpCode.POP.value
+        GET_GLOBAL = OpCode.GET_GLOBAL.value
+        SET_GLOBAL = OpCode.SET_GLOBAL.value
+        DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+        GET_LOCAL = OpCode.GET_LOCAL.value
+        SET_LOCAL = OpCode.SET_LOCAL.value
+        DEFINE_LOCAL = OpCode.DEFINE_LOCAL.value
+        ADD = OpCode.ADD.value
+        SUBTRACT = OpCode.SUBTRACT.value
+        MULTIPLY = OpCode.MULTIPLY.value
+        DIVIDE = OpCode.DIVIDE.value
+        LESS = OpCode.LESS.value
+        LESS_EQUAL = OpCode.LESS_EQUAL.value
+        GREATER = OpCode.GREATER.value
+        GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+        EQUAL = OpCode.EQUAL.value
+        NOT_EQUAL = OpCode.NOT_EQUAL.value
+        NEGATE = OpCode.NEGATE.value
+        NOT = OpCode.NOT.value
+        TO_BOOL = OpCode.TO_BOOL.value
+        JUMP = OpCode.JUMP.value
+        JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+        JUMP_IF_TRUE = OpCode.JUMP_IF_TRUE.value
+        POP_JUMP_IF_FALSE = OpCode.POP_JUMP_IF_FALSE.value
+        PRINT = OpCode.PRINT.value
+        PUSH_SCOPE = OpCode.PUSH_SCOPE.value
+        POP_SCOPE = OpCode.POP_SCOPE.value
+        HALT = OpCode.HALT.value
+
+        NUMBER = PLObjType.NUMBER
+        code = chunk.code
+        constants = chunk.constants
+        stack: list[PLObject] = []
+        push = stack.append
+        pop = stack.pop
+        write = self.output.write
+        acquire = self.__pool.acquire
+        release = self.__pool.release
+        globals = self.__globals
+        env: LocalEnvironment = None
+        ip = 0
+
+        try:
+            while True:
+                op = code[ip]
+                ip += 1
+                if op == CONSTANT:
+                    push(constants[code[ip]])
+                    ip += 1
+                elif op == GET_LOCAL:
+                    push(env.getAt(code[ip], code[ip + 1]))
+                    ip += 2
+                elif op == GET_GLOBAL:
+                    push(globals.get(constants[code[ip]]))
+                    ip += 1
+                elif op == POP:
+                    pop()
+                elif op == ADD:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = plNumber(left.value + right.value)
+                    else:
+                        stack[-1] = left + right
+                elif op == SUBTRACT:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = plNumber(left.value - right.value)
+                    else:
+                        stack[-1] = left - right
+                elif op == MULTIPLY:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = plNumber(left.value * right.value)
+                    else:
+                        stack[-1] = left * right
+                elif op == DIVIDE:
+                    right = pop()
+                    stack[-1] = stack[-1] / right
+                elif op == LESS:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = TRUE if left.value < right.value else FALSE
+                    else:
+                        stack[-1] = left < right
+                elif op == LESS_EQUAL:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = TRUE if left.value <= right.value else FALSE
+                    else:
+                        stack[-1] = left <= right
+                elif op == GREATER:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = TRUE if left.value > right.value else FALSE
+                    else:
+                        stack[-1] = left > right
+                elif op == GREATER_EQUAL:
+                    right = pop()
+                    left = stack[-1]
+                    if left.objType is NUMBER and right.objType is NUMBER:
+                        stack[-1] = TRUE if left.value >= right.value else FALSE
+                    else:
+                        stack[-1] = left >= right
+                elif op == EQUAL:
+                    right = pop()
+                    stack[-1] = stack[-1] == right
+                elif op == NOT_EQUAL:
+                    right = pop()
+                    stack[-1] = stack[-1] != right
+                elif op == SET_LOCAL:
+                    env.assignAt(code[ip], code[ip + 1], stack[-1])
+                    ip += 2
+                elif op == DEFINE_LOCAL:
+                    env.values[code[ip]] = pop()
+                    ip += 1
+                elif op == SET_GLOBAL:
+                    globals.assign(constants[code[ip]], stack[-1])
+                    ip += 1
+                elif op == DEFINE_GLOBAL:
+                    globals.define(constants[code[ip]], pop())
+                    ip += 1
+                elif op == POP_JUMP_IF_FALSE:
+                    if pop():
+                        ip += 1
+                    else:
+                        ip = code[ip]
+                elif op == JUMP:
+                    ip = code[ip]
+                elif op == JUMP_IF_FALSE:
+                    if stack[-1]:
+                        ip += 1
+                    else:
+                        ip = code[ip]
+                elif op == JUMP_IF_TRUE:
+                    if stack[-1]:
+                        ip = code[ip]
+                    else:
+                        ip += 1
+                elif op == TO_BOOL:
+                    stack[-1] = TRUE if stack[-1] else FALSE
+                elif op == NEGATE:
+                    stack[-1] = -stack[-1]
+                elif op == NOT:
+                    stack[-1] = FALSE if stack[-1] else TRUE
+                elif op == NIL_OP:
+                    push(NIL)
+                elif op == PRINT:
+                    write(pop())
+                elif op == PUSH_SCOPE:
+                    env = acquire(env, code[ip])
+                    ip += 1
+                elif op == POP_SCOPE:
+                    release(env)
+                    env = env.enclosing
+                elif op == HALT:
+                    return
+        except PyLoxRuntimeError as e:
+            if e.pos == None:
+                raise PyLoxRuntimeError(chunk.positions[ip - 1], e.message)
+            raise